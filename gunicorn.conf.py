@@ -0,0 +1,28 @@
+"""
+Gunicorn settings of the production profile, read from the envs/.django file. The WSGI app runs in sync workers, or
+in threaded ones when GUNICORN_THREADS is above 1. The ASGI app can be served with
+GUNICORN_APP=warehouse.asgi:application and GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker.
+"""
+
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'envs/.django'))
+
+wsgi_app = os.getenv('GUNICORN_APP', 'warehouse.wsgi:application')
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# an API request with HTTP Basic credentials spends a few hundred milliseconds of CPU time on the PBKDF2 password check,
+# so a sync worker serves only a few of them per second, the API clients should send tokens instead
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+
+# the workers are restarted after a number of requests, so a slow leak can't grow for the lifetime of the container
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
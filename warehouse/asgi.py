@@ -0,0 +1,13 @@
+"""
+ASGI entry point of the warehouse project, served e.g. by `uvicorn warehouse.asgi:application`. The read-only pages
+are routed to their async views, so a slow client waiting on a page doesn't hold a worker thread.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'warehouse.settings')
+os.environ.setdefault('ROOT_URLCONF', 'warehouse.asgi_urls')
+
+application = get_asgi_application()
@@ -0,0 +1,22 @@
+from django.urls import path
+
+from warehouse.urls import urlpatterns as wsgi_urlpatterns
+from website.views import (AsyncItemsView, AsyncSingleItemView, AsyncOrderView, AsyncSingleOrderView,
+                           AsyncLinkedOrderView)
+
+# the read-only pages of the ASGI deployment are served by the async views, the remaining urls are shared
+ASYNC_VIEWS = {
+    'items': AsyncItemsView,
+    'items_ordered': AsyncItemsView,
+    'item_by_name': AsyncSingleItemView,
+    'orders': AsyncOrderView,
+    'orders_ordered': AsyncOrderView,
+    'order_by_id': AsyncSingleOrderView,
+    'linked_orders': AsyncLinkedOrderView,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name].as_view(), name=pattern.name)
+    if getattr(pattern, 'name', None) in ASYNC_VIEWS else pattern
+    for pattern in wsgi_urlpatterns
+]
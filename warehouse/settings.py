@@ -13,9 +13,10 @@ load_dotenv(DJANGO_ENV_DIR)
 
 SECRET_KEY = os.getenv('SECRET_KEY')
 
-DEBUG = True
+# the debug mode keeps every executed query in memory, so it is only enabled explicitly in the environment
+DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.getenv('ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -27,6 +28,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'crispy_forms',
     'crispy_bootstrap5',
     'website',
@@ -37,6 +39,7 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = 'bootstrap5'
 CRISPY_TEMPLATE_PACK = 'bootstrap5'
 
 MIDDLEWARE = [
+    'website.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -46,7 +49,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'warehouse.urls'
+# the ASGI entry point switches to the urls of the async views
+ROOT_URLCONF = os.getenv('ROOT_URLCONF', 'warehouse.urls')
+
+ASGI_APPLICATION = 'warehouse.asgi.application'
 
 TEMPLATES = [
     {
@@ -74,7 +80,25 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
         'PORT': os.getenv('POSTGRES_PORT'),
-        'ENGINE': 'django.db.backends.postgresql'
+        'ENGINE': 'django.db.backends.postgresql',
+        # the connections are kept open between requests and checked before being reused after an error
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Cache
+
+# the cached pages and the autocomplete index follow the model versions kept in the cache. The local memory cache is
+# private to every process, so with several workers a change made through one of them leaves the pages cached by the
+# others stale until they expire (PAGE_CACHE_TIMEOUT). Deployments with several workers should share the cache, e.g.
+# the file cache in a shared directory or Redis, with CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and
+# CACHE_LOCATION=redis://localhost:6379/0.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'warehouse'),
     }
 }
 
@@ -111,6 +135,19 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+STATIC_ROOT = os.getenv('STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
+
+# Worker processes rendering the thumbnails of the uploaded Item photos, in every web server process
+
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', 2))
+
+# Delivery of the notifications about the Items which dropped to their reorder threshold, e.g.
+# website.alerts.ConsoleSink or website.alerts.FileSink
+
+LOW_STOCK_NOTIFICATION_SINK = os.getenv('LOW_STOCK_NOTIFICATION_SINK', 'website.alerts.ConsoleSink')
+
+LOW_STOCK_NOTIFICATION_FILE = os.getenv('LOW_STOCK_NOTIFICATION_FILE', os.path.join(BASE_DIR, 'low_stock.jsonl'))
+
 # Default primary key field type
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -2,8 +2,13 @@ from django.contrib import admin
 from django.urls import path
 
 from website.views import (HomePageView, RegisterView, LoginView, LogoutView, ItemsView, ItemUpdateView, ItemDeleteView,
-                           SingleItemView, FilterItemView, OrderView, SingleOrderView, FilterOrderView, OrderCreateView, OrderUpdateView,
-                           LinkedOrderView, LinkedOrderUpdateView)
+                           ItemImportView, ItemAutocompleteView, ItemThumbnailView, SingleItemView, SearchItemView,
+                           FilterItemView, OrderView, SingleOrderView, FilterOrderView, OrderCreateView,
+                           OrderUpdateView, LinkedOrderView, LinkedOrderUpdateView, ReportView, LowStockView,
+                           ReorderSuggestionView, ExportView)
+from website.api import (ApiListView, ApiDetailView, OrderBatchCreateApiView, OrderBatchStatusApiView,
+                         LinkedOrderBatchStatusApiView, MetricsView)
+from website.models import Item, Order, LinkedOrder
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,17 +17,53 @@ urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('items/', ItemsView.as_view(), name='items'),
+    path('items/export/', ExportView.as_view(model=Item, permission_required='website.view_item'),
+         name='items_export'),
     path('items/<ordering>', ItemsView.as_view(), name='items_ordered'),
     path('items/<pk>/update/', ItemUpdateView.as_view(), name='update'),
     path('items/<pk>/delete/', ItemDeleteView.as_view(), name='delete'),
+    path('items/import/', ItemImportView.as_view(), name='items_import'),
+    path('items/autocomplete/', ItemAutocompleteView.as_view(), name='items_autocomplete'),
+    path('items/thumbnails/<file_name>', ItemThumbnailView.as_view(), name='item_thumbnail'),
+    path('items/search/', SearchItemView.as_view(), name='items_search'),
     path('items/search/<item_name>', SingleItemView.as_view(), name='item_by_name'),
-    path('items/filter/<filtering>', FilterItemView.as_view(), name='items_filtered'),
+    path('items/filter/', FilterItemView.as_view(), name='items_filtered'),
     path('orders/', OrderView.as_view(), name='orders'),
+    path('orders/export/', ExportView.as_view(model=Order, permission_required='website.view_order'),
+         name='orders_export'),
     path('orders/<ordering>', OrderView.as_view(), name='orders_ordered'),
-    path('orders/filter/<filtering>', FilterOrderView.as_view(), name='orders_filtered'),
+    path('orders/filter/', FilterOrderView.as_view(), name='orders_filtered'),
     path('orders/search/<order_id>', SingleOrderView.as_view(), name='order_by_id'),
     path('orders/<item_id>/create/', OrderCreateView.as_view(), name='orders_create'),
     path('orders/<pk>/update/', OrderUpdateView.as_view(), name='orders_update'),
     path('linked_orders/', LinkedOrderView.as_view(), name='linked_orders'),
+    path('linked_orders/export/',
+         ExportView.as_view(model=LinkedOrder, permission_required='website.view_linkedorder'),
+         name='linked_orders_export'),
     path('linked_orders/<pk>/update/', LinkedOrderUpdateView.as_view(), name='linked_orders_update'),
+    path('reports/', ReportView.as_view(), name='reports'),
+    path('low_stock/', LowStockView.as_view(), name='low_stock'),
+    path('reorder_suggestions/', ReorderSuggestionView.as_view(), name='reorder_suggestions'),
+    path('api/v1/items/', ApiListView.as_view(model=Item, permission_required='website.view_item'),
+         name='api_items'),
+    path('api/v1/items/<int:pk>/', ApiDetailView.as_view(model=Item, permission_required='website.view_item'),
+         name='api_item'),
+    path('api/v1/orders/',
+         ApiListView.as_view(model=Order, permission_required=['website.view_order', 'website.change_order']),
+         name='api_orders'),
+    path('api/v1/orders/batch/', OrderBatchCreateApiView.as_view(), name='api_orders_batch'),
+    path('api/v1/orders/status/', OrderBatchStatusApiView.as_view(), name='api_orders_status'),
+    path('api/v1/orders/<int:pk>/',
+         ApiDetailView.as_view(model=Order, permission_required=['website.view_order', 'website.change_order']),
+         name='api_order'),
+    path('api/v1/linked_orders/',
+         ApiListView.as_view(model=LinkedOrder,
+                             permission_required=['website.view_linkedorder', 'website.change_linkedorder']),
+         name='api_linked_orders'),
+    path('api/v1/linked_orders/status/', LinkedOrderBatchStatusApiView.as_view(), name='api_linked_orders_status'),
+    path('api/v1/linked_orders/<int:pk>/',
+         ApiDetailView.as_view(model=LinkedOrder,
+                               permission_required=['website.view_linkedorder', 'website.change_linkedorder']),
+         name='api_linked_order'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
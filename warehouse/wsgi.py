@@ -0,0 +1,11 @@
+"""
+WSGI entry point of the warehouse project, served in production by `gunicorn --config gunicorn.conf.py`.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'warehouse.settings')
+
+application = get_wsgi_application()
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Item, Order, LinkedOrder
+from .models import (Item, Order, LinkedOrder, LinkedOrderNumber, StockMovement, StockReservation, LowStockAlert,
+                     ReorderSuggestion, ApiToken)
 
 
 class ItemAdmin(admin.ModelAdmin):
@@ -16,6 +17,78 @@ class LinkedOrderAdmin(admin.ModelAdmin):
                     'status']
 
 
+class LinkedOrderNumberAdmin(admin.ModelAdmin):
+    list_display = ['order_number', 'last_position']
+
+
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ['item_id', 'quantity', 'kind', 'order_id', 'linked_order_id', 'employee_name', 'created_at']
+    list_filter = ['kind']
+
+    # the ledger is append-only, the movements are only created by the application
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['item_id', 'quantity', 'order_id', 'linked_order_id', 'expires_at']
+
+    # the reservations change the cached reserved quantity of the items, so they are only managed by the application
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class LowStockAlertAdmin(admin.ModelAdmin):
+    list_display = ['item_id', 'created_at']
+
+    # the alerts follow the stock levels, they are deleted only together with their items
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class ReorderSuggestionAdmin(admin.ModelAdmin):
+    list_display = ['item_id', 'weekly_demand', 'reorder_point', 'suggested_quantity', 'computed_at']
+
+    # the suggestions are replaced by every run of the forecast
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = ['name', 'user', 'created_at']
+
+    # the tokens are created by the create_api_token command, which shows their keys once, and revoked by deleting them
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(Item, ItemAdmin)
 admin.site.register(Order, OrderAdmin)
 admin.site.register(LinkedOrder, LinkedOrderAdmin)
+admin.site.register(LinkedOrderNumber, LinkedOrderNumberAdmin)
+admin.site.register(StockMovement, StockMovementAdmin)
+admin.site.register(StockReservation, StockReservationAdmin)
+admin.site.register(LowStockAlert, LowStockAlertAdmin)
+admin.site.register(ReorderSuggestion, ReorderSuggestionAdmin)
+admin.site.register(ApiToken, ApiTokenAdmin)
@@ -0,0 +1,90 @@
+import json
+import logging
+import sys
+from functools import cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Item, LowStockAlert
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationSink:
+    """Delivers the low stock notifications. The sink used is set by the LOW_STOCK_NOTIFICATION_SINK setting."""
+
+    def send(self, notifications):
+        raise NotImplementedError
+
+
+class ConsoleSink(NotificationSink):
+    def send(self, notifications):
+        for notification in notifications:
+            sys.stdout.write(f"Low stock: {notification['item_name']} ({notification['item_id']}), quantity "
+                             f"{notification['quantity']}, reorder threshold {notification['reorder_threshold']}\n")
+        sys.stdout.flush()
+
+
+class FileSink(NotificationSink):
+    """Appends the notifications as JSON lines to the LOW_STOCK_NOTIFICATION_FILE."""
+
+    def send(self, notifications):
+        with open(settings.LOW_STOCK_NOTIFICATION_FILE, 'a') as notification_file:
+            for notification in notifications:
+                notification_file.write(json.dumps(notification) + '\n')
+
+
+@cache
+def get_notification_sink():
+    return import_string(settings.LOW_STOCK_NOTIFICATION_SINK)()
+
+
+def send_notifications(notifications):
+    # the stock changes are already committed, a failing sink can't undo them
+    try:
+        get_notification_sink().send(notifications)
+    except Exception:
+        logger.exception("Low stock notifications of %s items failed", len(notifications))
+
+
+def check_stock_levels(item_ids):
+    """
+    Compares the quantities of the Items with their reorder thresholds after a change of the stock. The Items which
+    dropped to the threshold get an alert and a notification once the transaction is committed, the alerts of the Items
+    replenished above it are removed. The Items already alerted are not notified again, so a change of any number of
+    Items costs two queries, and up to two more for the alerts changed.
+
+    The threshold is compared with the quantity in stock rather than the available quantity. The alerts follow the
+    movements of the stock, the reserved items are still in the warehouse until the orders are approved, and the
+    reservations of the new orders come and go without a coordinator. The reorder suggestions take them into account.
+    """
+
+    item_ids = set(item_ids)
+    if not item_ids:
+        return
+    with transaction.atomic(savepoint=False):
+        # the low Items are locked before their alerts are read, so of two transactions changing the stock of an Item
+        # the later one waits for the earlier one and finds its alert, and only one of them sends the notification
+        low_items = {item_object.item_id: item_object for item_object in Item.objects.select_for_update().filter(
+            item_id__in=item_ids, reorder_threshold__gt=0, quantity__lte=F('reorder_threshold')).only(
+            'item_id', 'item_name', 'quantity', 'reorder_threshold').order_by('item_id')}
+        alerted_item_ids = set(LowStockAlert.objects.filter(item_id__in=item_ids).values_list('item_id', flat=True))
+
+        if recovered_item_ids := alerted_item_ids - low_items.keys():
+            LowStockAlert.objects.filter(item_id__in=recovered_item_ids).delete()
+        if new_item_ids := low_items.keys() - alerted_item_ids:
+            LowStockAlert.objects.bulk_create([LowStockAlert(item_id_id=item_id) for item_id in sorted(new_item_ids)],
+                                              ignore_conflicts=True)
+            created_at = timezone.now().isoformat()
+            notifications = [{
+                'item_id': item_id,
+                'item_name': low_items[item_id].item_name,
+                'quantity': low_items[item_id].quantity,
+                'reorder_threshold': low_items[item_id].reorder_threshold,
+                'created_at': created_at,
+            } for item_id in sorted(new_item_ids)]
+            transaction.on_commit(lambda: send_notifications(notifications))
@@ -0,0 +1,329 @@
+import base64
+import binascii
+import hashlib
+import json
+import secrets
+from collections import defaultdict
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.http import HttpResponse, JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .exports import EXPORT_FIELDS
+from .forms import OrderForm
+from .metrics import metrics_registry
+from .models import Item, Order, LinkedOrder, ApiToken
+from .pagination import CursorPaginator
+from .rollups import add_new_orders_to_rollups
+from .stock import reserve_stock_for_orders, update_order_statuses, update_linked_order_status
+from .utils import get_filter_values, get_filtered_obj
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+API_BATCH_LIMIT = 500
+
+# the list endpoints return the same columns as the exports, the rows are serialized as arrays of values
+API_FIELDS = EXPORT_FIELDS
+
+
+def get_api_token_hash(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def create_api_token(user, name):
+    """Creates an API token of the user and returns its key, which can't be read back later."""
+
+    key = secrets.token_urlsafe(32)
+    ApiToken.objects.create(user=user, name=name, key_hash=get_api_token_hash(key))
+    return key
+
+
+def get_token_auth_user(request):
+    """Returns the active user of the API token sent as 'Authorization: Token <key>', in a single query."""
+
+    method, _separator, key = request.headers.get('Authorization', '').partition(' ')
+    if method.lower() != 'token' or not key:
+        return None
+    token = ApiToken.objects.select_related('user').filter(key_hash=get_api_token_hash(key.strip())).first()
+    if token is None or not token.user.is_active:
+        return None
+    return token.user
+
+
+def get_basic_auth_user(request):
+    """
+    Returns the user authenticated by the HTTP Basic credentials of the request. Every request checks the password
+    with the slow PBKDF2 hash, which takes a few hundred milliseconds of the worker's CPU time with the default 720 000
+    iterations, so the scanners and ERP sync should send API tokens instead, see get_token_auth_user.
+    """
+
+    method, _separator, credentials = request.headers.get('Authorization', '').partition(' ')
+    if method.lower() != 'basic':
+        return None
+    try:
+        username, _separator, password = base64.b64decode(credentials).decode().partition(':')
+    except (binascii.Error, UnicodeError):
+        return None
+    return authenticate(request, username=username, password=password)
+
+
+def get_field_value(obj, field_path):
+    """Follows the related objects along the field path, the related objects are represented by their primary key."""
+
+    for field_name in field_path.split('__'):
+        obj = getattr(obj, field_name)
+    if isinstance(obj, models.Model):
+        return obj.pk
+    return obj
+
+
+def serialize_row(obj, fields):
+    return [get_field_value(obj, field_path) for field_path in fields]
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class ApiView(PermissionRequiredMixin, View):
+    """
+    Base class of the JSON API views. The clients authenticate either with the session cookie, in which case the CSRF
+    token is required for the writes like in the forms, with an API token or with the HTTP Basic credentials. The errors
+    are returned as JSON with the matching status code instead of redirects.
+    """
+
+    model = None
+
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        api_user = get_token_auth_user(request) or get_basic_auth_user(request)
+        if api_user is not None:
+            request.user = api_user
+        elif request.user.is_authenticated and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            csrf_rejection = CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {})
+            if csrf_rejection is not None:
+                return JsonResponse({'error': "CSRF verification failed"}, status=403)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': error.message}, status=error.status)
+
+    def handle_no_permission(self):
+        if not self.request.user.is_authenticated:
+            return JsonResponse({'error': "Authentication required"}, status=401)
+        return JsonResponse({'error': "Permission denied"}, status=403)
+
+    def get_json_body(self, key):
+        """Returns the list under the key of the JSON request body, limited to API_BATCH_LIMIT entries."""
+
+        try:
+            entries = json.loads(self.request.body)[key]
+        except (ValueError, TypeError, KeyError):
+            raise ApiError(f"The request body has to be a JSON object with the '{key}' list")
+        if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+            raise ApiError(f"'{key}' has to be a list of objects")
+        if len(entries) > API_BATCH_LIMIT:
+            raise ApiError(f"At most {API_BATCH_LIMIT} entries can be sent in one request")
+        return entries
+
+    def get_queryset(self, objects=None):
+        """Fetches only the serialized fields, the related objects are joined in the same query."""
+
+        fields = API_FIELDS[self.model]
+        related_fields = {field_path.split('__')[0] for field_path in fields if '__' in field_path}
+        if objects is None:
+            objects = self.model.objects.all()
+        return objects.select_related(*related_fields).only(*fields)
+
+
+class ApiListView(ApiView):
+    """
+    Lists the objects of the model filtered by the same query parameters as the filter views. The pages are cursor
+    paginated by the 'ordering' field, and the objects are serialized as arrays of the values of the listed fields.
+    """
+
+    def get_page_size(self):
+        try:
+            page_size = int(self.request.GET.get('limit', API_PAGE_SIZE))
+        except ValueError:
+            raise ApiError("'limit' has to be a number")
+        return max(1, min(page_size, API_MAX_PAGE_SIZE))
+
+    def get(self, request):
+        ordering = request.GET.get('ordering', self.model._meta.pk.name)
+        # only the fields with an index matching the cursor pagination
+        if ordering.lstrip('-') not in self.model.ordering_fields:
+            raise ApiError(f"Unknown ordering field '{ordering}'")
+
+        filter_values = get_filter_values(self.model, request.GET)
+        objects = self.get_queryset(get_filtered_obj(self.model, filter_values))
+        paginator = CursorPaginator(objects, self.get_page_size(), ordering, with_count='count' in request.GET)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+
+        fields = API_FIELDS[self.model]
+        return JsonResponse({
+            'fields': fields,
+            'results': [serialize_row(obj, fields) for obj in page_obj],
+            'next': page_obj.next_cursor,
+            'previous': page_obj.previous_cursor,
+            'count': page_obj.count,
+        })
+
+
+class ApiDetailView(ApiView):
+    """Returns a single object of the model as a JSON object."""
+
+    def get(self, request, pk):
+        try:
+            obj = self.get_queryset().get(pk=pk)
+        except (self.model.DoesNotExist, ValueError):
+            raise ApiError("Not found", status=404)
+        fields = API_FIELDS[self.model]
+        return JsonResponse(dict(zip(fields, serialize_row(obj, fields))))
+
+
+class OrderBatchCreateApiView(ApiView):
+    """
+    Creates many Orders in a single transaction: either all of them are created, with their quantities reserved, or
+    none. Expects {"orders": [{"item_id", "quantity", "unit_of_measurement", "comment"}, ...]}.
+    """
+
+    permission_required = 'website.add_order'
+
+    def post(self, request):
+        entries = self.get_json_body('orders')
+        for index, entry in enumerate(entries):
+            if not isinstance(entry.get('item_id'), int):
+                raise ApiError(f"Order {index}: 'item_id' has to be a number")
+        items = Item.objects.only('item_id', 'item_group', 'price_without_VAT').in_bulk(
+            {entry['item_id'] for entry in entries})
+
+        errors = {}
+        new_orders = []
+        for index, entry in enumerate(entries):
+            form = OrderForm(entry)
+            item_object = items.get(entry.get('item_id'))
+            if not form.is_valid() or item_object is None or form.cleaned_data['quantity'] < 1:
+                entry_errors = dict(form.errors)
+                if item_object is None:
+                    entry_errors['item_id'] = ["There is no such item"]
+                elif form.is_valid():
+                    entry_errors['quantity'] = ["The quantity has to be positive"]
+                errors[index] = entry_errors
+                continue
+            new_orders.append(Order(
+                employee_name=request.user,
+                item_id=item_object,
+                unit_of_measurement=form.cleaned_data['unit_of_measurement'],
+                quantity=form.cleaned_data['quantity'],
+                price_without_VAT=form.cleaned_data['quantity'] * item_object.price_without_VAT,
+                comment=form.cleaned_data['comment'],
+                status=Order.Status.NEW,
+            ))
+        if errors:
+            return JsonResponse({'errors': errors}, status=400)
+
+        try:
+            with transaction.atomic():
+                new_orders = Order.objects.bulk_create(new_orders)
+                reserve_stock_for_orders(new_orders)
+                add_new_orders_to_rollups(new_orders)
+        except ValidationError as error:
+            raise ApiError(error.messages[0], status=409)
+        return JsonResponse({'order_ids': [order_object.order_id for order_object in new_orders]}, status=201)
+
+
+class OrderBatchStatusApiView(ApiView):
+    """
+    Applies many Order status changes in a single transaction. The approvals are checked against the stock per item,
+    the Orders which lack stock or don't exist are left unchanged and returned with their errors. Expects
+    {"changes": [{"order_id", "status"}, ...]}.
+    """
+
+    permission_required = 'website.change_order'
+
+    def post(self, request):
+        changes = self.get_json_body('changes')
+        statuses = {}
+        for index, change in enumerate(changes):
+            if change.get('status') not in Order.Status.values:
+                raise ApiError(f"Change {index}: unknown status '{change.get('status')}'")
+            if not isinstance(change.get('order_id'), int):
+                raise ApiError(f"Change {index}: 'order_id' has to be a number")
+            statuses[change['order_id']] = change['status']
+
+        order_ids_by_status = defaultdict(list)
+        for order_id, status in statuses.items():
+            order_ids_by_status[status].append(order_id)
+        errors = {}
+        with transaction.atomic():
+            # all the orders are locked in the order of their ids first, so concurrent batches can't deadlock
+            list(Order.objects.select_for_update().filter(order_id__in=statuses).order_by('order_id')
+                 .values_list('order_id', flat=True))
+            # the stock returned by the rejections and renewals is available to the approvals of the same batch
+            for status in sorted(order_ids_by_status, key=lambda status: status == Order.Status.APPROVED):
+                errors.update(update_order_statuses(order_ids_by_status[status], status, request.user))
+        return JsonResponse({'updated': len(statuses) - len(errors),
+                             'errors': {order_id: str(error) for order_id, error in sorted(errors.items())}})
+
+
+class LinkedOrderBatchStatusApiView(ApiView):
+    """
+    Applies many Linked Order status changes in a single transaction, rolled back as a whole if any of the approvals
+    lacks stock. Expects {"changes": [{"order_number", "status", "comment"}, ...]}.
+    """
+
+    permission_required = 'website.change_linkedorder'
+
+    def post(self, request):
+        changes = self.get_json_body('changes')
+        updates = {}
+        for index, change in enumerate(changes):
+            if change.get('status') not in LinkedOrder.Status.values:
+                raise ApiError(f"Change {index}: unknown status '{change.get('status')}'")
+            if not isinstance(change.get('order_number'), int):
+                raise ApiError(f"Change {index}: 'order_number' has to be a number")
+            updates[change['order_number']] = (change['status'], str(change.get('comment', '')))
+
+        order_numbers = sorted(updates)
+        existing_order_numbers = set(LinkedOrder.objects.filter(order_number__in=order_numbers)
+                                     .values_list('order_number', flat=True))
+        if existing_order_numbers != set(order_numbers):
+            raise ApiError(f"There are no linked orders {sorted(set(order_numbers) - existing_order_numbers)}",
+                           status=404)
+        try:
+            with transaction.atomic():
+                for order_number in order_numbers:
+                    status, comment = updates[order_number]
+                    update_linked_order_status(LinkedOrder, order_number, status, comment, request.user)
+        except ValidationError as error:
+            raise ApiError(error.messages[0], status=409)
+        return JsonResponse({'updated': len(order_numbers)})
+
+
+class MetricsView(ApiView):
+    """
+    Staff only report of the request metrics of this process, as JSON or, with ?format=prometheus, in the Prometheus
+    text format for scraping with HTTP Basic credentials. A POST resets the collected metrics.
+    """
+
+    def has_permission(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        if request.GET.get('format') == 'prometheus':
+            return HttpResponse(metrics_registry.get_prometheus_text(), content_type='text/plain; version=0.0.4')
+        return JsonResponse(metrics_registry.get_report())
+
+    def post(self, request):
+        metrics_registry.reset()
+        return JsonResponse({'reset': True})
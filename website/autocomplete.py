@@ -0,0 +1,105 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.db.models.functions import Lower
+
+from .cache import get_model_versions, is_cache_process_local
+from .models import Item
+
+AUTOCOMPLETE_MAX_ITEMS = 200000
+
+# the longest time the index can lag behind the changes made by the other worker processes, in seconds
+AUTOCOMPLETE_MAX_AGE = 10
+
+AUTOCOMPLETE_RESULTS_LIMIT = 10
+
+
+class ItemPrefixIndex:
+    """
+    In-process index of the Item names, sorted case-insensitively, so that the Items starting with a prefix are found
+    with a binary search instead of a database query. The index is built lazily, dropped whenever an Item is saved or
+    deleted, and the quantities are adjusted in place by the stock movements. The changes made by the other worker
+    processes are followed through the shared version of the Items, the index is rebuilt once it changed, at most every
+    AUTOCOMPLETE_MAX_AGE seconds. Catalogues bigger than max_items are not kept in memory, the lookups then go to the
+    database.
+    """
+
+    def __init__(self, max_items=AUTOCOMPLETE_MAX_ITEMS):
+        self.max_items = max_items
+        self.lock = threading.Lock()
+        self.keys = None
+        self.entries = None
+        self.version = None
+        self.built_at = 0
+
+    def invalidate(self):
+        with self.lock:
+            self.keys = None
+            self.entries = None
+
+    def build(self):
+        items = Item.objects.values_list('item_id', 'item_name', 'unit_of_measurement', 'quantity')
+        items = list(items[:self.max_items + 1])
+        if len(items) > self.max_items:
+            return None, None
+        entries = {item_id: [item_name, unit, quantity] for item_id, item_name, unit, quantity in items}
+        keys = sorted((item_name.casefold(), item_id) for item_id, item_name, _, _ in items)
+        return keys, entries
+
+    def is_outdated(self, version):
+        # with a cache private to the process the versions of the other processes are unknown, the index just expires
+        is_changed = version != self.version or is_cache_process_local()
+        return is_changed and time.monotonic() - self.built_at >= AUTOCOMPLETE_MAX_AGE
+
+    def get_index(self):
+        version = get_model_versions([Item])[0]
+        with self.lock:
+            # the catalogue too big for the index is checked again only when it's dropped by a change of the Items
+            if self.keys is None or (self.entries is not None and self.is_outdated(version)):
+                self.keys, self.entries = self.build()
+                self.version, self.built_at = version, time.monotonic()
+                if self.keys is None:
+                    # the catalogue is too big, don't try to build the index on every keystroke
+                    self.keys, self.entries = [], None
+            return self.keys, self.entries
+
+    def adjust_quantity(self, item_id, difference):
+        entries = self.entries
+        if entries is not None and item_id in entries:
+            entries[item_id][2] += difference
+
+    def set_quantities(self, quantities):
+        entries = self.entries
+        if entries is None:
+            return
+        for item_id, quantity in quantities.items():
+            if item_id in entries:
+                entries[item_id][2] = quantity
+
+    def lookup(self, prefix, limit=AUTOCOMPLETE_RESULTS_LIMIT):
+        """Returns the Items whose name starts with the prefix, in alphabetical order."""
+
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        keys, entries = self.get_index()
+        if entries is None:
+            # ordered like the keys of the index, so the results don't depend on the size of the catalogue
+            items = Item.objects.filter(item_name__istartswith=prefix).order_by(Lower('item_name'), 'item_id')[:limit]
+            return [self.serialize(item.item_id, item.item_name, item.unit_of_measurement, item.quantity)
+                    for item in items]
+
+        results = []
+        for name, item_id in keys[bisect_left(keys, (prefix,)):]:
+            if not name.startswith(prefix) or len(results) == limit:
+                break
+            results.append(self.serialize(item_id, *entries[item_id]))
+        return results
+
+    @staticmethod
+    def serialize(item_id, item_name, unit, quantity):
+        return {'item_id': item_id, 'item_name': item_name, 'unit_of_measurement': unit, 'quantity': quantity}
+
+
+item_prefix_index = ItemPrefixIndex()
@@ -0,0 +1,144 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from .models import Item, Order, LinkedOrder
+from .pagination import CursorPaginator
+from .rollups import rebuild_rollups
+from .search import search_items
+from .synthetic import generate_users, generate_items, generate_orders, generate_linked_orders
+from .utils import get_filtered_obj
+from .views import ItemsView, OrderCreateView, OrderUpdateView, LinkedOrderUpdateView
+
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+BENCHMARK_EMPLOYEES = 20
+BENCHMARK_MIN_STOCK = 100
+
+
+def seed_catalogue(size, seed):
+    """
+    Fills the empty database with size Items, size Orders and about size Linked Order positions, generated from the
+    seed so every run measures the same data. Returns the benchmark user.
+    """
+
+    rng = random.Random(seed)
+    user = User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+    employee_ids = generate_users('Employee', BENCHMARK_EMPLOYEES, 'benchmark')
+    item_ids, item_prices = generate_items(rng, size)
+    generate_orders(rng, size, employee_ids, item_ids, item_prices)
+    generate_linked_orders(rng, size, item_ids, item_prices)
+    rebuild_rollups(Order)
+    rebuild_rollups(LinkedOrder)
+    return user
+
+
+def get_request(method, user, data=None):
+    request = getattr(RequestFactory(), method)('/', data or {})
+    request.user = user
+    request._messages = CookieStorage(request)
+    return request
+
+
+class BenchmarkCase:
+    """
+    A timed operation. The setup runs before every repetition, outside of the timing. The cases which write to the
+    database are rolled back after every repetition, so all of them run against the same data.
+    """
+
+    def __init__(self, name, run, setup=None, rollback=False):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.rollback = rollback
+
+    def run_once(self):
+        if self.setup:
+            self.setup()
+        with transaction.atomic():
+            start = time.perf_counter()
+            self.run()
+            elapsed = time.perf_counter() - start
+            if self.rollback:
+                transaction.set_rollback(True)
+        return elapsed
+
+    def measure(self, repeat):
+        self.run_once()  # warms up the caches of the database and the templates
+        with CaptureQueriesContext(connection) as queries:
+            self.run_once()
+        timings = sorted(self.run_once() * 1000 for _repetition in range(repeat))
+        return {
+            'case': self.name,
+            'queries': sum(not query['sql'].startswith(TRANSACTION_STATEMENTS) for query in queries),
+            'min_ms': round(timings[0], 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'max_ms': round(timings[-1], 3),
+        }
+
+
+def get_middle_cursor(ordering):
+    """Returns the cursor pointing to the middle of the Item list in the given ordering, to time a deep page."""
+
+    paginator = CursorPaginator(Item.objects.all(), 20, ordering)
+    middle_object = paginator.get_ordered_list(reverse=False)[Item.objects.count() // 2]
+    return paginator.get_cursor(middle_object, 'next')
+
+
+def get_benchmark_cases(user):
+    items_view = ItemsView.as_view()
+    order_create_view = OrderCreateView.as_view()
+    order_update_view = OrderUpdateView.as_view()
+    linked_order_update_view = LinkedOrderUpdateView.as_view()
+
+    # the orders are created and approved for the items with enough stock, so the cases time the successful paths
+    item_id = Item.objects.filter(quantity__gte=BENCHMARK_MIN_STOCK).order_by('item_id').values_list(
+        'item_id', flat=True).first()
+    new_order_id = Order.objects.filter(status=Order.Status.NEW, item_id__quantity__gte=BENCHMARK_MIN_STOCK).order_by(
+        'order_id').values_list('order_id', flat=True).first()
+    linked_order = LinkedOrder.objects.filter(position=1, status=LinkedOrder.Status.NEW).exclude(
+        order_number__in=LinkedOrder.objects.filter(item_id__quantity__lt=BENCHMARK_MIN_STOCK).values('order_number')
+    ).order_by('order_number').first()
+    new_order_data = {'item_id': item_id, 'unit_of_measurement': Item.ItemUnit.ITEM_UNIT_1, 'quantity': 1,
+                      'comment': 'benchmark'}
+
+    cases = []
+    for ordering in ['item_name', '-quantity', 'price_without_VAT']:
+        cursor = get_middle_cursor(ordering)
+        cases += [
+            BenchmarkCase(f'item_list_first_page[{ordering}]',
+                          lambda ordering=ordering: CursorPaginator(Item.objects.all(), 20, ordering).get_page(None)),
+            BenchmarkCase(f'item_list_middle_page[{ordering}]',
+                          lambda ordering=ordering, cursor=cursor: CursorPaginator(
+                              Item.objects.all(), 20, ordering).get_page(cursor)),
+        ]
+    cases += [
+        BenchmarkCase('items_view_uncached', lambda: items_view(get_request('get', user)),
+                      setup=cache.clear),
+        BenchmarkCase('items_view_cached', lambda: items_view(get_request('get', user))),
+        BenchmarkCase('filtered_items[price,quantity]', lambda: list(
+            get_filtered_obj(Item, {'price': ['10-50', '200-300'], 'quantity': ['5000-20000']})
+            .order_by('item_name')[:20])),
+        BenchmarkCase('filtered_orders_count[status,price]', lambda: get_filtered_obj(
+            Order, {'status': [Order.Status.NEW], 'price': ['0-100']}).count()),
+        BenchmarkCase('order_create', lambda: order_create_view(get_request('post', user, new_order_data),
+                                                                item_id=item_id), rollback=True),
+        BenchmarkCase('order_create_linked', lambda: order_create_view(get_request('post', user, {
+            **new_order_data, 'add_to_order': 'add', 'order': '', 'linked_order': linked_order.linked_order_id}),
+            item_id=item_id), rollback=True),
+        BenchmarkCase('order_approve', lambda: order_update_view(get_request('post', user, {
+            'status': Order.Status.APPROVED, 'order_id': new_order_id})), rollback=True),
+        BenchmarkCase('linked_order_approve', lambda: linked_order_update_view(get_request('post', user, {
+            'status': LinkedOrder.Status.APPROVED, 'comment': 'benchmark',
+            'order_number': linked_order.order_number})), rollback=True),
+    ]
+    for query in ['bolt', 'steel hinge', 'brass valve 12']:
+        cases.append(BenchmarkCase(f'search[{query}]', lambda query=query: list(search_items(query))))
+    return cases
@@ -0,0 +1,93 @@
+import hashlib
+import uuid
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def is_cache_process_local():
+    """The local memory cache is private to the process, the other worker processes don't see its version bumps."""
+
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def get_version_key(model):
+    return f'version:{model._meta.label_lower}'
+
+
+def get_model_versions(models):
+    """Returns the current version counters of the models, starting the missing ones."""
+
+    version_keys = [get_version_key(model) for model in models]
+    versions = cache.get_many(version_keys)
+    for version_key in version_keys:
+        if version_key not in versions:
+            # a fresh counter starts from a random version, so it can't repeat a version of an evicted counter
+            cache.add(version_key, uuid.uuid4().hex, timeout=None)
+            versions[version_key] = cache.get(version_key)
+    return [versions[version_key] for version_key in version_keys]
+
+
+def bump_model_version(model):
+    """
+    Makes all the cached pages which depend on the model stale. The counter is replaced with a new random version rather
+    than incremented, a single set is atomic on every backend, while the file and database backends increment with a
+    read and a write, so concurrent bumps could be lost.
+    """
+
+    cache.set(get_version_key(model), uuid.uuid4().hex, timeout=None)
+
+
+def invalidate_cached_pages(*models):
+    """Bumps the versions of the models once the current transaction is committed."""
+
+    for model in models:
+        transaction.on_commit(lambda model=model: bump_model_version(model))
+
+
+async def aget_model_versions(models):
+    """Async version of get_model_versions."""
+
+    version_keys = [get_version_key(model) for model in models]
+    versions = await cache.aget_many(version_keys)
+    for version_key in version_keys:
+        if version_key not in versions:
+            await cache.aadd(version_key, uuid.uuid4().hex, timeout=None)
+            versions[version_key] = await cache.aget(version_key)
+    return [versions[version_key] for version_key in version_keys]
+
+
+def make_page_cache_key(view_name, versions, parts):
+    key = ':'.join(str(part) for part in [view_name, *versions, *parts])
+    return f'page:{view_name}:{hashlib.md5(key.encode()).hexdigest()}'
+
+
+def get_page_cache_key(view_name, models, *parts):
+    """Returns the cache key of a page, which changes with the versions of the models the page depends on."""
+
+    return make_page_cache_key(view_name, get_model_versions(models), parts)
+
+
+async def aget_page_cache_key(view_name, models, *parts):
+    return make_page_cache_key(view_name, await aget_model_versions(models), parts)
+
+
+def get_cached_page(cache_key, get_page):
+    page_obj = cache.get(cache_key)
+    if page_obj is None:
+        page_obj = get_page()
+        cache.set(cache_key, page_obj, PAGE_CACHE_TIMEOUT)
+    return page_obj
+
+
+async def aget_cached_page(cache_key, aget_page):
+    """Async version of get_cached_page, aget_page is a coroutine function computing the page on a cache miss."""
+
+    page_obj = await cache.aget(cache_key)
+    if page_obj is None:
+        page_obj = await aget_page()
+        await cache.aset(cache_key, page_obj, PAGE_CACHE_TIMEOUT)
+    return page_obj
@@ -0,0 +1,63 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Item, Order, LinkedOrder
+from .utils import get_filtered_obj
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = {
+    Item: ['item_id', 'item_name', 'item_group', 'unit_of_measurement', 'quantity', 'price_without_VAT', 'status',
+           'storage_location', 'contact_person', 'reorder_threshold'],
+    Order: ['order_id', 'employee_name__username', 'item_id', 'item_id__item_name', 'unit_of_measurement', 'quantity',
+            'price_without_VAT', 'comment', 'status'],
+    LinkedOrder: ['linked_order_id', 'order_number', 'position', 'item_id', 'item_id__item_name',
+                  'unit_of_measurement', 'quantity', 'price_without_VAT', 'comment', 'status'],
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/jsonl',
+}
+
+
+class Echo:
+    """An object implementing just the write method of the file-like interface, used to stream the CSV rows."""
+
+    @staticmethod
+    def write(value):
+        return value
+
+
+def get_export_rows(model, filter_values):
+    """
+    Returns an iterator over the filtered rows of the model, fetched in chunks through a server-side cursor, so the
+    memory usage doesn't depend on the number of exported rows.
+    """
+
+    objects = get_filtered_obj(model, filter_values).order_by(model._meta.pk.name)
+    return objects.values_list(*EXPORT_FIELDS[model]).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_csv(model, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS[model])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(model, rows):
+    fields = EXPORT_FIELDS[model]
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def iter_export(model, filter_values, export_format):
+    """Yields the exported rows of the model encoded as lines of the given format."""
+
+    rows = get_export_rows(model, filter_values)
+    if export_format == 'jsonl':
+        return iter_jsonl(model, rows)
+    return iter_csv(model, rows)
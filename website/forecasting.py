@@ -0,0 +1,140 @@
+import math
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Item, Order, LinkedOrder, ReorderSuggestion
+
+HISTORY_WEEKS = 104
+FORECAST_METHODS = ['exponential', 'moving_average']
+SMOOTHING_ALPHA = 0.3
+MOVING_AVERAGE_WEEKS = 8
+LEAD_TIME_WEEKS = 2
+REVIEW_WEEKS = 1
+# the multiple of the demand deviation kept as the safety stock, 1.65 covers the demand of 95% of the weeks
+SAFETY_FACTOR = 1.65
+FORECAST_CHUNK_SIZE = 20000
+WEEK_SECONDS = 7 * 24 * 60 * 60
+SUGGESTION_BATCH_SIZE = 5000
+
+
+def get_history_start(history_weeks):
+    """Returns the Monday starting the history, which ends with the last complete week."""
+
+    today = timezone.localdate()
+    return today - timedelta(days=today.weekday(), weeks=history_weeks)
+
+
+def load_items():
+    """Returns the ids, sorted, and the available quantities of all the Items as arrays."""
+
+    items = np.fromiter(
+        Item.objects.order_by('item_id').values_list('item_id', 'quantity', 'reserved_quantity').iterator(
+            chunk_size=FORECAST_CHUNK_SIZE),
+        dtype=[('item_id', np.int64), ('quantity', np.int64), ('reserved_quantity', np.int64)])
+    return items['item_id'], items['quantity'] - items['reserved_quantity']
+
+
+def load_weekly_demand(item_ids, history_start, history_weeks):
+    """
+    Returns the quantities of the approved Orders and Linked Orders of the Items created in every week of the history,
+    as a matrix with a row per Item, in the order of the ids, and a column per week. The orders are only read, the
+    weeks and the sums are computed on the arrays, so no per-row date function runs in the database.
+    """
+
+    history_start = timezone.make_aware(datetime.combine(history_start, time()))
+    history_end = history_start + timedelta(weeks=history_weeks)
+    orders = []
+    for order_model in (Order, LinkedOrder):
+        rows = order_model.objects.filter(
+            status=order_model.Status.APPROVED, created_at__gte=history_start, created_at__lt=history_end
+        ).order_by().values_list('item_id', 'created_at', 'quantity').iterator(chunk_size=FORECAST_CHUNK_SIZE)
+        orders.append(np.fromiter(
+            ((item_id, created_at.timestamp(), quantity) for item_id, created_at, quantity in rows),
+            dtype=[('item_id', np.int64), ('created_at', np.float64), ('quantity', np.float64)]))
+    orders = np.concatenate(orders)
+
+    # the orders of the Items created after the Items were loaded are left out
+    rows = np.searchsorted(item_ids, orders['item_id'])
+    is_loaded = rows < len(item_ids)
+    is_loaded[is_loaded] = item_ids[rows[is_loaded]] == orders['item_id'][is_loaded]
+    # the weeks shifted by a daylight saving time change are kept within the history
+    weeks = np.clip((orders['created_at'][is_loaded] - history_start.timestamp()) // WEEK_SECONDS, 0,
+                    history_weeks - 1).astype(np.int64)
+    demand = np.bincount(rows[is_loaded] * history_weeks + weeks, weights=orders['quantity'][is_loaded],
+                         minlength=len(item_ids) * history_weeks)
+    return demand.reshape(len(item_ids), history_weeks)
+
+
+def forecast_moving_average(demand, window):
+    return demand[:, -window:].mean(axis=1)
+
+
+def forecast_exponential(demand, alpha):
+    """
+    Simple exponential smoothing of the weekly demand, started with the first week. The smoothed level of the last week
+    is a weighted sum of all the weeks, so the forecasts of all the Items are a single product of the matrix with the
+    weights.
+    """
+
+    weeks = demand.shape[1]
+    weights = alpha * (1 - alpha) ** np.arange(weeks - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (weeks - 1)
+    return demand @ weights
+
+
+def get_reorder_suggestions(demand, available_quantities, weekly_demand, lead_time_weeks, review_weeks,
+                            safety_factor):
+    """
+    Returns the demand deviation, the reorder points and the suggested quantities of all the Items. An Item is reordered
+    once its available quantity drops to the demand expected during the lead time plus the safety stock, and the
+    suggested quantity brings it up to the reorder point plus the demand of the review period.
+    """
+
+    demand_deviation = demand.std(axis=1)
+    reorder_points = np.ceil(weekly_demand * lead_time_weeks
+                             + safety_factor * demand_deviation * math.sqrt(lead_time_weeks)).astype(np.int64)
+    order_up_to = reorder_points + np.ceil(weekly_demand * review_weeks).astype(np.int64)
+    suggested_quantities = np.where(available_quantities <= reorder_points,
+                                    np.maximum(order_up_to - available_quantities, 0), 0)
+    return demand_deviation, reorder_points, suggested_quantities
+
+
+def save_reorder_suggestions(item_ids, weekly_demand, demand_deviation, reorder_points, suggested_quantities):
+    """Replaces the suggestions with the ones of the Items with any demand in the history. Returns their number."""
+
+    has_demand = (weekly_demand > 0) | (demand_deviation > 0)
+    columns = [column[has_demand].tolist()
+               for column in (item_ids, weekly_demand, demand_deviation, reorder_points, suggested_quantities)]
+    computed_at = timezone.now()
+    with transaction.atomic():
+        ReorderSuggestion.objects.all().delete()
+        ReorderSuggestion.objects.bulk_create(
+            (ReorderSuggestion(item_id_id=item_id, weekly_demand=demand, demand_deviation=deviation,
+                               reorder_point=reorder_point, suggested_quantity=suggested_quantity,
+                               computed_at=computed_at)
+             for item_id, demand, deviation, reorder_point, suggested_quantity in zip(*columns)),
+            batch_size=SUGGESTION_BATCH_SIZE)
+    return int(has_demand.sum())
+
+
+def forecast_demand(method='exponential', history_weeks=HISTORY_WEEKS, alpha=SMOOTHING_ALPHA,
+                    window=MOVING_AVERAGE_WEEKS, lead_time_weeks=LEAD_TIME_WEEKS, review_weeks=REVIEW_WEEKS,
+                    safety_factor=SAFETY_FACTOR):
+    """
+    Forecasts the weekly demand of all the Items from the approved orders of the last complete weeks and stores the
+    reorder suggestions. The history is loaded in a query per order model and all the Items are computed together on
+    arrays, without a loop over the Items. Returns the number of the stored suggestions.
+    """
+
+    item_ids, available_quantities = load_items()
+    demand = load_weekly_demand(item_ids, get_history_start(history_weeks), history_weeks)
+    if method == 'moving_average':
+        weekly_demand = forecast_moving_average(demand, window)
+    else:
+        weekly_demand = forecast_exponential(demand, alpha)
+    suggestions = get_reorder_suggestions(demand, available_quantities, weekly_demand, lead_time_weeks, review_weeks,
+                                          safety_factor)
+    return save_reorder_suggestions(item_ids, weekly_demand, *suggestions)
@@ -1,10 +1,16 @@
+import csv
+import io
+
 from django import forms
 from django.forms import ModelForm
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 
 from .models import Item, Order, LinkedOrder
 
+BULK_STATUS_LIMIT = 1000
+
 
 class NewUserForm(UserCreationForm):
     email = forms.EmailField(required=True)
@@ -21,7 +27,7 @@ class ItemForm(ModelForm):
     class Meta:
         model = Item
         fields = ('item_name', 'item_group', 'unit_of_measurement', 'quantity', 'price_without_VAT', 'status',
-                  'storage_location', 'contact_person', 'photo')
+                  'storage_location', 'contact_person', 'reorder_threshold', 'photo')
 
 
 class OrderStatusForm(ModelForm):
@@ -52,6 +58,35 @@ class LinkedOrderStatusForm(ModelForm):
         fields = ('status', 'comment')
 
 
+class BulkOrderStatusForm(forms.Form):
+    """Approves or rejects the Orders ticked on the Order list, or all the Orders matching the filter."""
+
+    status = forms.ChoiceField(label="", choices=[(Order.Status.APPROVED, "Approve"), (Order.Status.REJECTED, "Reject")])
+    all_filtered = forms.BooleanField(label="All the orders matching the filter", required=False)
+    # the last Order processed by the previous submit of all the filtered Orders, the next submit continues after it
+    after_order_id = forms.IntegerField(required=False, widget=forms.HiddenInput)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # the ticked ids are checked against the locked Orders, listing them all as choices would cost a query
+        try:
+            cleaned_data['order_ids'] = sorted({int(order_id) for order_id in self.data.getlist('order_ids')})
+        except ValueError:
+            raise ValidationError("Invalid order number")
+        if not cleaned_data['order_ids'] and not cleaned_data.get('all_filtered'):
+            raise ValidationError("Please select the orders")
+        if len(cleaned_data['order_ids']) > BULK_STATUS_LIMIT:
+            raise ValidationError(f"Please select at most {BULK_STATUS_LIMIT} orders at a time")
+        return cleaned_data
+
+
+class ReportForm(forms.Form):
+    date_from = forms.DateField(label="FROM", required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(label="TO", required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    grouping = forms.ChoiceField(label="GROUP BY", required=False,
+                                 choices=[('item_group', "Item group"), ('employee', "Employee"), ('day', "Day")])
+
+
 class SearchOrderForm(forms.Form):
     order_id = forms.IntegerField(label="", widget=forms.NumberInput(attrs={'placeholder': 'Search...'}))
 
@@ -84,3 +119,41 @@ class FilterItemForm(forms.Form):
     price_50_100 = forms.BooleanField(label="PRICE 50-100", required=False)
     price_100_9999999 = forms.BooleanField(label="PRICE >100", required=False)
 
+
+class ItemImportForm(forms.Form):
+    """Validates a single row of an Item import file. The fields left empty keep the values of an existing Item."""
+
+    item_name = forms.CharField(max_length=50)
+    item_group = forms.ChoiceField(choices=Item.ItemGroup.choices, required=False)
+    unit_of_measurement = forms.ChoiceField(choices=Item.ItemUnit.choices, required=False)
+    quantity = forms.IntegerField(min_value=0)
+    price_without_VAT = forms.DecimalField(max_digits=6, decimal_places=2, required=False)
+    status = forms.CharField(max_length=50, required=False)
+    storage_location = forms.CharField(max_length=50, required=False)
+    contact_person = forms.CharField(max_length=250, required=False)
+    reorder_threshold = forms.IntegerField(min_value=0, required=False)
+
+
+class ItemImportFileForm(forms.Form):
+    file = forms.FileField(label="CSV file")
+
+    def clean_file(self):
+        """
+        Reads the whole file once before the import, as the batches of the rows are committed one by one, a decoding or
+        CSV error in the middle of the file would leave the rows before it imported.
+        """
+
+        file = self.cleaned_data['file']
+        lines = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        try:
+            for _row in csv.reader(lines):
+                pass
+        except UnicodeDecodeError:
+            raise ValidationError("The file has to be encoded in UTF-8")
+        except csv.Error as error:
+            raise ValidationError(f"The file is not a valid CSV file: {error}")
+        finally:
+            # the wrapper would close the uploaded file with it
+            lines.detach()
+        file.seek(0)
+        return file
@@ -0,0 +1,143 @@
+import csv
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .alerts import check_stock_levels
+from .autocomplete import item_prefix_index
+from .cache import invalidate_cached_pages
+from .forms import ItemImportForm
+from .models import Item, Order, LinkedOrder, StockMovement
+from .rollups import add_to_rollups, remove_from_rollups
+
+IMPORT_BATCH_SIZE = 1000
+
+DESCRIPTIVE_FIELDS = ['item_group', 'unit_of_measurement', 'price_without_VAT', 'status', 'storage_location',
+                      'contact_person', 'reorder_threshold']
+
+NEW_ITEM_REQUIRED_FIELDS = ['item_group', 'unit_of_measurement', 'price_without_VAT', 'status']
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row_number, errors):
+        self.errors.append((row_number, errors))
+
+
+def clean_row(row):
+    """
+    Validates a row with the fields of the ItemImportForm. The fields are shared by all rows instead of building a form
+    for every row, as copying the fields costs more than validating them.
+    """
+
+    cleaned_data, errors = {}, {}
+    for name, form_field in ItemImportForm.base_fields.items():
+        try:
+            cleaned_data[name] = form_field.clean(row.get(name) or '')
+        except ValidationError as error:
+            # a field failing several validators raises an error without a code of its own, listing the failures
+            errors[name] = [{'message': message, 'code': field_error.code or ''}
+                            for field_error in error.error_list for message in field_error]
+    return cleaned_data, errors
+
+
+def import_batch(rows, result):
+    """
+    Validates a batch of rows and upserts them by the Item name. The rows of the same Item are merged and their
+    quantities summed up. The new Items are inserted first, skipping the ones created concurrently, then all the Items
+    of the batch are locked and read, so their new quantities are computed from the current ones and written with a
+    single INSERT ... ON CONFLICT DO UPDATE. Invalid rows are reported and skipped.
+    """
+
+    increments = defaultdict(int)
+    provided_fields = defaultdict(dict)
+    row_numbers = {}
+    for row_number, row in rows:
+        cleaned_data, errors = clean_row(row)
+        if errors:
+            result.add_error(row_number, errors)
+            continue
+        item_name = cleaned_data['item_name']
+        increments[item_name] += cleaned_data['quantity']
+        provided_fields[item_name].update(
+            {name: cleaned_data[name] for name in DESCRIPTIVE_FIELDS if cleaned_data[name] not in ('', None)})
+        row_numbers.setdefault(item_name, row_number)
+
+    with transaction.atomic():
+        existing_names = set(Item.objects.filter(item_name__in=increments.keys()).values_list('item_name', flat=True))
+        new_items = []
+        for item_name, fields in list(provided_fields.items()):
+            if item_name in existing_names:
+                continue
+            missing_fields = [name for name in NEW_ITEM_REQUIRED_FIELDS if name not in fields]
+            if missing_fields:
+                errors = {name: [{'message': "Required for a new item.", 'code': 'required'}]
+                          for name in missing_fields}
+                result.add_error(row_numbers[item_name], errors)
+                del provided_fields[item_name]
+                continue
+            new_items.append(Item(item_name=item_name, quantity=0, **fields))
+        # the quantities are only added once the rows are locked, so an Item created by a concurrent import is
+        # replenished rather than overwritten
+        Item.objects.bulk_create(new_items, ignore_conflicts=True)
+
+        items = {item_object.item_name: item_object for item_object in Item.objects.select_for_update().filter(
+            item_name__in=provided_fields.keys()).only('item_id', 'item_name', 'quantity', *DESCRIPTIVE_FIELDS)
+            .order_by('item_id')}
+        # the Items inserted by this batch get their first stock as the opening balance, the ones created concurrently
+        # already have their movements
+        new_item_ids = {items[item_object.item_name].item_id for item_object in new_items}
+        if new_item_ids:
+            new_item_ids -= set(StockMovement.objects.filter(item_id__in=new_item_ids)
+                                .values_list('item_id', flat=True).distinct())
+
+        upserted_items = []
+        for item_name, item_object in items.items():
+            values = {name: getattr(item_object, name) for name in DESCRIPTIVE_FIELDS}
+            values.update(provided_fields[item_name])
+            upserted_items.append(Item(item_name=item_name, quantity=item_object.quantity + increments[item_name],
+                                       **values))
+
+        # the orders of the Items moved to another group are moved to the rollups of the new group
+        regrouped_items = [items[item_object.item_name] for item_object in upserted_items
+                           if items[item_object.item_name].item_group != item_object.item_group]
+        for order_model in (Order, LinkedOrder):
+            remove_from_rollups(order_model.objects.filter(item_id__in=regrouped_items))
+
+        Item.objects.bulk_create(upserted_items, update_conflicts=True, unique_fields=['item_name'],
+                                 update_fields=['quantity', *DESCRIPTIVE_FIELDS])
+
+        for order_model in (Order, LinkedOrder):
+            add_to_rollups(order_model.objects.filter(item_id__in=regrouped_items))
+
+        StockMovement.objects.bulk_create(
+            StockMovement(item_id_id=item_object.item_id, quantity=increments[item_name],
+                          kind=StockMovement.Kind.OPENING_BALANCE if item_object.item_id in new_item_ids
+                          else StockMovement.Kind.REPLENISHMENT)
+            for item_name, item_object in items.items() if increments[item_name])
+        # the quantities and the reorder thresholds of all the rows may have changed
+        check_stock_levels([item_object.item_id for item_object in items.values()])
+
+        transaction.on_commit(item_prefix_index.invalidate)
+        invalidate_cached_pages(Item)
+
+    result.created += len(new_item_ids)
+    result.updated += len(upserted_items) - len(new_item_ids)
+
+
+def import_items(lines, batch_size=IMPORT_BATCH_SIZE):
+    """Imports the Items from the lines of a CSV file with a header of the Item field names, batch by batch."""
+
+    result = ImportResult()
+    # the row numbers include the header, so they match the spreadsheet rows
+    rows = enumerate(csv.DictReader(lines), start=2)
+    while batch := list(islice(rows, batch_size)):
+        import_batch(batch, result)
+    return result
@@ -0,0 +1,93 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from website.benchmark import seed_catalogue, get_benchmark_cases
+
+BENCHMARK_SIZES = [10000, 100000, 1000000]
+
+
+class Command(BaseCommand):
+    help = ("Times the hot paths of the warehouse on synthetic catalogues of several sizes and writes the results as "
+            "JSON. Every size is seeded into a fresh test database of the configured engine, the data is never "
+            "written to the real one.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=BENCHMARK_SIZES,
+                            help="Numbers of Items, Orders and Linked Order positions to seed.")
+        parser.add_argument('--repeat', type=int, default=10, help="Timed repetitions of every case.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--case', action='append', dest='cases',
+                            help="Run only the cases whose name starts with the given prefix, may be repeated.")
+        parser.add_argument('--output', help="Write the JSON results to the file instead of the standard output.")
+        parser.add_argument('--compare', help="JSON results of an earlier run to print the relative changes against.")
+
+    @staticmethod
+    def get_commit():
+        try:
+            return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  cwd=settings.BASE_DIR, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def run_size(self, size, options):
+        old_database_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            start = time.perf_counter()
+            user = seed_catalogue(size, options['seed'])
+            self.stderr.write(f"Seeded {size} rows in {time.perf_counter() - start:.1f} s")
+
+            results = []
+            for case in get_benchmark_cases(user):
+                if options['cases'] and not case.name.startswith(tuple(options['cases'])):
+                    continue
+                result = {'size': size, **case.measure(options['repeat'])}
+                self.stderr.write(f"{size:>8} {case.name:<40} {result['median_ms']:>10.3f} ms "
+                                  f"{result['queries']:>4} queries")
+                results.append(result)
+            return results
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+    def print_comparison(self, results, baseline_file):
+        with open(baseline_file) as baseline:
+            baseline_results = {(result['size'], result['case']): result
+                                for result in json.load(baseline)['results']}
+        for result in results:
+            baseline_result = baseline_results.get((result['size'], result['case']))
+            if baseline_result:
+                change = (result['median_ms'] / baseline_result['median_ms'] - 1) * 100
+                self.stderr.write(f"{result['size']:>8} {result['case']:<40} {baseline_result['median_ms']:>10.3f} "
+                                  f"-> {result['median_ms']:>10.3f} ms ({change:+.1f}%)")
+
+    def handle(self, *args, **options):
+        results = []
+        for size in options['sizes']:
+            results += self.run_size(size, options)
+
+        report = json.dumps({
+            'meta': {
+                'commit': self.get_commit(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+        if options['compare']:
+            self.print_comparison(results, options['compare'])
@@ -0,0 +1,20 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from website.api import create_api_token
+
+
+class Command(BaseCommand):
+    help = ("Creates an API token of the user, e.g. for a scanner or the ERP sync, and prints its key. The key is only "
+            "shown once, the token is revoked by deleting it in the admin.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--name', required=True, help="Name of the client using the token.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"There is no user {options['username']}")
+        self.stdout.write(create_api_token(user, options['name']))
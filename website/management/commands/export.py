@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from django.http import QueryDict
+
+from website.exports import EXPORT_FORMATS, iter_export
+from website.models import Item, Order, LinkedOrder
+from website.utils import get_filter_values
+
+EXPORTED_MODELS = {
+    'items': Item,
+    'orders': Order,
+    'linked_orders': LinkedOrder,
+}
+
+
+class Command(BaseCommand):
+    help = "Streams Items, Orders or Linked Orders to a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=EXPORTED_MODELS)
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--filter', default='',
+                            help="Filter query string, as used by the filter views, e.g. 'price=0-10&status=new'.")
+        parser.add_argument('--output', help="File to write to, the standard output by default.")
+
+    def handle(self, *args, **options):
+        model = EXPORTED_MODELS[options['model']]
+        filter_values = get_filter_values(model, QueryDict(options['filter']))
+        lines = iter_export(model, filter_values, options['format'])
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
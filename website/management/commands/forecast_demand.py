@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from website.forecasting import (FORECAST_METHODS, HISTORY_WEEKS, SMOOTHING_ALPHA, MOVING_AVERAGE_WEEKS,
+                                 LEAD_TIME_WEEKS, REVIEW_WEEKS, SAFETY_FACTOR, forecast_demand)
+
+
+class Command(BaseCommand):
+    help = ("Forecasts the weekly demand of all the Items from the approved Orders and Linked Orders and replaces the "
+            "reorder suggestions shown to the coordinators. Meant to be run periodically, e.g. weekly from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--method', choices=FORECAST_METHODS, default=FORECAST_METHODS[0])
+        parser.add_argument('--history-weeks', type=int, default=HISTORY_WEEKS,
+                            help="Number of the last complete weeks the forecast is based on.")
+        parser.add_argument('--alpha', type=float, default=SMOOTHING_ALPHA,
+                            help="Weight of the latest week in the exponential smoothing, between 0 and 1.")
+        parser.add_argument('--window', type=int, default=MOVING_AVERAGE_WEEKS,
+                            help="Number of the weeks averaged by the moving average.")
+        parser.add_argument('--lead-time-weeks', type=int, default=LEAD_TIME_WEEKS,
+                            help="Number of weeks an order of the Items takes to arrive.")
+        parser.add_argument('--review-weeks', type=int, default=REVIEW_WEEKS,
+                            help="Number of weeks the suggested quantities should last beyond the lead time.")
+        parser.add_argument('--safety-factor', type=float, default=SAFETY_FACTOR,
+                            help="Multiple of the demand deviation kept as the safety stock.")
+
+    def handle(self, *args, **options):
+        if not 0 < options['alpha'] <= 1:
+            raise CommandError("--alpha has to be between 0 and 1")
+        if min(options['history_weeks'], options['window'], options['lead_time_weeks']) < 1:
+            raise CommandError("--history-weeks, --window and --lead-time-weeks have to be positive")
+        if options['window'] > options['history_weeks']:
+            raise CommandError("--window can't be longer than --history-weeks")
+
+        start = time.perf_counter()
+        suggestion_count = forecast_demand(
+            options['method'], options['history_weeks'], options['alpha'], options['window'],
+            options['lead_time_weeks'], options['review_weeks'], options['safety_factor'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"Stored {suggestion_count} reorder suggestions in {elapsed:.1f} s")
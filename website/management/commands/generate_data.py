@@ -0,0 +1,60 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from website.cache import invalidate_cached_pages
+from website.autocomplete import item_prefix_index
+from website.models import Item, Order, LinkedOrder
+from website.rollups import rebuild_rollups
+from website.synthetic import (GENERATOR_BATCH_SIZE, HISTORY_DAYS, generate_users, generate_items, generate_orders,
+                               generate_linked_orders)
+
+
+class Command(BaseCommand):
+    help = ("Generates synthetic employees, coordinators, items, orders and linked orders for load and scale testing. "
+            "The same seed on the same database always generates the same rows.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=50)
+        parser.add_argument('--coordinators', type=int, default=5)
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--linked-orders', type=int, default=50000, help="Number of Linked Order positions.")
+        parser.add_argument('--password', default='warehouse', help="Password of all the generated users.")
+        parser.add_argument('--history-days', type=int, default=HISTORY_DAYS,
+                            help="Number of days before today the orders are created at.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=GENERATOR_BATCH_SIZE)
+
+    def timed(self, description, count, generate):
+        start = time.perf_counter()
+        result = generate()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"Generated {count} {description} in {elapsed:.1f} s ({count / elapsed:.0f} rows/s)")
+        return result
+
+    def handle(self, *args, **options):
+        if (options['orders'] or options['linked_orders']) and not options['items']:
+            raise CommandError("The orders need --items to be generated")
+        if options['orders'] and not options['employees']:
+            raise CommandError("The orders need --employees to be generated")
+
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        employee_ids = self.timed('employees', options['employees'], lambda: generate_users(
+            'Employee', options['employees'], options['password'], batch_size))
+        self.timed('coordinators', options['coordinators'], lambda: generate_users(
+            'Coordinator', options['coordinators'], options['password'], batch_size))
+        item_ids, item_prices = self.timed('items', options['items'], lambda: generate_items(
+            rng, options['items'], batch_size))
+        self.timed('orders', options['orders'], lambda: generate_orders(
+            rng, options['orders'], employee_ids, item_ids, item_prices, batch_size, options['history_days']))
+        self.timed('linked order positions', options['linked_orders'], lambda: generate_linked_orders(
+            rng, options['linked_orders'], item_ids, item_prices, batch_size, options['history_days']))
+
+        # the rows were created in bulk, without the signals refreshing the caches and the rollups
+        rebuild_rollups(Order)
+        rebuild_rollups(LinkedOrder)
+        item_prefix_index.invalidate()
+        invalidate_cached_pages(Item, Order, LinkedOrder)
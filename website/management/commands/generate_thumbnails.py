@@ -0,0 +1,41 @@
+import os
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from website.cache import invalidate_cached_pages
+from website.models import Item
+from website.thumbnails import get_thumbnail_executor, needs_thumbnails, render_thumbnails, save_thumbnails
+
+
+class Command(BaseCommand):
+    help = ("Renders the missing thumbnails of the Item photos in parallel worker processes, e.g. of the photos uploaded "
+            "before the thumbnails were introduced or after a change of the thumbnail sizes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes.")
+        parser.add_argument('--all', action='store_true',
+                            help="Render the thumbnails of all the photos, the already saved files are reused.")
+
+    def handle(self, *args, **options):
+        items = Item.objects.exclude(photo='').only('item_id', 'photo', 'photo_thumbnails').order_by('item_id')
+        photos = [(item.item_id, item.photo.name) for item in items.iterator()
+                  if options['all'] or needs_thumbnails(item)]
+        if not photos:
+            self.stdout.write("All the photos have their thumbnails")
+            return
+
+        saved = failed = 0
+        with get_thumbnail_executor(options['workers']) as executor:
+            futures = {executor.submit(render_thumbnails, photo_name): (item_id, photo_name)
+                       for item_id, photo_name in photos}
+            for future in as_completed(futures):
+                item_id, photo_name = futures[future]
+                try:
+                    saved += save_thumbnails(item_id, future.result())
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f"Item {item_id}: the photo {photo_name} was not resized: {error}")
+
+        invalidate_cached_pages(Item)
+        self.stdout.write(f"Rendered the thumbnails of {saved} photos, {failed} failed")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from website.imports import IMPORT_BATCH_SIZE, import_items
+
+
+class Command(BaseCommand):
+    help = "Creates or replenishes Items from a CSV file with a header of the Item field names."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        with open(options['path'], newline='') as lines:
+            result = import_items(lines, options['batch_size'])
+
+        for row_number, errors in result.errors:
+            self.stderr.write(f"Row {row_number}: {errors}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result.created} and updated {result.updated} items, {len(result.errors)} rows rejected."))
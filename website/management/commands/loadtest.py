@@ -0,0 +1,59 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ("Sends concurrent requests to the pages of a running server and reports the throughput and the latency, "
+            "to compare the WSGI and ASGI deployments.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help="e.g. http://localhost:8000 for WSGI, http://localhost:8001 for ASGI")
+        parser.add_argument('paths', nargs='*', default=['/items/', '/orders/', '/linked_orders/'])
+        parser.add_argument('--requests', type=int, default=500, help="Number of requests sent to each path.")
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+
+    @staticmethod
+    def login(base_url, username, password):
+        session = requests.Session()
+        login_url = urljoin(base_url, '/login/')
+        session.get(login_url)
+        response = session.post(login_url, data={
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': session.cookies.get('csrftoken'),
+        }, headers={'Referer': login_url}, allow_redirects=False)
+        if 'sessionid' not in session.cookies:
+            raise CommandError(f"Logging in failed with status {response.status_code}")
+        return session.cookies
+
+    @staticmethod
+    def timed_get(url, cookies):
+        start = time.perf_counter()
+        response = requests.get(url, cookies=cookies, allow_redirects=False)
+        return time.perf_counter() - start, response.status_code
+
+    def run_path(self, url, cookies, options):
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            start = time.perf_counter()
+            results = list(executor.map(lambda _request: self.timed_get(url, cookies), range(options['requests'])))
+            elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency * 1000 for latency, status in results)
+        errors = sum(status != 200 for latency, status in results)
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"{url}: {len(results) / elapsed:.1f} req/s, latency p50 {percentiles[49]:.1f} ms, "
+            f"p95 {percentiles[94]:.1f} ms, p99 {percentiles[98]:.1f} ms, max {latencies[-1]:.1f} ms, "
+            f"errors {errors}")
+
+    def handle(self, *args, **options):
+        cookies = self.login(options['base_url'], options['username'], options['password'])
+        for path in options['paths']:
+            self.run_path(urljoin(options['base_url'], path), cookies, options)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from website.models import Order, LinkedOrder
+from website.rollups import ROLLUP_MODELS, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = ("Recomputes the reporting rollups from the whole history of the Orders and Linked Orders, e.g. after the "
+            "orders were changed directly in the database.")
+
+    def handle(self, *args, **options):
+        for order_model in (Order, LinkedOrder):
+            rollup_count = rebuild_rollups(order_model)
+            self.stdout.write(f"Rebuilt {rollup_count} {ROLLUP_MODELS[order_model]._meta.verbose_name_plural}")
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from website.cache import invalidate_cached_pages
+from website.models import Item, StockMovement
+
+RECONCILE_CHUNK_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = "Recomputes the Item quantities from the stock ledger in chunks and reports the drifted ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=RECONCILE_CHUNK_SIZE)
+        parser.add_argument('--fix', action='store_true',
+                            help="Set the drifted quantities to the balance of the ledger.")
+
+    def reconcile_chunk(self, items, fix):
+        first_item_id, last_item_id = items[0][0], items[-1][0]
+        balances = dict(StockMovement.objects.filter(item_id__gte=first_item_id, item_id__lte=last_item_id)
+                        .values('item_id').annotate(balance=Sum('quantity')).values_list('item_id', 'balance'))
+        drifted_items = []
+        for item_id, quantity in items:
+            balance = balances.get(item_id, 0)
+            if balance != quantity:
+                drifted_items.append(Item(item_id=item_id, quantity=balance))
+                self.stdout.write(f"Item {item_id}: quantity {quantity}, ledger balance {balance}")
+        if fix and drifted_items:
+            Item.objects.bulk_update(drifted_items, ['quantity'])
+            invalidate_cached_pages(Item)
+        return len(drifted_items)
+
+    def handle(self, *args, **options):
+        drift_count = 0
+        last_item_id = 0
+        while True:
+            with transaction.atomic():
+                # the chunk is locked, so no movement can be applied between reading the balances and fixing them
+                items = list(Item.objects.select_for_update().filter(item_id__gt=last_item_id).order_by('item_id')
+                             .values_list('item_id', 'quantity')[:options['chunk_size']])
+                if not items:
+                    break
+                drift_count += self.reconcile_chunk(items, options['fix'])
+            last_item_id = items[-1][0]
+
+        action = "fixed" if options['fix'] else "found"
+        self.stdout.write(self.style.SUCCESS(f"Reconciliation finished, {action} {drift_count} drifted items."))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from website.models import Order, LinkedOrder, StockReservation
+from website.stock import release_reservations
+
+RELEASE_CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ("Releases the expired stock reservations, and the ones left behind by deleted or already processed orders, "
+            "in chunks.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=RELEASE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        stale_reservations = StockReservation.objects.filter(
+            Q(expires_at__lt=timezone.now())
+            | Q(order_id__isnull=True, linked_order_id__isnull=True)
+            | Q(order_id__status__in=[Order.Status.APPROVED, Order.Status.REJECTED])
+            | Q(linked_order_id__status__in=[LinkedOrder.Status.APPROVED, LinkedOrder.Status.REJECTED]))
+
+        released_count = 0
+        last_reservation_id = 0
+        while True:
+            with transaction.atomic():
+                reservation_ids = list(stale_reservations.filter(reservation_id__gt=last_reservation_id)
+                                       .order_by('reservation_id')
+                                       .values_list('reservation_id', flat=True)[:options['chunk_size']])
+                if not reservation_ids:
+                    break
+                released_count += release_reservations(
+                    StockReservation.objects.filter(reservation_id__in=reservation_ids))
+            last_reservation_id = reservation_ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Released {released_count} stock reservations."))
@@ -0,0 +1,206 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+def get_geometric_bounds(start, stop, factor):
+    bounds = []
+    bound = start
+    while bound < stop:
+        bounds.append(bound)
+        bound *= factor
+    return bounds + [stop]
+
+
+# the upper bounds of the histogram buckets, geometric so the relative error of the percentiles is the same everywhere
+LATENCY_BOUNDS = get_geometric_bounds(0.0005, 60.0, 1.25)
+QUERY_COUNT_BOUNDS = [0, 1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 25, 30, 40, 50, 75, 100, 150, 200, 300, 500, 1000, 10000]
+
+
+class Histogram:
+    """
+    Counts the observed values in buckets with fixed upper bounds, so the memory used doesn't grow with the number of
+    observations. The percentiles are interpolated inside the bucket they fall into.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.bucket_counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.bucket_counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, percent):
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index else 0
+                upper = self.bounds[index] if index < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+    def summary(self, scale=1):
+        return {
+            'mean': self.sum / self.count * scale if self.count else None,
+            **{f'p{percent}': (self.percentile(percent) or 0) * scale for percent in (50, 95, 99)},
+        }
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BOUNDS)
+        self.query_count = Histogram(QUERY_COUNT_BOUNDS)
+        self.query_time = Histogram(LATENCY_BOUNDS)
+
+
+class MetricsRegistry:
+    """Keeps the metrics of the requests per URL name, of the current process only."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view_name, latency, query_count, query_time):
+        with self.lock:
+            view_metrics = self.views.get(view_name)
+            if view_metrics is None:
+                view_metrics = self.views[view_name] = ViewMetrics()
+            view_metrics.latency.observe(latency)
+            view_metrics.query_count.observe(query_count)
+            view_metrics.query_time.observe(query_time)
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+    def get_report(self):
+        """Returns the summary of every view, the views which took the most time in total first."""
+
+        with self.lock:
+            views = sorted(self.views.items(), key=lambda view: view[1].latency.sum, reverse=True)
+            return {view_name: {
+                'requests': view_metrics.latency.count,
+                'latency_ms': view_metrics.latency.summary(scale=1000),
+                'queries': view_metrics.query_count.summary(),
+                'sql_time_ms': view_metrics.query_time.summary(scale=1000),
+            } for view_name, view_metrics in views}
+
+    def get_prometheus_text(self):
+        """Returns the histograms in the Prometheus text exposition format."""
+
+        metrics = [
+            ('warehouse_request_duration_seconds', "Request latency per URL name.", 'latency'),
+            ('warehouse_request_sql_queries', "SQL queries per request per URL name.", 'query_count'),
+            ('warehouse_request_sql_duration_seconds', "SQL time per request per URL name.", 'query_time'),
+        ]
+        lines = []
+        with self.lock:
+            for metric_name, description, attribute in metrics:
+                lines.append(f'# HELP {metric_name} {description}')
+                lines.append(f'# TYPE {metric_name} histogram')
+                for view_name, view_metrics in sorted(self.views.items()):
+                    histogram = getattr(view_metrics, attribute)
+                    label = view_name.replace('\\', '\\\\').replace('"', '\\"')
+                    cumulative_count = 0
+                    for bound, bucket_count in zip(histogram.bounds, histogram.bucket_counts):
+                        cumulative_count += bucket_count
+                        lines.append(f'{metric_name}_bucket{{view="{label}",le="{bound:g}"}} {cumulative_count}')
+                    lines.append(f'{metric_name}_bucket{{view="{label}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{metric_name}_sum{{view="{label}"}} {histogram.sum:g}')
+                    lines.append(f'{metric_name}_count{{view="{label}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics_registry = MetricsRegistry()
+
+
+class QueryRecorder:
+    """Counts the queries of a request and the time spent running them."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0
+
+
+# the recorder of the current request, a context variable is also visible in the threads running the ORM calls of the
+# async views, which use their own database connections
+current_query_recorder = ContextVar('current_query_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding the query to the recorder of the current request, if there is one."""
+
+    query_recorder = current_query_recorder.get()
+    if query_recorder is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        query_recorder.time += time.perf_counter() - start
+        query_recorder.count += 1
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Adds the execute wrapper to every new database connection, called by the connection_created signal."""
+
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def get_view_name(request):
+    resolver_match = getattr(request, 'resolver_match', None)
+    return resolver_match.view_name if resolver_match else '<unresolved>'
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, the number of SQL queries and the SQL time of every request under the URL name of its view.
+    Only a few counters are updated per request and query, so it is meant to be left on in production.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        query_recorder = QueryRecorder()
+        recorder_token = current_query_recorder.set(query_recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_recorder.reset(recorder_token)
+        metrics_registry.record(get_view_name(request), time.perf_counter() - start, query_recorder.count,
+                                query_recorder.time)
+        return response
+
+    async def __acall__(self, request):
+        query_recorder = QueryRecorder()
+        recorder_token = current_query_recorder.set(query_recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_recorder.reset(recorder_token)
+        metrics_registry.record(get_view_name(request), time.perf_counter() - start, query_recorder.count,
+                                query_recorder.time)
+        return response
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.3 on 2026-10-18 02:36
+
+from django.core.management.color import no_style
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_linked_order_numbers(apps, schema_editor):
+    LinkedOrder = apps.get_model('website', 'LinkedOrder')
+    LinkedOrderNumber = apps.get_model('website', 'LinkedOrderNumber')
+
+    last_positions = LinkedOrder.objects.values('order_number').annotate(last_position=Max('position'))
+    LinkedOrderNumber.objects.bulk_create(
+        LinkedOrderNumber(order_number=row['order_number'], last_position=row['last_position'])
+        for row in last_positions.order_by('order_number')
+    )
+
+    # the order numbers were inserted explicitly, the sequence has to continue after the highest one
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [LinkedOrderNumber]):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0005_alter_order_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkedOrderNumber',
+            fields=[
+                ('order_number', models.BigAutoField(primary_key=True, serialize=False)),
+                ('last_position', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Linked Order Numbers',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='order',
+            options={'ordering': ['item_id']},
+        ),
+        migrations.RunPython(backfill_linked_order_numbers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.3 on 2026-10-18 02:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def renumber_duplicate_positions(apps, schema_editor):
+    LinkedOrder = apps.get_model('website', 'LinkedOrder')
+    LinkedOrderNumber = apps.get_model('website', 'LinkedOrderNumber')
+
+    duplicated_order_numbers = (LinkedOrder.objects.values('order_number', 'position')
+                                .annotate(count=Count('linked_order_id')).filter(count__gt=1)
+                                .values_list('order_number', flat=True).distinct())
+    for order_number in duplicated_order_numbers:
+        positions = list(LinkedOrder.objects.filter(order_number=order_number).order_by('position', 'linked_order_id'))
+        for position, linked_order in enumerate(positions, start=1):
+            linked_order.position = position
+        LinkedOrder.objects.bulk_update(positions, ['position'])
+        LinkedOrderNumber.objects.filter(order_number=order_number).update(last_position=len(positions))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0006_linkedordernumber'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['price_without_VAT'], name='item_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['quantity'], name='item_quantity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='linkedorder',
+            index=models.Index(fields=['status', 'order_number'], name='linkedorder_status_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'item_id'], name='order_status_item_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['price_without_VAT'], name='order_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['quantity'], name='order_quantity_idx'),
+        ),
+        migrations.RunPython(renumber_duplicate_positions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='linkedorder',
+            constraint=models.UniqueConstraint(fields=('order_number', 'position'), name='unique_linked_order_position'),
+        ),
+    ]
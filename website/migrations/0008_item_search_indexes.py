@@ -0,0 +1,38 @@
+# Generated by Django 5.0.3 on 2026-10-18 03:05
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+SEARCH_INDEXES = {
+    'item_name_trgm_idx': 'item_name',
+    'item_storage_location_trgm_idx': 'storage_location',
+    'item_contact_person_trgm_idx': 'contact_person',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    # the trigram indexes only exist on PostgreSQL, other databases use the substring search fallback
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, column in SEARCH_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "website_item" USING gin ("{column}" gin_trgm_ops)')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0007_order_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
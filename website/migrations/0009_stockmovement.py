@@ -0,0 +1,47 @@
+# Generated by Django 5.0.3 on 2026-10-18 02:50
+
+from itertools import islice
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    Item = apps.get_model('website', 'Item')
+    StockMovement = apps.get_model('website', 'StockMovement')
+
+    balances = Item.objects.exclude(quantity=0).values_list('item_id', 'quantity').iterator(chunk_size=2000)
+    movements = (StockMovement(item_id_id=item_id, quantity=quantity, kind='opn') for item_id, quantity in balances)
+    while batch := list(islice(movements, 2000)):
+        StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0008_item_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('movement_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('quantity', models.IntegerField()),
+                ('kind', models.CharField(choices=[('opn', 'Opening balance'), ('apr', 'Order approval'), ('rev', 'Approval reversal'), ('rep', 'Replenishment'), ('cor', 'Correction')], max_length=3)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employee_name', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('item_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='website.item')),
+                ('linked_order_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='website.linkedorder')),
+                ('order_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='website.order')),
+            ],
+            options={
+                'verbose_name_plural': 'Stock Movements',
+                'ordering': ['movement_id'],
+                'indexes': [models.Index(fields=['item_id', 'movement_id'], name='stockmovement_item_idx'), models.Index(fields=['created_at'], name='stockmovement_created_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
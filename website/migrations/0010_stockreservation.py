@@ -0,0 +1,67 @@
+# Generated by Django 5.0.3 on 2026-10-18 02:52
+
+from collections import defaultdict
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def reserve_new_orders(apps, schema_editor):
+    Item = apps.get_model('website', 'Item')
+    Order = apps.get_model('website', 'Order')
+    LinkedOrder = apps.get_model('website', 'LinkedOrder')
+    StockReservation = apps.get_model('website', 'StockReservation')
+
+    expires_at = timezone.now() + timedelta(days=7)
+    reservations = [
+        StockReservation(item_id_id=item_id, quantity=quantity, order_id_id=order_id, expires_at=expires_at)
+        for order_id, item_id, quantity in Order.objects.filter(status='new').values_list(
+            'order_id', 'item_id', 'quantity')
+    ]
+    reservations += [
+        StockReservation(item_id_id=item_id, quantity=quantity, linked_order_id_id=linked_order_id,
+                         expires_at=expires_at)
+        for linked_order_id, item_id, quantity in LinkedOrder.objects.filter(status='new').values_list(
+            'linked_order_id', 'item_id', 'quantity')
+    ]
+    StockReservation.objects.bulk_create(reservations, batch_size=2000)
+
+    reserved_quantities = defaultdict(int)
+    for reservation in reservations:
+        reserved_quantities[reservation.item_id_id] += reservation.quantity
+    Item.objects.bulk_update(
+        [Item(item_id=item_id, reserved_quantity=quantity) for item_id, quantity in reserved_quantities.items()],
+        ['reserved_quantity'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0009_stockmovement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='reserved_quantity',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('reservation_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('quantity', models.IntegerField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('item_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='website.item')),
+                ('linked_order_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='website.linkedorder')),
+                ('order_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='website.order')),
+            ],
+            options={
+                'verbose_name_plural': 'Stock Reservations',
+                'ordering': ['reservation_id'],
+            },
+        ),
+        migrations.RunPython(reserve_new_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0010_stockreservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='photo_thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.0.3 on 2026-10-18 03:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def build_rollups(apps, schema_editor):
+    # the existing orders have no creation time, they are all counted on the day of the migration
+    for order_model_name, rollup_model_name, key_fields in [
+        ('Order', 'OrderRollup', ['item_group', 'employee_name_id', 'status']),
+        ('LinkedOrder', 'LinkedOrderRollup', ['item_group', 'status']),
+    ]:
+        order_model = apps.get_model('website', order_model_name)
+        rollup_model = apps.get_model('website', rollup_model_name)
+        key_expressions = {'item_group': F('item_id__item_group'), 'employee_name_id': F('employee_name'),
+                           'status': F('status')}
+        rows = order_model.objects.order_by().values(
+            key_day=TruncDate('created_at'), **{f'key_{field}': key_expressions[field] for field in key_fields}).annotate(
+            order_count=Count('pk'), total_quantity=Sum('quantity'), total_price=Sum('price_without_VAT'))
+        rollup_model.objects.bulk_create(
+            [rollup_model(day=row['key_day'], **{field: row[f'key_{field}'] for field in key_fields},
+                          order_count=row['order_count'],
+                          quantity=row['total_quantity'], price_without_VAT=row['total_price']) for row in rows],
+            batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0011_item_photo_thumbnails'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkedOrderRollup',
+            fields=[
+                ('rollup_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('item_group', models.CharField(choices=[('G-1', 'Item group 1'), ('G-2', 'Item group 2')], max_length=3)),
+                ('status', models.CharField(choices=[('new', 'New'), ('apr', 'Approved'), ('rej', 'Rejected')], max_length=3)),
+                ('order_count', models.IntegerField(default=0)),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('price_without_VAT', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name_plural': 'Linked Order Rollups',
+                'ordering': ['day'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderRollup',
+            fields=[
+                ('rollup_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('item_group', models.CharField(choices=[('G-1', 'Item group 1'), ('G-2', 'Item group 2')], max_length=3)),
+                ('status', models.CharField(choices=[('new', 'New'), ('apr', 'Approved'), ('rej', 'Rejected')], max_length=3)),
+                ('order_count', models.IntegerField(default=0)),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('price_without_VAT', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name_plural': 'Order Rollups',
+                'ordering': ['day'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='linkedorder',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name='linkedorderrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'item_group', 'status'), name='unique_linked_order_rollup_key'),
+        ),
+        migrations.AddField(
+            model_name='orderrollup',
+            name='employee_name',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='orderrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'item_group', 'employee_name', 'status'), name='unique_order_rollup_key'),
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
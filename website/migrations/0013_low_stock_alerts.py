@@ -0,0 +1,31 @@
+# Generated by Django 5.0.3 on 2026-10-18 03:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0012_order_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='reorder_threshold',
+            field=models.IntegerField(default=0, help_text='The coordinators are notified when the quantity drops to this level, 0 turns the alerts off.'),
+        ),
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('alert_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('item_id', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='website.item')),
+            ],
+            options={
+                'verbose_name_plural': 'Low Stock Alerts',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.3 on 2026-10-18 03:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0013_low_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('suggestion_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('weekly_demand', models.FloatField()),
+                ('demand_deviation', models.FloatField()),
+                ('reorder_point', models.IntegerField()),
+                ('suggested_quantity', models.IntegerField(db_index=True)),
+                ('computed_at', models.DateTimeField()),
+                ('item_id', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='website.item')),
+            ],
+            options={
+                'verbose_name_plural': 'Reorder Suggestions',
+                'ordering': ['-suggested_quantity'],
+            },
+        ),
+    ]
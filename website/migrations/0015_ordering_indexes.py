@@ -0,0 +1,132 @@
+# Generated by Django 5.0.3 on 2026-10-18 04:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0014_reorder_suggestions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_quantity_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_status_item_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_quantity_idx',
+        ),
+        migrations.AlterField(
+            model_name='lowstockalert',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='employee_name',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='item_id',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='website.item'),
+        ),
+        migrations.AlterField(
+            model_name='reordersuggestion',
+            name='suggested_quantity',
+            field=models.IntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['item_group', 'item_id'], name='item_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['unit_of_measurement', 'item_id'], name='item_unit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['quantity', 'item_id'], name='item_quantity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['price_without_VAT', 'item_id'], name='item_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['status', 'item_id'], name='item_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['storage_location', 'item_id'], name='item_storage_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['contact_person', 'item_id'], name='item_contact_person_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['photo', 'item_id'], name='item_photo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='linkedorder',
+            index=models.Index(fields=['order_number', 'linked_order_id'], name='linkedorder_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lowstockalert',
+            index=models.Index(fields=['created_at', 'alert_id'], name='lowstockalert_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'item_id', 'order_id'], name='order_status_item_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['employee_name', 'order_id'], name='order_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['item_id', 'order_id'], name='order_item_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['unit_of_measurement', 'order_id'], name='order_unit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['quantity', 'order_id'], name='order_quantity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['price_without_VAT', 'order_id'], name='order_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['comment', 'order_id'], name='order_comment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'order_id'], name='order_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reordersuggestion',
+            index=models.Index(fields=['suggested_quantity', 'suggestion_id'], name='reordersuggestion_quantity_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.3 on 2026-10-18 04:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0015_ordering_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_group_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_unit_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_storage_location_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_contact_person_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_photo_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_employee_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_unit_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_comment_idx',
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='employee_name',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
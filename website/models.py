@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import User
 
@@ -17,19 +18,42 @@ class Item(models.Model):
     item_group = models.CharField(max_length=3, choices=ItemGroup)
     unit_of_measurement = models.CharField(max_length=3, choices=ItemUnit)
     quantity = models.IntegerField(default=1)
+    reserved_quantity = models.IntegerField(default=0, editable=False)
+    reorder_threshold = models.IntegerField(default=0, help_text="The coordinators are notified when the quantity "
+                                                                  "drops to this level, 0 turns the alerts off.")
     price_without_VAT = models.DecimalField(max_digits=6, decimal_places=2)
     status = models.CharField(max_length=50)
     storage_location = models.CharField(max_length=50, blank=True)
     contact_person = models.TextField(max_length=250, blank=True)
     photo = models.ImageField(upload_to='uploads/', blank=True)
+    photo_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
+
+    # the fields the lists can be ordered by, each with an index matching the cursor pagination. Every index slows down
+    # the stock changes, so only the columns worth ordering a long list by get one.
+    ordering_fields = ['item_id', 'item_name', 'quantity', 'price_without_VAT', 'status']
 
     class Meta:
         verbose_name_plural = 'Items'
         ordering = ['item_id']
+        indexes = [
+            models.Index(fields=['quantity', 'item_id'], name='item_quantity_idx'),
+            models.Index(fields=['price_without_VAT', 'item_id'], name='item_price_idx'),
+            models.Index(fields=['status', 'item_id'], name='item_status_idx'),
+        ]
 
     def __str__(self):
         return self.item_name
 
+    @property
+    def available_quantity(self):
+        return self.quantity - self.reserved_quantity
+
+    @property
+    def thumbnail(self):
+        """The file names of the small thumbnail variants of the photo, if they are already rendered."""
+
+        return self.photo_thumbnails.get('small')
+
 
 class Order(models.Model):
 
@@ -40,20 +64,45 @@ class Order(models.Model):
 
     order_id = models.BigAutoField(primary_key=True)
     employee_name = models.ForeignKey(User, on_delete=models.CASCADE)
-    item_id = models.ForeignKey(Item, on_delete=models.CASCADE)
+    # the Item is indexed together with the primary key, for the ordering
+    item_id = models.ForeignKey(Item, on_delete=models.CASCADE, db_index=False)
     unit_of_measurement = models.CharField(max_length=3, choices=Item.ItemUnit)
     quantity = models.IntegerField(default=1)
     price_without_VAT = models.DecimalField(max_digits=6, decimal_places=2)
     comment = models.TextField(max_length=250, blank=True)
     status = models.CharField(max_length=3, choices=Status, default=Status.NEW)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    # the fields the lists can be ordered by, each with an index matching the cursor pagination
+    ordering_fields = ['order_id', 'item_id', 'quantity', 'price_without_VAT', 'status']
 
     class Meta:
         ordering = ['item_id']
+        indexes = [
+            models.Index(fields=['status', 'item_id', 'order_id'], name='order_status_item_idx'),
+            models.Index(fields=['item_id', 'order_id'], name='order_item_idx'),
+            models.Index(fields=['quantity', 'order_id'], name='order_quantity_idx'),
+            models.Index(fields=['price_without_VAT', 'order_id'], name='order_price_idx'),
+            models.Index(fields=['status', 'order_id'], name='order_status_idx'),
+        ]
 
     def __str__(self):
         return f"Item: {self.item_id} in quantity: {self.quantity}. Status: {self.status}"
 
 
+class LinkedOrderNumber(models.Model):
+    """Allocates Linked Order numbers and keeps the counter of the positions already assigned to each of them."""
+
+    order_number = models.BigAutoField(primary_key=True)
+    last_position = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Linked Order Numbers"
+
+    def __str__(self):
+        return f"Order number: {self.order_number} Positions: {self.last_position}"
+
+
 class LinkedOrder(models.Model):
 
     class Status(models.TextChoices):
@@ -70,10 +119,193 @@ class LinkedOrder(models.Model):
     price_without_VAT = models.DecimalField(max_digits=6, decimal_places=2)
     comment = models.TextField(max_length=250, blank=True)
     status = models.CharField(max_length=3, choices=Status, default=Status.NEW)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    # the fields the lists can be ordered by, each with an index matching the cursor pagination
+    ordering_fields = ['linked_order_id', 'order_number']
 
     class Meta:
         verbose_name_plural = "Linked Orders"
         ordering = ['order_number']
+        constraints = [
+            models.UniqueConstraint(fields=['order_number', 'position'], name='unique_linked_order_position'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'order_number'], name='linkedorder_status_number_idx'),
+            models.Index(fields=['order_number', 'linked_order_id'], name='linkedorder_number_idx'),
+        ]
 
     def __str__(self):
         return f"Order number: {self.order_number} Item: {self.item_id}"
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of the changes of the Item quantities. The Item quantity is the running balance of the movements,
+    updated together with every movement.
+    """
+
+    class Kind(models.TextChoices):
+        OPENING_BALANCE = 'opn', _("Opening balance")
+        APPROVAL = 'apr', _("Order approval")
+        REVERSAL = 'rev', _("Approval reversal")
+        REPLENISHMENT = 'rep', _("Replenishment")
+        CORRECTION = 'cor', _("Correction")
+
+    movement_id = models.BigAutoField(primary_key=True)
+    item_id = models.ForeignKey(Item, on_delete=models.CASCADE)
+    quantity = models.IntegerField()
+    kind = models.CharField(max_length=3, choices=Kind)
+    order_id = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True)
+    linked_order_id = models.ForeignKey(LinkedOrder, on_delete=models.SET_NULL, null=True, blank=True)
+    employee_name = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Stock Movements"
+        ordering = ['movement_id']
+        indexes = [
+            models.Index(fields=['item_id', 'movement_id'], name='stockmovement_item_idx'),
+            models.Index(fields=['created_at'], name='stockmovement_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Item: {self.item_id} quantity: {self.quantity:+d}. Kind: {self.kind}"
+
+
+class StockReservation(models.Model):
+    """
+    Quantity of an Item held for a new Order or Linked Order until it is approved, rejected or the reservation expires.
+    The sum of the reservations of an Item is kept in its reserved_quantity.
+    """
+
+    reservation_id = models.BigAutoField(primary_key=True)
+    item_id = models.ForeignKey(Item, on_delete=models.CASCADE)
+    quantity = models.IntegerField()
+    order_id = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True)
+    linked_order_id = models.ForeignKey(LinkedOrder, on_delete=models.SET_NULL, null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name_plural = "Stock Reservations"
+        ordering = ['reservation_id']
+
+    def __str__(self):
+        return f"Item: {self.item_id} in quantity: {self.quantity}. Expires at: {self.expires_at}"
+
+
+class LowStockAlert(models.Model):
+    """
+    Item whose quantity dropped to its reorder threshold. The alert exists for as long as the Item stays low on stock,
+    so the coordinators are notified once per drop.
+    """
+
+    alert_id = models.BigAutoField(primary_key=True)
+    item_id = models.OneToOneField(Item, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Low Stock Alerts"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'alert_id'], name='lowstockalert_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Item: {self.item_id} low on stock since: {self.created_at}"
+
+
+class ReorderSuggestion(models.Model):
+    """
+    Forecast of the weekly demand of an Item, computed from the approved orders, with the stock level at which it
+    should be reordered and the quantity to order. The suggestions are replaced by every run of the forecast.
+    """
+
+    suggestion_id = models.BigAutoField(primary_key=True)
+    item_id = models.OneToOneField(Item, on_delete=models.CASCADE)
+    weekly_demand = models.FloatField()
+    demand_deviation = models.FloatField()
+    reorder_point = models.IntegerField()
+    suggested_quantity = models.IntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Reorder Suggestions"
+        ordering = ['-suggested_quantity']
+        indexes = [
+            models.Index(fields=['suggested_quantity', 'suggestion_id'], name='reordersuggestion_quantity_idx'),
+        ]
+
+    def __str__(self):
+        return f"Item: {self.item_id} reorder point: {self.reorder_point} suggested quantity: {self.suggested_quantity}"
+
+
+class ApiToken(models.Model):
+    """
+    Key of an API client, e.g. a scanner or the ERP sync, authenticating it as the user. Only the SHA-256 hash of the
+    key is stored: the keys are random, so unlike the passwords they don't need a slow hash, and checking them costs a
+    single indexed query.
+    """
+
+    token_id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    name = models.CharField(max_length=50)
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "API Token"
+        verbose_name_plural = "API Tokens"
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.name} User: {self.user}"
+
+
+class Rollup(models.Model):
+    """
+    Number, quantity and value of the orders created on a day, per item group and current status. The rollups are
+    updated together with every change of the orders, so the reports read a row per key instead of the order history.
+    """
+
+    rollup_id = models.BigAutoField(primary_key=True)
+    day = models.DateField()
+    item_group = models.CharField(max_length=3, choices=Item.ItemGroup)
+    status = models.CharField(max_length=3, choices=Order.Status)
+    order_count = models.IntegerField(default=0)
+    quantity = models.BigIntegerField(default=0)
+    price_without_VAT = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+        ordering = ['day']
+
+
+class OrderRollup(Rollup):
+    employee_name = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    # the fields identifying a rollup row, in the order of the keys of the rollup changes
+    key_fields = ['day', 'item_group', 'employee_name_id', 'status']
+
+    class Meta(Rollup.Meta):
+        verbose_name_plural = "Order Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'item_group', 'employee_name', 'status'],
+                                    name='unique_order_rollup_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.item_group} Employee: {self.employee_name_id} Status: {self.status}"
+
+
+class LinkedOrderRollup(Rollup):
+    key_fields = ['day', 'item_group', 'status']
+
+    class Meta(Rollup.Meta):
+        verbose_name_plural = "Linked Order Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'item_group', 'status'], name='unique_linked_order_rollup_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.item_group} Status: {self.status}"
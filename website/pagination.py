@@ -0,0 +1,122 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class CursorPage(Sequence):
+    """A page of objects returned by the CursorPaginator, with the cursors pointing to the neighbouring pages."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    """
+    Paginates a queryset by the value of the ordering field and the primary key of the last shown object, instead of
+    an OFFSET. Every page costs a single range scan of the (field, primary key) index no matter how deep it is, and the
+    total count of the objects is only computed when requested. The unique fields are paginated by their value alone.
+    """
+
+    def __init__(self, object_list, per_page, ordering, with_count=False):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.with_count = with_count
+        self.descending = ordering.startswith('-')
+        self.field = object_list.model._meta.get_field(ordering.lstrip('-'))
+        self.pk_field = object_list.model._meta.pk
+        self.is_unique = self.field.unique
+
+    @staticmethod
+    def encode_cursor(value, pk, direction):
+        cursor = json.dumps([value, pk, direction]).encode()
+        return base64.urlsafe_b64encode(cursor).decode()
+
+    def decode_cursor(self, cursor):
+        """Returns the position of the cursor, converted to the types of the fields, or None if it isn't valid."""
+
+        try:
+            value, pk, direction = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            value, pk = self.field.to_python(value), self.pk_field.to_python(pk)
+        except (binascii.Error, UnicodeError, TypeError, ValueError, ValidationError):
+            return None
+        if value is None or pk is None or direction not in ('next', 'previous'):
+            return None
+        return value, pk, direction
+
+    def get_cursor(self, obj, direction):
+        return self.encode_cursor(self.field.value_to_string(obj), self.pk_field.value_to_string(obj), direction)
+
+    def get_ordered_list(self, reverse):
+        fields = [self.field.attname] if self.is_unique else [self.field.attname, self.pk_field.attname]
+        if self.descending != reverse:
+            return self.object_list.order_by(*(f'-{field_name}' for field_name in fields))
+        return self.object_list.order_by(*fields)
+
+    def get_page_query(self, cursor):
+        """Returns the position the cursor points to, the direction and the queryset of the page objects."""
+
+        position = self.decode_cursor(cursor) if cursor else None
+        value, pk, direction = position or (None, None, 'next')
+        backwards = direction == 'previous'
+        object_list = self.get_ordered_list(reverse=backwards)
+
+        if position:
+            lookup = 'lt' if self.descending != backwards else 'gt'
+            field_name, pk_name = self.field.attname, self.pk_field.attname
+            if self.is_unique:
+                object_list = object_list.filter(**{f'{field_name}__{lookup}': value})
+            else:
+                # the bound on the field alone is the index range, the OR only filters the rows of the equal values
+                object_list = object_list.filter(
+                    Q(**{f'{field_name}__{lookup}e': value}),
+                    Q(**{f'{field_name}__{lookup}': value}) | Q(**{f'{pk_name}__{lookup}': pk}))
+        return position, backwards, object_list[:self.per_page + 1]
+
+    def make_page(self, objects, position, backwards, count):
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if backwards:
+            objects.reverse()
+
+        next_cursor = previous_cursor = None
+        if objects:
+            if has_more or backwards:
+                next_cursor = self.get_cursor(objects[-1], 'next')
+            if (has_more and backwards) or (position and not backwards):
+                previous_cursor = self.get_cursor(objects[0], 'previous')
+        return CursorPage(objects, next_cursor, previous_cursor, count)
+
+    def get_page(self, cursor):
+        """Returns the page following (or preceding) the object the cursor points to, or the first page."""
+
+        position, backwards, object_list = self.get_page_query(cursor)
+        objects = list(object_list)
+        count = self.object_list.count() if self.with_count else None
+        return self.make_page(objects, position, backwards, count)
+
+    async def aget_page(self, cursor):
+        """Async version of get_page, which fetches the page through the async ORM API."""
+
+        position, backwards, object_list = self.get_page_query(cursor)
+        objects = [obj async for obj in object_list]
+        count = await self.object_list.acount() if self.with_count else None
+        return self.make_page(objects, position, backwards, count)
@@ -0,0 +1,180 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, LinkedOrder, OrderRollup, LinkedOrderRollup
+
+ROLLUP_MODELS = {
+    Order: OrderRollup,
+    LinkedOrder: LinkedOrderRollup,
+}
+
+# the expressions computing every rollup key field from the orders
+ROLLUP_KEY_EXPRESSIONS = {
+    'day': TruncDate('created_at'),
+    'item_group': F('item_id__item_group'),
+    'employee_name_id': F('employee_name'),
+    'status': F('status'),
+}
+
+ROLLUP_VALUE_FIELDS = ['order_count', 'quantity', 'price_without_VAT']
+
+# the order fields the rollup key fields and the summed up values are computed from
+ROLLUP_SOURCE_FIELDS = {
+    'day': 'created_at',
+    'item_group': 'item_id',
+    'employee_name_id': 'employee_name',
+    'status': 'status',
+}
+ROLLUP_SOURCE_VALUE_FIELDS = ['quantity', 'price_without_VAT']
+
+# the rollup field behind every grouping of the reports
+REPORT_GROUPINGS = {
+    'item_group': 'item_group',
+    'employee': 'employee_name__username',
+    'day': 'day',
+}
+
+
+def get_rollup_totals(orders):
+    """
+    Returns the number, quantity and value of the orders per rollup key, with their current status. A single GROUP BY
+    query, whatever the number of the orders.
+    """
+
+    rollup_model = ROLLUP_MODELS[orders.model]
+    key_expressions = {f'key_{field}': ROLLUP_KEY_EXPRESSIONS[field] for field in rollup_model.key_fields}
+    rows = orders.order_by().values(**key_expressions).annotate(
+        total_count=Count('pk'), total_quantity=Sum('quantity'), total_price=Sum('price_without_VAT'))
+    return {tuple(row[key] for key in key_expressions): (row['total_count'], row['total_quantity'], row['total_price'])
+            for row in rows}
+
+
+def get_new_order_totals(order_objects):
+    """Returns the totals of the just created orders per rollup key, computed from the objects without a query."""
+
+    key_values = {
+        'day': lambda order_object: timezone.localdate(order_object.created_at),
+        'item_group': lambda order_object: order_object.item_id.item_group,
+        'employee_name_id': lambda order_object: order_object.employee_name_id,
+        'status': lambda order_object: order_object.status,
+    }
+    totals = {}
+    for order_object in order_objects:
+        key = tuple(key_values[field](order_object) for field in ROLLUP_MODELS[type(order_object)].key_fields)
+        count, quantity, price = totals.get(key, (0, 0, 0))
+        totals[key] = (count + 1, quantity + order_object.quantity, price + order_object.price_without_VAT)
+    return totals
+
+
+def apply_rollup_changes(rollup_model, changes):
+    """
+    Adds the changes of the number, quantity and value to the rollup rows of their keys. The missing rows are created
+    first, then every row gets its change as an increment in its own UPDATE, without reading it, in a consistent order
+    of the keys. A rollup row is shared by all the orders of its key, so the callers apply the changes as late in their
+    transaction as they can, to hold its lock for the shortest time.
+    """
+
+    changes = {key: values for key, values in changes.items() if any(values)}
+    if not changes:
+        return
+
+    key_fields = rollup_model.key_fields
+    with transaction.atomic(savepoint=False):
+        rollup_model.objects.bulk_create([rollup_model(**dict(zip(key_fields, key))) for key in changes],
+                                         ignore_conflicts=True)
+        for key, (count, quantity, price) in sorted(changes.items()):
+            rollup_model.objects.filter(**dict(zip(key_fields, key))).update(
+                order_count=F('order_count') + count, quantity=F('quantity') + quantity,
+                price_without_VAT=F('price_without_VAT') + price)
+
+
+def add_new_orders_to_rollups(order_objects):
+    """Adds the just created Orders or Linked Orders, all of the same model, to the rollups."""
+
+    if order_objects:
+        apply_rollup_changes(ROLLUP_MODELS[type(order_objects[0])], get_new_order_totals(order_objects))
+
+
+def add_to_rollups(orders, sign=1):
+    """Adds the orders of the queryset to the rollups, or removes them with the sign -1."""
+
+    changes = {key: tuple(sign * value for value in totals) for key, totals in get_rollup_totals(orders).items()}
+    apply_rollup_changes(ROLLUP_MODELS[orders.model], changes)
+
+
+def remove_from_rollups(orders):
+    add_to_rollups(orders, sign=-1)
+
+
+def is_changed_in_rollups(order_object, update_fields=None):
+    """
+    Returns whether the saved order differs from its stored row in any of the fields its rollups are computed from, so
+    the saves changing only e.g. the comment don't move the order out of its rollups and back. Costs a query, unless
+    the update_fields of the save leave all these fields out.
+    """
+
+    order_model = type(order_object)
+    field_names = [ROLLUP_SOURCE_FIELDS[field] for field in ROLLUP_MODELS[order_model].key_fields]
+    field_names += ROLLUP_SOURCE_VALUE_FIELDS
+    # only the loaded fields are saved, the deferred ones keep their stored values
+    field_names = set(field_names) - order_object.get_deferred_fields()
+    if update_fields is not None:
+        field_names &= set(update_fields)
+    if not field_names:
+        return False
+    attnames = [order_model._meta.get_field(field_name).attname for field_name in field_names]
+    return not order_model.objects.filter(
+        pk=order_object.pk, **{attname: getattr(order_object, attname) for attname in attnames}).exists()
+
+
+def get_status_rollup_changes(orders, status):
+    """
+    Returns the rollup changes moving the orders of the queryset from the rollups of their current status to the
+    rollups of the new status. Has to be run in a transaction, with the orders locked, before their status is updated.
+    """
+
+    status_index = ROLLUP_MODELS[orders.model].key_fields.index('status')
+    changes = defaultdict(lambda: (0, 0, 0))
+    for key, totals in get_rollup_totals(orders.exclude(status=status)).items():
+        new_key = key[:status_index] + (status,) + key[status_index + 1:]
+        changes[key] = tuple(change - value for change, value in zip(changes[key], totals))
+        changes[new_key] = tuple(change + value for change, value in zip(changes[new_key], totals))
+    return dict(changes)
+
+
+def rebuild_rollups(order_model):
+    """Replaces the rollups of the model with the totals of all its orders. Returns the number of rollup rows."""
+
+    rollup_model = ROLLUP_MODELS[order_model]
+    with transaction.atomic():
+        rollup_model.objects.all().delete()
+        rollups = rollup_model.objects.bulk_create(
+            rollup_model(**dict(zip(rollup_model.key_fields, key)), order_count=count, quantity=quantity,
+                         price_without_VAT=price)
+            for key, (count, quantity, price) in get_rollup_totals(order_model.objects.all()).items())
+    return len(rollups)
+
+
+def get_report(rollup_model, date_from, date_to, grouping):
+    """
+    Returns the orders created between the dates, inclusive, per the grouping and in total, with the counts per status
+    and the approved quantity and value. Reads only the rollups, so the cost depends on the period and not on the size
+    of the order history.
+    """
+
+    totals = {
+        'total_count': Sum('order_count'),
+        **{f'{status.value}_count': Sum('order_count', filter=Q(status=status)) for status in Order.Status},
+        'approved_quantity': Sum('quantity', filter=Q(status=Order.Status.APPROVED)),
+        'approved_price': Sum('price_without_VAT', filter=Q(status=Order.Status.APPROVED)),
+    }
+    rollups = rollup_model.objects.filter(day__range=(date_from, date_to))
+    group_field = REPORT_GROUPINGS[grouping]
+    rows = rollups.values(group=F(group_field)).annotate(**totals).order_by('group')
+    return list(rows), rollups.aggregate(**totals)
@@ -0,0 +1,56 @@
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Item
+
+SEARCH_FIELDS = ['item_name', 'storage_location', 'contact_person']
+
+SEARCH_RESULTS_LIMIT = 20
+
+
+def get_trigram_search_results(query):
+    """
+    Returns the Items whose searched fields contain a word similar to the query, ranked by the best word similarity
+    with a bonus for names starting with the query. The similarity operator is backed by the trigram GIN indexes, and
+    it matches prefixes as well, as a prefix only misses the last trigram of the word.
+    """
+
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    matches = Q()
+    for field in SEARCH_FIELDS:
+        matches |= Q(**{f'{field}__trigram_word_similar': query})
+    similarity = Greatest(*(TrigramWordSimilarity(query, field) for field in SEARCH_FIELDS))
+    prefix_bonus = Case(When(item_name__istartswith=query, then=Value(1.0)), default=Value(0.0),
+                        output_field=FloatField())
+    return Item.objects.filter(matches).annotate(rank=similarity + prefix_bonus).order_by('-rank', 'item_name')
+
+
+def get_substring_search_results(query):
+    """Returns the Items whose searched fields contain the query, ranked by where the query was found."""
+
+    matches = Q()
+    for field in SEARCH_FIELDS:
+        matches |= Q(**{f'{field}__icontains': query})
+    rank = Case(
+        When(item_name__iexact=query, then=Value(4.0)),
+        When(item_name__istartswith=query, then=Value(3.0)),
+        When(item_name__icontains=query, then=Value(2.0)),
+        default=Value(1.0),
+        output_field=FloatField())
+    return Item.objects.filter(matches).annotate(rank=rank).order_by('-rank', 'item_name')
+
+
+def search_items(query, limit=SEARCH_RESULTS_LIMIT):
+    """
+    Returns the best matching Items for the query. On PostgreSQL the search is fuzzy and uses the trigram indexes,
+    other databases fall back to a case-insensitive substring search.
+    """
+
+    query = query.strip()
+    if not query:
+        return Item.objects.none()
+    if connection.vendor == 'postgresql':
+        return get_trigram_search_results(query)[:limit]
+    return get_substring_search_results(query)[:limit]
@@ -0,0 +1,108 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .alerts import check_stock_levels
+from .autocomplete import item_prefix_index
+from .cache import invalidate_cached_pages
+from .metrics import install_query_recorder
+from .models import Item, Order, LinkedOrder, StockMovement
+from .rollups import add_new_orders_to_rollups, add_to_rollups, is_changed_in_rollups, remove_from_rollups
+from .thumbnails import thumbnail_pipeline, needs_thumbnails
+
+
+@receiver([post_save, post_delete], sender=Item)
+def invalidate_item_prefix_index(sender, **kwargs):
+    transaction.on_commit(item_prefix_index.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Item)
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=LinkedOrder)
+def invalidate_model_cached_pages(sender, **kwargs):
+    invalidate_cached_pages(sender)
+
+
+@receiver(post_save, sender=Item)
+def record_opening_balance(sender, instance, created, raw=False, **kwargs):
+    # the Items created in bulk by the import record their movements themselves
+    if created and not raw and instance.quantity:
+        StockMovement.objects.create(item_id=instance, quantity=instance.quantity,
+                                     kind=StockMovement.Kind.OPENING_BALANCE)
+
+
+@receiver(post_save, sender=Item)
+def schedule_photo_thumbnails(sender, instance, raw=False, **kwargs):
+    # the photo is resized by the worker processes once it is committed, the old thumbnails stay until then
+    if not raw and needs_thumbnails(instance):
+        item_id, photo_name = instance.item_id, instance.photo.name
+        transaction.on_commit(lambda: thumbnail_pipeline.schedule(item_id, photo_name))
+    elif not raw and not instance.photo and instance.photo_thumbnails:
+        Item.objects.filter(pk=instance.pk).update(photo_thumbnails={})
+
+
+@receiver(post_save, sender=Item)
+def check_saved_item_stock_level(sender, instance, raw=False, **kwargs):
+    # the quantity or the reorder threshold of the Item may have been edited directly
+    if not raw:
+        check_stock_levels([instance.item_id])
+
+
+# the changes of the order status made with UPDATE queries move the orders between the rollups themselves, the receivers
+# keep the rollups up to date with the orders created, edited and deleted one by one
+@receiver(pre_save, sender=Order)
+@receiver(pre_save, sender=LinkedOrder)
+def remove_saved_order_from_rollups(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._rollup_changed = not raw and not instance._state.adding and is_changed_in_rollups(instance,
+                                                                                                 update_fields)
+    if instance._rollup_changed:
+        remove_from_rollups(sender.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=LinkedOrder)
+def add_saved_order_to_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        add_new_orders_to_rollups([instance])
+    elif getattr(instance, '_rollup_changed', False):
+        add_to_rollups(sender.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_delete, sender=Order)
+@receiver(pre_delete, sender=LinkedOrder)
+def remove_deleted_order_from_rollups(sender, instance, origin=None, **kwargs):
+    # the orders deleted with their Item are removed from the rollups at once, the rollups of a deleted employee are
+    # deleted with the employee
+    if isinstance(origin, (Item, User)) or getattr(origin, 'model', None) in (Item, User):
+        return
+    remove_from_rollups(sender.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_delete, sender=Item)
+def remove_item_orders_from_rollups(sender, instance, **kwargs):
+    remove_from_rollups(Order.objects.filter(item_id=instance))
+    remove_from_rollups(LinkedOrder.objects.filter(item_id=instance))
+
+
+@receiver(pre_save, sender=Item)
+def remove_regrouped_item_orders_from_rollups(sender, instance, raw=False, **kwargs):
+    # the rollups are kept per item group, so the orders of an Item moved to another group are moved along
+    instance._rollup_group_changed = not raw and not instance._state.adding and sender.objects.filter(
+        pk=instance.pk).exclude(item_group=instance.item_group).exists()
+    if instance._rollup_group_changed:
+        remove_from_rollups(Order.objects.filter(item_id=instance))
+        remove_from_rollups(LinkedOrder.objects.filter(item_id=instance))
+
+
+@receiver(post_save, sender=Item)
+def add_regrouped_item_orders_to_rollups(sender, instance, **kwargs):
+    if getattr(instance, '_rollup_group_changed', False):
+        add_to_rollups(Order.objects.filter(item_id=instance))
+        add_to_rollups(LinkedOrder.objects.filter(item_id=instance))
+
+
+connection_created.connect(install_query_recorder, dispatch_uid='install_query_recorder')
@@ -0,0 +1,289 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .alerts import check_stock_levels
+from .autocomplete import item_prefix_index
+from .cache import invalidate_cached_pages
+from .models import Item, Order, LinkedOrder, StockMovement, StockReservation
+from .rollups import ROLLUP_MODELS, apply_rollup_changes, get_status_rollup_changes
+
+RESERVATION_TIME = timedelta(days=7)
+
+
+def get_order_reference(order_object):
+    """Returns the field of the StockMovement referencing the given Order or Linked Order."""
+
+    if isinstance(order_object, LinkedOrder):
+        return {'linked_order_id': order_object}
+    return {'order_id': order_object}
+
+
+def move_stock(item_id, quantity, kind, order_object=None, user=None):
+    """
+    Adds the quantity, negative for the items taken from the stock, to the Item balance in a single conditional UPDATE
+    and appends the movement to the ledger. The stock check and the change can't be interleaved by concurrent
+    movements. Raises ValidationError if there is not enough items in stock apart from the reserved ones.
+    """
+
+    items = Item.objects.filter(item_id=item_id)
+    if quantity < 0:
+        items = items.filter(quantity__gte=F('reserved_quantity') - quantity)
+    if not items.update(quantity=F('quantity') + quantity):
+        raise ValidationError(_("Not enough item to complete this order"))
+
+    order_reference = get_order_reference(order_object) if order_object else {}
+    StockMovement.objects.create(item_id_id=item_id, quantity=quantity, kind=kind, employee_name=user,
+                                 **order_reference)
+    transaction.on_commit(lambda: item_prefix_index.adjust_quantity(item_id, quantity))
+    invalidate_cached_pages(Item)
+    check_stock_levels([item_id])
+
+
+def reserve_stock(item_id, quantity, order_object):
+    """
+    Holds the quantity of the Item for a new Order/Linked Order, if it is available, in a single conditional UPDATE of
+    the reserved quantity. Raises ValidationError if there is not enough items available.
+    """
+
+    updated_rows = Item.objects.filter(item_id=item_id, quantity__gte=F('reserved_quantity') + quantity).update(
+        reserved_quantity=F('reserved_quantity') + quantity)
+    if not updated_rows:
+        raise ValidationError(_("Not enough items available to reserve for this order"))
+    StockReservation.objects.create(item_id_id=item_id, quantity=quantity, expires_at=timezone.now() + RESERVATION_TIME,
+                                    **get_order_reference(order_object))
+    invalidate_cached_pages(Item)
+
+
+def reserve_stock_for_orders(order_objects):
+    """
+    Reserves the quantities of many new Orders/Linked Orders at once. The quantities are summed up per item and checked
+    against the available stock together, on the items locked in a consistent order, so a batch of any size costs a
+    fixed number of queries. Has to be run inside a transaction.
+    """
+
+    requested_quantities = defaultdict(int)
+    for order_object in order_objects:
+        requested_quantities[order_object.item_id_id] += order_object.quantity
+
+    items = list(Item.objects.select_for_update().filter(item_id__in=requested_quantities)
+                 .only('item_id', 'item_name', 'quantity', 'reserved_quantity').order_by('item_id'))
+    for item_object in items:
+        item_object.reserved_quantity += requested_quantities[item_object.item_id]
+        if item_object.available_quantity < 0:
+            raise ValidationError(_("Not enough %(item)s available to reserve for these orders"),
+                                  params={'item': item_object.item_name})
+    Item.objects.bulk_update(items, ['reserved_quantity'])
+
+    expires_at = timezone.now() + RESERVATION_TIME
+    StockReservation.objects.bulk_create(
+        StockReservation(item_id_id=order_object.item_id_id, quantity=order_object.quantity, expires_at=expires_at,
+                         **get_order_reference(order_object))
+        for order_object in order_objects)
+    invalidate_cached_pages(Item)
+
+
+def release_reservations(reservations):
+    """Deletes the reservations and returns their quantities to the available stock. Has to be run in a transaction."""
+
+    released_quantities = defaultdict(int)
+    reservation_ids = []
+    for reservation_id, item_id, quantity in reservations.select_for_update().values_list(
+            'reservation_id', 'item_id', 'quantity'):
+        released_quantities[item_id] += quantity
+        reservation_ids.append(reservation_id)
+
+    for item_id, quantity in sorted(released_quantities.items()):
+        Item.objects.filter(item_id=item_id).update(reserved_quantity=F('reserved_quantity') - quantity)
+    StockReservation.objects.filter(reservation_id__in=reservation_ids).delete()
+    if reservation_ids:
+        invalidate_cached_pages(Item)
+    return len(reservation_ids)
+
+
+def release_order_reservation(order_object):
+    release_reservations(StockReservation.objects.filter(**get_order_reference(order_object)))
+
+
+def set_order_status(order_object, order_model, status):
+    """
+    Changes the status of an Order/Linked Order only if it differs from the stored one. Returns the rollup changes
+    moving it to the rollups of the new status, to be applied after the stock changes, or an empty dict if the status
+    wasn't changed, which lets approvals subtract the stock exactly once even if two coordinators submit at the same
+    time.
+    """
+
+    changed_orders = order_model.objects.filter(pk=order_object.pk).exclude(status=status)
+    is_changed = bool(list(changed_orders.select_for_update().values_list('pk', flat=True)))
+    order_object.status = status
+    if not is_changed:
+        return {}
+    rollup_changes = get_status_rollup_changes(changed_orders, status)
+    changed_orders.update(status=status)
+    invalidate_cached_pages(order_model)
+    return rollup_changes
+
+
+def revoke_order_approval(order_object, order_model, status):
+    """
+    Changes the status of an Order/Linked Order only if it is approved. Returns the rollup changes moving it to the
+    rollups of the new status, or an empty dict if the status wasn't changed. Once it was changed, the approved quantity
+    has to be returned to the stock.
+    """
+
+    approved_orders = order_model.objects.filter(pk=order_object.pk, status=order_model.Status.APPROVED)
+    is_changed = bool(list(approved_orders.select_for_update().values_list('pk', flat=True)))
+    if not is_changed:
+        return {}
+    rollup_changes = get_status_rollup_changes(approved_orders, status)
+    approved_orders.update(status=status)
+    order_object.status = status
+    invalidate_cached_pages(order_model)
+    return rollup_changes
+
+
+def update_order_statuses(order_ids, status, user=None):
+    """
+    Approves, rejects or renews many Orders at once, with the same stock changes as update_status. The quantities are
+    checked per item, on the items locked in a consistent order: the Orders of an item are approved in the order of
+    their ids while its stock suffices, the rest are left unchanged. A batch of any size costs a fixed number of
+    queries. Returns the error of every Order which wasn't changed, by its id. Has to be run inside a transaction.
+    """
+
+    is_approval = status == Order.Status.APPROVED
+    order_objects = list(Order.objects.select_for_update().filter(order_id__in=order_ids)
+                         .only('order_id', 'item_id', 'quantity', 'status').order_by('order_id'))
+    errors = {order_id: _("There is no such order")
+              for order_id in set(order_ids) - {order_object.order_id for order_object in order_objects}}
+
+    # the reservations are locked like in release_reservations, so the release_reservations command can't release them
+    # at the same time
+    reserved_quantities = defaultdict(int)
+    for order_id, quantity in StockReservation.objects.select_for_update().filter(order_id__in=order_objects).order_by(
+            'pk').values_list('order_id', 'quantity'):
+        reserved_quantities[order_id] += quantity
+
+    # an approval takes the stock and releases the reservation, a rejection releases the reservation and returns the
+    # stock of an approved Order, a renewal only returns the stock
+    stock_changes = {}
+    released_order_ids = set()
+    for order_object in order_objects:
+        if is_approval and order_object.status != status:
+            stock_changes[order_object.order_id] = -order_object.quantity
+        elif not is_approval and order_object.status == Order.Status.APPROVED:
+            stock_changes[order_object.order_id] = order_object.quantity
+        is_released = order_object.order_id in stock_changes if is_approval else status == Order.Status.REJECTED
+        if order_object.order_id in reserved_quantities and is_released:
+            released_order_ids.add(order_object.order_id)
+
+    items = {item_object.item_id: item_object for item_object in Item.objects.select_for_update().filter(
+        item_id__in={order_object.item_id_id for order_object in order_objects
+                     if order_object.order_id in stock_changes or order_object.order_id in released_order_ids})
+        .only('item_id', 'item_name', 'quantity', 'reserved_quantity').order_by('item_id')}
+    for order_object in order_objects:
+        order_id = order_object.order_id
+        if order_id not in stock_changes and order_id not in released_order_ids:
+            continue
+        item_object = items[order_object.item_id_id]
+        quantity = item_object.quantity + stock_changes.get(order_id, 0)
+        reserved_quantity = item_object.reserved_quantity - (
+            reserved_quantities[order_id] if order_id in released_order_ids else 0)
+        if is_approval and quantity < reserved_quantity:
+            errors[order_id] = _("Not enough %(item)s in stock to complete this order") % {'item': item_object}
+            stock_changes.pop(order_id)
+            released_order_ids.discard(order_id)
+            continue
+        item_object.quantity, item_object.reserved_quantity = quantity, reserved_quantity
+
+    changed_order_ids = [order_object.order_id for order_object in order_objects
+                         if order_object.status != status and order_object.order_id not in errors]
+    changed_orders = Order.objects.filter(order_id__in=changed_order_ids)
+    rollup_changes = get_status_rollup_changes(changed_orders, status)
+    changed_orders.update(status=status)
+    invalidate_cached_pages(Order)
+    if items:
+        Item.objects.bulk_update(items.values(), ['quantity', 'reserved_quantity'])
+        StockReservation.objects.filter(order_id__in=released_order_ids).delete()
+        kind = StockMovement.Kind.APPROVAL if is_approval else StockMovement.Kind.REVERSAL
+        order_items = {order_object.order_id: order_object.item_id_id for order_object in order_objects}
+        StockMovement.objects.bulk_create(
+            StockMovement(item_id_id=order_items[order_id], quantity=quantity, kind=kind, order_id_id=order_id,
+                          employee_name=user)
+            for order_id, quantity in stock_changes.items())
+
+        new_quantities = {item_object.item_id: item_object.quantity for item_object in items.values()}
+        transaction.on_commit(lambda: item_prefix_index.set_quantities(new_quantities))
+        invalidate_cached_pages(Item)
+        check_stock_levels(items.keys())
+    # the rollup rows are shared by all the orders of their keys, so they are updated after the stock
+    apply_rollup_changes(ROLLUP_MODELS[Order], rollup_changes)
+    return errors
+
+
+def update_linked_order_status(linked_order_model, order_number, status, comment, user=None):
+    """
+    Changes the status and comment of all positions of a Linked Order at once. Upon approval, the quantities of the
+    positions which weren't approved yet are summed up per item and checked against the stock together, when an
+    approved Linked Order is rejected or renewed, they are returned to the stock. The reservations of the positions are
+    released on approval and rejection. A Linked Order of any size costs a fixed number of queries. Has to be run inside
+    a transaction.
+    """
+
+    positions = linked_order_model.objects.filter(order_number=order_number)
+    # all the positions are locked, as the ones keeping their stock change their status too, the queryset itself stays
+    # unlocked since the rollups aggregate it and FOR UPDATE isn't allowed with GROUP BY
+    list(positions.select_for_update().values_list('pk', flat=True))
+
+    if status == linked_order_model.Status.APPROVED:
+        changed_positions = positions.exclude(status=status)
+        sign, kind = -1, StockMovement.Kind.APPROVAL
+    else:
+        changed_positions = positions.filter(status=linked_order_model.Status.APPROVED)
+        sign, kind = 1, StockMovement.Kind.REVERSAL
+    changed_positions = list(changed_positions.values_list('linked_order_id', 'item_id', 'quantity'))
+
+    stock_changes = defaultdict(int)
+    for linked_order_id, item_id, quantity in changed_positions:
+        stock_changes[item_id] += sign * quantity
+
+    reserved_changes = defaultdict(int)
+    if status != linked_order_model.Status.NEW:
+        # the reservations are locked like in release_reservations, so a reservation released at the same time by the
+        # release_reservations command isn't subtracted from the reserved quantity twice
+        reservations = StockReservation.objects.select_for_update(of=('self',)).filter(
+            linked_order_id__order_number=order_number).order_by('pk')
+        reservation_ids = []
+        for reservation_id, item_id, quantity in reservations.values_list('reservation_id', 'item_id', 'quantity'):
+            reserved_changes[item_id] -= quantity
+            reservation_ids.append(reservation_id)
+        StockReservation.objects.filter(reservation_id__in=reservation_ids).delete()
+
+    if stock_changes or reserved_changes:
+        items = list(Item.objects.select_for_update().filter(item_id__in=stock_changes.keys() | reserved_changes.keys())
+                     .only('item_id', 'quantity', 'reserved_quantity').order_by('item_id'))
+        for item_object in items:
+            item_object.quantity += stock_changes[item_object.item_id]
+            item_object.reserved_quantity += reserved_changes[item_object.item_id]
+            if stock_changes[item_object.item_id] < 0 and item_object.quantity < item_object.reserved_quantity:
+                raise ValidationError(_("Not enough item to complete this order"))
+        Item.objects.bulk_update(items, ['quantity', 'reserved_quantity'])
+        StockMovement.objects.bulk_create(
+            StockMovement(item_id_id=item_id, quantity=sign * quantity, kind=kind, linked_order_id_id=linked_order_id,
+                          employee_name=user)
+            for linked_order_id, item_id, quantity in changed_positions)
+
+        new_quantities = {item_object.item_id: item_object.quantity for item_object in items}
+        transaction.on_commit(lambda: item_prefix_index.set_quantities(new_quantities))
+        invalidate_cached_pages(Item)
+        check_stock_levels(new_quantities.keys())
+
+    rollup_changes = get_status_rollup_changes(positions, status)
+    positions.update(status=status, comment=comment)
+    invalidate_cached_pages(linked_order_model)
+    # the rollup rows are shared by all the orders of their keys, so they are updated after the stock
+    apply_rollup_changes(ROLLUP_MODELS[linked_order_model], rollup_changes)
@@ -0,0 +1,230 @@
+import random
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission, User
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Item, Order, LinkedOrder, LinkedOrderNumber, StockMovement, StockReservation
+from .stock import RESERVATION_TIME, get_order_reference
+
+GENERATOR_BATCH_SIZE = 5000
+HISTORY_DAYS = 730
+
+# the permissions of the roles described in the README, checked by the views
+ROLE_PERMISSIONS = {
+    'Employee': ['view_item', 'add_order'],
+    'Coordinator': ['view_item', 'add_item', 'change_item', 'delete_item', 'view_order', 'change_order',
+                    'view_linkedorder', 'change_linkedorder'],
+}
+
+# most of the order history is processed, only the recent orders are still waiting for a coordinator
+ORDER_STATUS_WEIGHTS = {
+    Order.Status.NEW: 15,
+    Order.Status.APPROVED: 70,
+    Order.Status.REJECTED: 15,
+}
+
+ITEM_NAME_WORDS = [
+    ['steel', 'brass', 'copper', 'plastic', 'rubber', 'nylon', 'zinc', 'oak', 'glass', 'ceramic'],
+    ['bolt', 'nut', 'washer', 'screw', 'hinge', 'bracket', 'pipe', 'valve', 'cable', 'panel', 'gasket', 'spring'],
+]
+ITEM_STATUSES = ['available', 'available', 'available', 'discontinued', 'on request']
+LINKED_ORDER_SIZES = range(2, 9)
+
+
+def iter_batches(objects, batch_size):
+    objects = iter(objects)
+    while batch := list(islice(objects, batch_size)):
+        yield batch
+
+
+def get_next_number(model):
+    """Returns the number following the last primary key of the model, to keep the generated names unique."""
+
+    return (model.objects.aggregate(last_pk=Max(model._meta.pk.name))['last_pk'] or 0) + 1
+
+
+def get_role_group(role):
+    group, _created = Group.objects.get_or_create(name=role)
+    group.permissions.set(Permission.objects.filter(content_type__app_label='website',
+                                                    codename__in=ROLE_PERMISSIONS[role]))
+    return group
+
+
+def generate_users(role, count, password, batch_size=GENERATOR_BATCH_SIZE):
+    """Creates the users with the role, sharing a single password hash. Returns their ids."""
+
+    group = get_role_group(role)
+    password_hash = make_password(password)
+    first_number = get_next_number(User)
+    user_ids = []
+    for batch in iter_batches(range(first_number, first_number + count), batch_size):
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                User(username=f'{role.lower()}{number}', password=password_hash) for number in batch)
+            User.groups.through.objects.bulk_create(
+                User.groups.through(user_id=user.id, group_id=group.id) for user in users)
+        user_ids += [user.id for user in users]
+    return user_ids
+
+
+def generate_items(rng, count, batch_size=GENERATOR_BATCH_SIZE):
+    """
+    Creates the Items across all the groups and units, with the opening balance of their stock in the ledger. Returns
+    their ids and prices.
+    """
+
+    first_number = get_next_number(Item)
+    item_ids, item_prices = [], []
+    for batch in iter_batches(range(first_number, first_number + count), batch_size):
+        items = [Item(item_name=f'{rng.choice(ITEM_NAME_WORDS[0])} {rng.choice(ITEM_NAME_WORDS[1])} {number}',
+                      item_group=rng.choice(Item.ItemGroup.values),
+                      unit_of_measurement=rng.choice(Item.ItemUnit.values),
+                      quantity=int(rng.lognormvariate(5, 1.5)),
+                      price_without_VAT=Decimal(rng.randint(10, 500000)) / 100,
+                      status=rng.choice(ITEM_STATUSES),
+                      storage_location=f'{rng.choice("ABCDEFGH")}-{rng.randint(1, 40):02}-{rng.randint(1, 6)}')
+                 for number in batch]
+        with transaction.atomic():
+            Item.objects.bulk_create(items)
+            StockMovement.objects.bulk_create(
+                StockMovement(item_id_id=item.item_id, quantity=item.quantity,
+                              kind=StockMovement.Kind.OPENING_BALANCE)
+                for item in items if item.quantity)
+        item_ids += [item.item_id for item in items]
+        item_prices += [item.price_without_VAT for item in items]
+    return item_ids, item_prices
+
+
+def choose_item(rng, item_count):
+    # a few items are ordered much more often than the rest of the catalogue
+    return int(item_count * rng.random() ** 3)
+
+
+def choose_quantity(rng):
+    return min(int(rng.expovariate(0.4)) + 1, 20)
+
+
+def choose_status(rng):
+    return rng.choices(list(ORDER_STATUS_WEIGHTS), weights=list(ORDER_STATUS_WEIGHTS.values()))[0]
+
+
+def get_history_end():
+    # the end of the current day, so the history generated from a seed only shifts from one day to the next
+    return timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=1), time()))
+
+
+def choose_created_at(rng, history_end, history_days):
+    return history_end - timedelta(seconds=rng.randrange(history_days * 24 * 60 * 60) + 1)
+
+
+def lock_items(orders):
+    """Locks the Items of a batch of orders, to reserve the stock of the new orders among them."""
+
+    return {item_object.item_id: item_object for item_object in Item.objects.select_for_update().filter(
+        item_id__in={order_object.item_id_id for order_object in orders}).only(
+        'item_id', 'quantity', 'reserved_quantity').order_by('item_id')}
+
+
+def reserve_quantities(items, requested_quantities):
+    """Reserves the quantities of the Items if all of them are available. Returns whether they were reserved."""
+
+    if any(items[item_id].available_quantity < quantity for item_id, quantity in requested_quantities.items()):
+        return False
+    for item_id, quantity in requested_quantities.items():
+        items[item_id].reserved_quantity += quantity
+    return True
+
+
+def create_reservations(orders, items):
+    """
+    Creates the reservations of the new orders, once they have their ids, and stores the reserved quantities of the
+    Items. The reservations expire as if they were made when the orders were created.
+    """
+
+    StockReservation.objects.bulk_create(
+        StockReservation(item_id_id=order_object.item_id_id, quantity=order_object.quantity,
+                         expires_at=order_object.created_at + RESERVATION_TIME, **get_order_reference(order_object))
+        for order_object in orders if order_object.status == Order.Status.NEW)
+    Item.objects.bulk_update(items.values(), ['reserved_quantity'])
+
+
+def generate_orders(rng, count, employee_ids, item_ids, item_prices, batch_size=GENERATOR_BATCH_SIZE,
+                    history_days=HISTORY_DAYS):
+    """
+    Creates the Orders, created at random times of the last history_days days. The new Orders reserve their stock, the
+    ones which don't fit the available stock are rejected, as the views would refuse to create them.
+    """
+
+    history_end = get_history_end()
+    for batch in iter_batches(range(count), batch_size):
+        orders = []
+        for _number in batch:
+            item_index = choose_item(rng, len(item_ids))
+            quantity = choose_quantity(rng)
+            orders.append(Order(employee_name_id=rng.choice(employee_ids), item_id_id=item_ids[item_index],
+                                unit_of_measurement=rng.choice(Item.ItemUnit.values), quantity=quantity,
+                                price_without_VAT=min(quantity * item_prices[item_index], Decimal('9999.99')),
+                                status=choose_status(rng),
+                                created_at=choose_created_at(rng, history_end, history_days)))
+        with transaction.atomic():
+            items = lock_items(orders)
+            for order_object in orders:
+                if (order_object.status == Order.Status.NEW
+                        and not reserve_quantities(items, {order_object.item_id_id: order_object.quantity})):
+                    order_object.status = Order.Status.REJECTED
+            Order.objects.bulk_create(orders)
+            create_reservations(orders, items)
+
+
+def generate_linked_orders(rng, count, item_ids, item_prices, batch_size=GENERATOR_BATCH_SIZE,
+                           history_days=HISTORY_DAYS):
+    """
+    Creates about count Linked Order positions, grouped by 2 to 8 under one number, sharing the status and the time of
+    creation. The new Linked Orders reserve the stock of all their positions, or are rejected if any of them doesn't
+    fit the available stock.
+    """
+
+    linked_order_sizes = []
+    while sum(linked_order_sizes) < count:
+        linked_order_sizes.append(rng.choice(LINKED_ORDER_SIZES))
+
+    history_end = get_history_end()
+    for batch in iter_batches(linked_order_sizes, batch_size // max(LINKED_ORDER_SIZES)):
+        with transaction.atomic():
+            order_numbers = LinkedOrderNumber.objects.bulk_create(
+                LinkedOrderNumber(last_position=size) for size in batch)
+            linked_orders = []
+            for order_number, size in zip(order_numbers, batch):
+                status = choose_status(rng)
+                created_at = choose_created_at(rng, history_end, history_days)
+                linked_order = []
+                for position in range(1, size + 1):
+                    item_index = choose_item(rng, len(item_ids))
+                    quantity = choose_quantity(rng)
+                    linked_order.append(LinkedOrder(
+                        order_number=order_number.order_number, position=position, item_id_id=item_ids[item_index],
+                        unit_of_measurement=rng.choice(Item.ItemUnit.values), quantity=quantity,
+                        price_without_VAT=min(quantity * item_prices[item_index], Decimal('9999.99')),
+                        status=status, created_at=created_at))
+                linked_orders.append(linked_order)
+
+            positions = [position for linked_order in linked_orders for position in linked_order]
+            items = lock_items(positions)
+            for linked_order in linked_orders:
+                if linked_order[0].status != LinkedOrder.Status.NEW:
+                    continue
+                requested_quantities = defaultdict(int)
+                for position in linked_order:
+                    requested_quantities[position.item_id_id] += position.quantity
+                if not reserve_quantities(items, requested_quantities):
+                    for position in linked_order:
+                        position.status = LinkedOrder.Status.REJECTED
+            LinkedOrder.objects.bulk_create(positions)
+            create_reservations(positions, items)
@@ -0,0 +1,1227 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, time, timedelta
+from io import BytesIO
+from unittest import skipUnless
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import Sum
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from .alerts import NotificationSink, check_stock_levels, get_notification_sink
+from .api import create_api_token, get_token_auth_user
+from .autocomplete import ItemPrefixIndex, item_prefix_index
+from .cache import get_model_versions
+from .exports import EXPORT_FIELDS
+from .forecasting import (forecast_demand, forecast_exponential, get_history_start, get_reorder_suggestions, load_items,
+                          load_weekly_demand)
+from .imports import import_items
+from .metrics import LATENCY_BOUNDS, Histogram, install_query_recorder, metrics_registry
+from .models import (Item, Order, LinkedOrder, StockMovement, StockReservation, LowStockAlert, ReorderSuggestion,
+                     ApiToken, OrderRollup)
+from .pagination import CursorPaginator
+from .rollups import ROLLUP_MODELS, get_rollup_totals
+from .search import get_substring_search_results, search_items
+from .thumbnails import (THUMBNAIL_DIRECTORY, THUMBNAIL_FORMATS, THUMBNAIL_SIZES, get_thumbnail_path, needs_thumbnails,
+                         render_thumbnails, save_thumbnails)
+from .stock import (move_stock, release_order_reservation, reserve_stock, update_order_statuses,
+                    update_linked_order_status)
+from .utils import (get_next_order_number, get_next_position_in_linked_order, get_filter_key, get_filter_query,
+                    get_filter_values, get_filtered_obj)
+from .views import ItemsView, OrderView, LinkedOrderView, update_status
+
+
+@skipUnless(connection.features.has_select_for_update, "The approvals are only serialized by row locks")
+class ConcurrentApprovalTests(TransactionTestCase):
+    """Approves the Orders of one Item from many threads at once, each with its own database connection."""
+
+    thread_count = 10
+
+    def setUp(self):
+        self.employee = User.objects.create_user('employee')
+        self.item = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                        unit_of_measurement=Item.ItemUnit.values[0], quantity=5,
+                                        price_without_VAT=1, status='available')
+
+    def create_orders(self, count):
+        return [Order.objects.create(employee_name=self.employee, item_id=self.item,
+                                     unit_of_measurement=self.item.unit_of_measurement, quantity=1,
+                                     price_without_VAT=1)
+                for _number in range(count)]
+
+    def approve_concurrently(self, orders):
+        """Approves every Order in its own thread, all started together. Returns the number of the approvals."""
+
+        barrier = threading.Barrier(len(orders))
+        results = []
+
+        def approve(order_id):
+            try:
+                order_object = Order.objects.get(pk=order_id)
+                barrier.wait()
+                with transaction.atomic():
+                    update_status('apr', order_object, Order)
+                results.append(True)
+            except ValidationError:
+                results.append(False)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=approve, args=(order_object.pk,)) for order_object in orders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), len(orders))
+        return results.count(True)
+
+    def test_approvals_stop_at_the_stock(self):
+        orders = self.create_orders(self.thread_count)
+
+        approved_count = self.approve_concurrently(orders)
+
+        self.item.refresh_from_db()
+        self.assertEqual(approved_count, 5)
+        self.assertEqual(self.item.quantity, 0)
+        self.assertEqual(Order.objects.filter(status=Order.Status.APPROVED).count(), 5)
+        rollup_counts = dict(OrderRollup.objects.values_list('status', 'order_count'))
+        self.assertEqual((rollup_counts[Order.Status.NEW], rollup_counts[Order.Status.APPROVED]), (5, 5))
+
+    def test_order_is_approved_once(self):
+        order_object, = self.create_orders(1)
+
+        approved_count = self.approve_concurrently([order_object] * self.thread_count)
+
+        self.item.refresh_from_db()
+        self.assertEqual(approved_count, self.thread_count)
+        self.assertEqual(self.item.quantity, 4)
+        self.assertEqual(StockMovement.objects.filter(item_id=self.item, kind=StockMovement.Kind.APPROVAL).count(), 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', "The query plans are checked on PostgreSQL")
+class QueryPlanTests(TestCase):
+    """
+    Checks that the queries of the list, filter and update views can be answered from the indexes. The test tables
+    are tiny, so the sequential and bitmap scans are turned off for the planner to show the index it would use on a
+    large table.
+    """
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        # the rows are read in the order of the index, not sorted afterwards
+        self.assertNotIn('Sort', plan)
+
+    def get_page_query(self, objects, ordering, cursor=None):
+        paginator = CursorPaginator(objects, 20, ordering)
+        _position, _backwards, page_query = paginator.get_page_query(cursor)
+        return page_query
+
+    def test_filtered_order_list(self):
+        orders = get_filtered_obj(Order, {'status': [Order.Status.NEW]})
+        self.assertUsesIndex(self.get_page_query(orders, 'item_id'), 'order_status_item_idx')
+
+    def test_filtered_order_list_next_page(self):
+        orders = get_filtered_obj(Order, {'status': [Order.Status.NEW]})
+        cursor = CursorPaginator.encode_cursor('7', '100', 'next')
+        self.assertUsesIndex(self.get_page_query(orders, 'item_id', cursor), 'order_status_item_idx')
+
+    def test_ordered_order_list(self):
+        cursor = CursorPaginator.encode_cursor('3', '100', 'next')
+        self.assertUsesIndex(self.get_page_query(Order.objects.all(), '-quantity', cursor), 'order_quantity_idx')
+
+    def test_linked_order_list(self):
+        self.assertUsesIndex(self.get_page_query(LinkedOrder.objects.all(), 'order_number'), 'linkedorder_number_idx')
+
+    def test_linked_order_position(self):
+        self.assertUsesIndex(LinkedOrder.objects.filter(order_number=7, position=1), 'unique_linked_order_position')
+
+    def test_filtered_linked_orders(self):
+        self.assertUsesIndex(LinkedOrder.objects.filter(order_number=7, status=LinkedOrder.Status.NEW),
+                             'linkedorder_status_number_idx')
+
+
+# nothing is cached by the dummy cache, so every request of the tests runs the queries of the page
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class ListQueryCountTests(TestCase):
+    """Checks that the lists run the same queries for a page of a single row and for a full page of rows."""
+
+    row_count = 25
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('coordinator')
+        self.client.force_login(self.user)
+
+    def create_rows(self, model, count):
+        """Creates the rows in bulk, each of them of another Item and employee, as the related rows are rendered."""
+
+        first_number = model.objects.count()
+        numbers = range(first_number, first_number + count)
+        employees = User.objects.bulk_create(User(username=f'employee{number}') for number in numbers)
+        items = Item.objects.bulk_create(
+            Item(item_name=f'item {number}', item_group=Item.ItemGroup.values[0],
+                 unit_of_measurement=Item.ItemUnit.values[0], quantity=10, price_without_VAT=1, status='available')
+            for number in numbers)
+        if model is Order:
+            Order.objects.bulk_create(
+                Order(employee_name=employee, item_id=item_object, unit_of_measurement=item_object.unit_of_measurement,
+                      quantity=1, price_without_VAT=1)
+                for employee, item_object in zip(employees, items))
+        elif model is LinkedOrder:
+            LinkedOrder.objects.bulk_create(
+                LinkedOrder(order_number=number, position=1, item_id=item_object,
+                            unit_of_measurement=item_object.unit_of_measurement, quantity=1, price_without_VAT=1)
+                for number, item_object in zip(numbers, items))
+
+    def assertQueryCountIndependentOfRows(self, url, model, page_size):
+        self.create_rows(model, 1)
+        with CaptureQueriesContext(connection) as single_row_queries:
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+        self.create_rows(model, self.row_count)
+        with self.assertNumQueries(len(single_row_queries)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['page_obj']), page_size)
+
+    def test_item_list(self):
+        self.assertQueryCountIndependentOfRows('/items/', Item, ItemsView.paginate_by)
+
+    def test_order_list(self):
+        self.assertQueryCountIndependentOfRows('/orders/', Order, OrderView.paginate_by)
+
+    def test_linked_order_list(self):
+        self.assertQueryCountIndependentOfRows('/linked_orders/', LinkedOrder, LinkedOrderView.paginate_by)
+
+
+class PageCacheTests:
+    """Checks that the pages are cached until a change of the models they depend on, on the backend of the subclass."""
+
+    def setUp(self):
+        # the versions and pages of the cache outlive the rows of the other tests
+        cache.clear()
+        self.user = User.objects.create_superuser('coordinator')
+        self.client.force_login(self.user)
+        self.item = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                        unit_of_measurement=Item.ItemUnit.values[0], quantity=5,
+                                        price_without_VAT=1, status='available')
+
+    def get_items_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/items/')
+        return response, len(queries)
+
+    def test_save_bumps_the_version(self):
+        version, = get_model_versions([Item])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.save()
+        self.assertNotEqual(get_model_versions([Item]), [version])
+
+    def test_version_is_bumped_on_commit(self):
+        version, = get_model_versions([Item])
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.item.save()
+        self.assertEqual(get_model_versions([Item]), [version])
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_model_versions([Item]), [version])
+
+    def test_page_is_cached_until_a_save(self):
+        _response, miss_query_count = self.get_items_page()
+        response, hit_query_count = self.get_items_page()
+        self.assertLess(hit_query_count, miss_query_count)
+        self.assertContains(response, 'BOLT')
+
+        self.item.item_name = 'nut'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.save()
+        response, query_count = self.get_items_page()
+        self.assertEqual(query_count, miss_query_count)
+        self.assertContains(response, 'NUT')
+        self.assertNotContains(response, 'BOLT')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'warehouse-tests'}})
+class LocMemPageCacheTests(PageCacheTests, TestCase):
+    pass
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                       'LOCATION': os.path.join(tempfile.gettempdir(), 'warehouse-tests')}})
+class FileBasedPageCacheTests(PageCacheTests, TestCase):
+    pass
+
+
+class CursorPaginatorTests(TestCase):
+    """Pages through the Items by a field with repeated values, forwards and backwards."""
+
+    def setUp(self):
+        Item.objects.bulk_create(
+            Item(item_name=f'item {number:02}', item_group=Item.ItemGroup.values[0],
+                 unit_of_measurement=Item.ItemUnit.values[0], quantity=number % 4, price_without_VAT=1,
+                 status='available')
+            for number in range(11))
+
+    def get_pages(self, ordering, per_page=3):
+        paginator = CursorPaginator(Item.objects.all(), per_page, ordering)
+        pages = [paginator.get_page(None)]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+        return paginator, pages
+
+    def test_pages_follow_the_ordering(self):
+        for ordering in ['quantity', '-quantity', 'item_name', '-item_id']:
+            with self.subTest(ordering=ordering):
+                _paginator, pages = self.get_pages(ordering)
+                paged_ids = [item_object.item_id for page in pages for item_object in page]
+                expected_ids = list(Item.objects.order_by(ordering, '-item_id' if ordering[0] == '-' else 'item_id')
+                                    .values_list('item_id', flat=True))
+                self.assertEqual(paged_ids, expected_ids)
+                self.assertEqual([len(page) for page in pages], [3, 3, 3, 2])
+
+    def test_previous_cursor_returns_the_previous_page(self):
+        paginator, pages = self.get_pages('quantity')
+        self.assertFalse(pages[0].has_previous())
+        for previous_page, page in zip(pages, pages[1:]):
+            self.assertEqual(list(paginator.get_page(page.previous_cursor)), list(previous_page))
+
+    def test_invalid_cursors_return_the_first_page(self):
+        paginator, pages = self.get_pages('quantity')
+        cursors = ['garbage', '!!!', CursorPaginator.encode_cursor(None, 1, 'next'),
+                   CursorPaginator.encode_cursor('many', 1, 'next'), CursorPaginator.encode_cursor(1, 'x', 'next'),
+                   CursorPaginator.encode_cursor(1, 1, 'sideways')]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(list(paginator.get_page(cursor)), list(pages[0]))
+
+    def test_count_only_when_requested(self):
+        self.assertIsNone(CursorPaginator(Item.objects.all(), 3, 'quantity').get_page(None).count)
+        self.assertEqual(CursorPaginator(Item.objects.all(), 3, 'quantity', with_count=True).get_page(None).count, 11)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class ListOrderingTests(TestCase):
+    """Checks that the lists can be ordered only by the fields with an index matching the pagination."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('coordinator'))
+
+    def test_indexed_orderings(self):
+        for model, url in [(Item, '/items/'), (Order, '/orders/')]:
+            for ordering in model.ordering_fields:
+                with self.subTest(url=url, ordering=ordering):
+                    self.assertEqual(self.client.get(f'{url}{ordering}').status_code, 200)
+
+    def test_other_orderings_are_not_found(self):
+        for url in ['/items/contact_person', '/items/photo', '/items/storage_location', '/orders/comment',
+                    '/orders/employee_name', '/orders/created_at', '/orders/unknown']:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class OrderBulkStatusFormTests(TestCase):
+    """Checks that both the sync and the async Order list render the bulk status form."""
+
+    def setUp(self):
+        user = User.objects.create_superuser('coordinator')
+        self.client.force_login(user)
+        self.async_client.force_login(user)
+
+    def assertRendersBulkStatusForm(self, response):
+        self.assertContains(response, '<select name="status"')
+        self.assertContains(response, 'name="bulk_status"')
+
+    def test_order_list(self):
+        self.assertRendersBulkStatusForm(self.client.get('/orders/'))
+
+    @override_settings(ROOT_URLCONF='warehouse.asgi_urls')
+    async def test_async_order_list(self):
+        self.assertRendersBulkStatusForm(await self.async_client.get('/orders/'))
+
+
+class LinkedOrderReservationTests(TestCase):
+    """Checks that the reservations of a Linked Order are released exactly once."""
+
+    def setUp(self):
+        self.item = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                        unit_of_measurement=Item.ItemUnit.values[0], quantity=5,
+                                        price_without_VAT=1, status='available')
+        self.positions = [LinkedOrder.objects.create(order_number=1, position=position, item_id=self.item,
+                                                     unit_of_measurement=self.item.unit_of_measurement, quantity=2,
+                                                     price_without_VAT=1)
+                          for position in range(2)]
+        with transaction.atomic():
+            for position in self.positions:
+                reserve_stock(self.item.item_id, position.quantity, position)
+
+    def update_status(self, status):
+        with transaction.atomic():
+            update_linked_order_status(LinkedOrder, 1, status, '')
+        self.item.refresh_from_db()
+
+    def test_approval_releases_the_reservations(self):
+        self.update_status(LinkedOrder.Status.APPROVED)
+        self.assertEqual((self.item.quantity, self.item.reserved_quantity), (1, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_rejection_releases_the_reservations(self):
+        self.update_status(LinkedOrder.Status.REJECTED)
+        self.assertEqual((self.item.quantity, self.item.reserved_quantity), (5, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_released_reservation_is_not_released_again(self):
+        with transaction.atomic():
+            release_order_reservation(self.positions[0])
+        self.update_status(LinkedOrder.Status.APPROVED)
+        self.assertEqual((self.item.quantity, self.item.reserved_quantity), (1, 0))
+
+
+class OrderStatusesTests(TestCase):
+    """Checks the stock changes of the bulk Order status changes."""
+
+    def setUp(self):
+        self.employee = User.objects.create_user('employee')
+        self.item = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                        unit_of_measurement=Item.ItemUnit.values[0], quantity=5,
+                                        price_without_VAT=1, status='available')
+        self.orders = [Order.objects.create(employee_name=self.employee, item_id=self.item,
+                                            unit_of_measurement=self.item.unit_of_measurement, quantity=2,
+                                            price_without_VAT=1)
+                       for _number in range(3)]
+        with transaction.atomic():
+            reserve_stock(self.item.item_id, self.orders[0].quantity, self.orders[0])
+
+    def update_order_statuses(self, order_ids, status):
+        with transaction.atomic():
+            errors = update_order_statuses(order_ids, status, self.employee)
+        self.item.refresh_from_db()
+        return errors
+
+    def test_approvals_stop_at_the_stock(self):
+        order_ids = [order_object.order_id for order_object in self.orders]
+        errors = self.update_order_statuses(order_ids + [0], Order.Status.APPROVED)
+        self.assertEqual(sorted(errors), [0, order_ids[2]])
+        self.assertEqual((self.item.quantity, self.item.reserved_quantity), (1, 0))
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertEqual(StockMovement.objects.filter(kind=StockMovement.Kind.APPROVAL).count(), 2)
+
+    def test_rejection_returns_the_stock(self):
+        self.update_order_statuses([self.orders[1].order_id], Order.Status.APPROVED)
+        errors = self.update_order_statuses([order_object.order_id for order_object in self.orders],
+                                            Order.Status.REJECTED)
+        self.assertEqual(errors, {})
+        self.assertEqual((self.item.quantity, self.item.reserved_quantity), (5, 0))
+        self.assertEqual(set(Order.objects.values_list('status', flat=True)), {Order.Status.REJECTED})
+
+
+class OrderBatchStatusApiTests(TestCase):
+    """Checks that the status batches of the API apply every change they can and return the errors of the rest."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('coordinator'))
+        employee = User.objects.create_user('employee')
+        self.item = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                        unit_of_measurement=Item.ItemUnit.values[0], quantity=3,
+                                        price_without_VAT=1, status='available')
+        self.orders = [Order.objects.create(employee_name=employee, item_id=self.item,
+                                            unit_of_measurement=self.item.unit_of_measurement, quantity=2,
+                                            price_without_VAT=1)
+                       for _number in range(3)]
+
+    def post_changes(self, changes):
+        return self.client.post('/api/v1/orders/status/', {'changes': changes}, content_type='application/json')
+
+    def test_orders_lacking_stock_are_returned_with_errors(self):
+        order_ids = [order_object.order_id for order_object in self.orders]
+        response = self.post_changes([{'order_id': order_id, 'status': Order.Status.APPROVED}
+                                      for order_id in order_ids + [0]])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(sorted(response.json()['errors']), ['0', str(order_ids[1]), str(order_ids[2])])
+        self.assertEqual(Order.objects.get(order_id=order_ids[0]).status, Order.Status.APPROVED)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 1)
+
+    def test_mixed_statuses(self):
+        self.post_changes([{'order_id': self.orders[0].order_id, 'status': Order.Status.APPROVED}])
+        response = self.post_changes([{'order_id': self.orders[0].order_id, 'status': Order.Status.NEW},
+                                      {'order_id': self.orders[1].order_id, 'status': Order.Status.APPROVED},
+                                      {'order_id': self.orders[2].order_id, 'status': Order.Status.REJECTED}])
+        self.assertEqual(response.json(), {'updated': 3, 'errors': {}})
+        self.assertEqual(list(Order.objects.order_by('order_id').values_list('status', flat=True)),
+                         [Order.Status.NEW, Order.Status.APPROVED, Order.Status.REJECTED])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 1)
+
+
+class ApiTokenTests(TestCase):
+    """Checks the API token authentication of the scanners and the ERP sync."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('scanner')
+        self.key = create_api_token(self.user, 'scanner 1')
+
+    def get_items(self, key):
+        return self.client.get('/api/v1/items/', headers={'Authorization': f'Token {key}'})
+
+    def test_token_authenticates_the_user(self):
+        self.assertEqual(self.get_items(self.key).status_code, 200)
+
+    def test_only_the_key_hash_is_stored(self):
+        self.assertFalse(ApiToken.objects.filter(key_hash=self.key).exists())
+
+    def test_unknown_token_is_rejected(self):
+        self.assertEqual(self.get_items('unknown').status_code, 401)
+
+    def test_token_of_inactive_user_is_rejected(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get_items(self.key).status_code, 401)
+
+    def test_token_is_checked_in_a_single_query(self):
+        request = RequestFactory().get('/', headers={'Authorization': f'Token {self.key}'})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_token_auth_user(request), self.user)
+        self.assertEqual(len(queries), 1)
+
+
+class ItemImportTests(TestCase):
+    """Checks the validation of the imported rows and the ledger of the imported quantities."""
+
+    header = 'item_name,item_group,unit_of_measurement,quantity,price_without_VAT,status\n'
+
+    def setUp(self):
+        self.item = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                        unit_of_measurement=Item.ItemUnit.values[0], quantity=5,
+                                        price_without_VAT=1, status='available')
+
+    def import_rows(self, *rows):
+        return import_items(io.StringIO(self.header + ''.join(f'{row}\n' for row in rows)))
+
+    def assertLedgerMatchesStock(self):
+        for item_object in Item.objects.all():
+            self.assertEqual(sum(StockMovement.objects.filter(item_id=item_object).values_list('quantity', flat=True)),
+                             item_object.quantity)
+
+    def test_new_and_existing_items(self):
+        result = self.import_rows('bolt,,,3,,', 'nut,G-1,U-1,2,0.50,available', 'nut,,,4,,')
+        self.assertEqual((result.created, result.updated, result.errors), (1, 1, []))
+        self.assertEqual(dict(Item.objects.values_list('item_name', 'quantity')), {'bolt': 8, 'nut': 6})
+        self.assertEqual(list(StockMovement.objects.filter(item_id__item_name='nut').values_list('kind', 'quantity')),
+                         [(StockMovement.Kind.OPENING_BALANCE, 6)])
+        self.assertEqual(StockMovement.objects.get(item_id=self.item, quantity=3).kind,
+                         StockMovement.Kind.REPLENISHMENT)
+        self.assertLedgerMatchesStock()
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        result = self.import_rows('bolt,,,-1,,', 'nut,,,2,,', 'washer,G-9,U-1,1,0.10,available',
+                                  'screw,G-1,U-1,1,0.10,')
+        # the rows failing the field validation are reported first, then the new items missing the required fields
+        errors = dict(result.errors)
+        self.assertEqual(list(errors), [2, 4, 3, 5])
+        self.assertEqual(errors[2]['quantity'][0]['code'], 'min_value')
+        self.assertEqual(errors[4]['item_group'][0]['code'], 'invalid_choice')
+        self.assertEqual(set(errors[3]), {'item_group', 'unit_of_measurement', 'price_without_VAT', 'status'})
+        self.assertEqual(set(errors[5]), {'status'})
+        self.assertEqual(list(Item.objects.values_list('item_name', 'quantity')), [('bolt', 5)])
+
+    def test_regrouped_item_keeps_its_quantity(self):
+        self.import_rows('bolt,G-2,,0,,')
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.item_group, self.item.quantity), ('G-2', 5))
+        self.assertLedgerMatchesStock()
+
+
+@skipUnless(connection.features.has_select_for_update, "The imports are only serialized by row locks")
+class ConcurrentImportTests(TransactionTestCase):
+    """Imports the same new Item from many threads at once, each with its own database connection."""
+
+    thread_count = 10
+
+    def test_new_item_is_created_once_and_replenished(self):
+        barrier = threading.Barrier(self.thread_count)
+        lines = ['item_name,item_group,unit_of_measurement,quantity,price_without_VAT,status\n',
+                 'nut,G-1,U-1,2,0.50,available\n']
+
+        def import_nut():
+            try:
+                barrier.wait()
+                import_items(lines)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=import_nut) for _number in range(self.thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        item_object = Item.objects.get(item_name='nut')
+        self.assertEqual(item_object.quantity, 2 * self.thread_count)
+        movements = StockMovement.objects.filter(item_id=item_object)
+        self.assertEqual(sum(movements.values_list('quantity', flat=True)), item_object.quantity)
+        self.assertEqual(movements.filter(kind=StockMovement.Kind.OPENING_BALANCE).count(), 1)
+
+
+class RollupTests(TestCase):
+    """Checks that the rollups updated by the status changes match the rollups rebuilt from the orders."""
+
+    def setUp(self):
+        self.employee = User.objects.create_user('employee')
+        self.item = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                        unit_of_measurement=Item.ItemUnit.values[0], quantity=10,
+                                        price_without_VAT=1, status='available')
+        self.orders = [Order.objects.create(employee_name=self.employee, item_id=self.item,
+                                            unit_of_measurement=self.item.unit_of_measurement, quantity=2,
+                                            price_without_VAT=3)
+                       for _number in range(3)]
+        self.positions = [LinkedOrder.objects.create(order_number=1, position=position, item_id=self.item,
+                                                     unit_of_measurement=self.item.unit_of_measurement, quantity=1,
+                                                     price_without_VAT=2)
+                          for position in range(2)]
+
+    def assertRollupsMatchOrders(self):
+        for order_model, rollup_model in ROLLUP_MODELS.items():
+            rollups = {tuple(getattr(rollup, field) for field in rollup_model.key_fields):
+                       (rollup.order_count, rollup.quantity, rollup.price_without_VAT)
+                       for rollup in rollup_model.objects.exclude(order_count=0)}
+            self.assertEqual(rollups, get_rollup_totals(order_model.objects.all()))
+
+    def test_status_changes(self):
+        with transaction.atomic():
+            update_status('apr', self.orders[0], Order)
+            update_status('rej', self.orders[1], Order)
+        self.assertRollupsMatchOrders()
+        with transaction.atomic():
+            update_status('new', self.orders[0], Order)
+        self.assertRollupsMatchOrders()
+
+    def test_bulk_status_changes(self):
+        with transaction.atomic():
+            update_order_statuses([order_object.order_id for order_object in self.orders], Order.Status.APPROVED)
+        self.assertRollupsMatchOrders()
+        with transaction.atomic():
+            update_order_statuses([self.orders[0].order_id], Order.Status.REJECTED)
+        self.assertRollupsMatchOrders()
+
+    def test_linked_order_status_changes(self):
+        with transaction.atomic():
+            update_linked_order_status(LinkedOrder, 1, LinkedOrder.Status.APPROVED, '')
+        self.assertRollupsMatchOrders()
+        with transaction.atomic():
+            update_linked_order_status(LinkedOrder, 1, LinkedOrder.Status.NEW, '')
+        self.assertRollupsMatchOrders()
+
+
+class FilterTests(TestCase):
+    """Checks that the equivalent filters share a canonical key and that the invalid filter values are dropped."""
+
+    def get_filter_values(self, query_string, model=Order):
+        return get_filter_values(model, QueryDict(query_string))
+
+    def test_equivalent_filters_share_a_key(self):
+        keys = {get_filter_key(self.get_filter_values(query_string))
+                for query_string in ['status=rej&price=0-10&price=0-10&status=apr', 'price=0-10&status=apr&status=rej',
+                                     'status=apr&status=rej&price=0-10&price=x']}
+        self.assertEqual(keys, {'price=0-10&status=apr&status=rej'})
+
+    def test_invalid_values_are_dropped(self):
+        self.assertEqual(self.get_filter_values('price=10-0&quantity=a-b&status=unknown&unknown=1'), {})
+        self.assertEqual(self.get_filter_values('status=apr', model=Item), {})
+
+    def test_filter_query_from_form(self):
+        form_data = {'price_0_10': 'on', 'status_approved': 'on', 'status_unknown': 'on', 'quantity_1_5': 'off',
+                     'csrfmiddlewaretoken': 'token'}
+        self.assertEqual(get_filter_query(Order, form_data), 'price=0-10&status=apr')
+
+    def test_filtered_objects(self):
+        employee = User.objects.create_user('employee')
+        item = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                   unit_of_measurement=Item.ItemUnit.values[0], quantity=100, price_without_VAT=1,
+                                   status='available')
+        for quantity, status in [(1, Order.Status.NEW), (5, Order.Status.APPROVED), (20, Order.Status.APPROVED),
+                                 (50, Order.Status.REJECTED)]:
+            Order.objects.create(employee_name=employee, item_id=item, unit_of_measurement=item.unit_of_measurement,
+                                 quantity=quantity, price_without_VAT=1, status=status)
+
+        def get_quantities(query_string):
+            filtered_orders = get_filtered_obj(Order, self.get_filter_values(query_string))
+            return sorted(filtered_orders.values_list('quantity', flat=True))
+
+        self.assertEqual(get_quantities('quantity=0-5&quantity=40-60'), [1, 5, 50])
+        self.assertEqual(get_quantities('quantity=0-30&status=apr'), [5, 20])
+        self.assertEqual(get_quantities('status=new&status=apr&status=rej'), [1, 5, 20, 50])
+
+
+class ItemPrefixIndexTests(TestCase):
+    """Checks the lookups of the autocomplete prefix index and how it follows the changes of the Items."""
+
+    def setUp(self):
+        for item_name, quantity in [('Bolt M4', 5), ('bolt M3', 2), ('Nut', 7), ('Bolt M5', 1)]:
+            Item.objects.create(item_name=item_name, item_group=Item.ItemGroup.values[0],
+                                unit_of_measurement=Item.ItemUnit.values[0], quantity=quantity, price_without_VAT=1,
+                                status='available')
+        item_prefix_index.invalidate()
+        self.addCleanup(item_prefix_index.invalidate)
+
+    def get_names(self, prefix, index=item_prefix_index, limit=10):
+        return [result['item_name'] for result in index.lookup(prefix, limit)]
+
+    def test_prefix_lookup(self):
+        self.assertEqual(self.get_names(' BOLT '), ['bolt M3', 'Bolt M4', 'Bolt M5'])
+        self.assertEqual(self.get_names('bolt', limit=2), ['bolt M3', 'Bolt M4'])
+        self.assertEqual(self.get_names('washer'), [])
+        self.assertEqual(self.get_names(''), [])
+
+    def test_index_is_built_once(self):
+        self.get_names('bolt')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_names('nut'), ['Nut'])
+
+    def test_too_big_catalogue_is_looked_up_in_the_database(self):
+        index = ItemPrefixIndex(max_items=2)
+        self.assertEqual(self.get_names('bolt', index), ['bolt M3', 'Bolt M4', 'Bolt M5'])
+        self.assertIsNone(index.entries)
+
+    def test_index_follows_the_item_changes(self):
+        self.get_names('bolt')
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(item_name='Bolt M6', item_group=Item.ItemGroup.values[0],
+                                unit_of_measurement=Item.ItemUnit.values[0], quantity=3, price_without_VAT=1,
+                                status='available')
+        self.assertEqual(self.get_names('bolt m6'), ['Bolt M6'])
+
+        item_id = Item.objects.get(item_name='Nut').item_id
+        with self.captureOnCommitCallbacks(execute=True):
+            move_stock(item_id, -4, StockMovement.Kind.CORRECTION)
+        with self.assertNumQueries(0):
+            self.assertEqual(item_prefix_index.lookup('nut')[0]['quantity'], 3)
+
+
+class RecordingSink(NotificationSink):
+    notifications = []
+
+    def send(self, notifications):
+        self.notifications.extend(notifications)
+
+
+class FailingSink(NotificationSink):
+    def send(self, notifications):
+        raise OSError("The notification service is down")
+
+
+@override_settings(LOW_STOCK_NOTIFICATION_SINK='website.tests.RecordingSink')
+class LowStockAlertTests(TestCase):
+    """Checks that an Item is alerted and notified once per drop to its reorder threshold."""
+
+    def setUp(self):
+        get_notification_sink.cache_clear()
+        self.addCleanup(get_notification_sink.cache_clear)
+        RecordingSink.notifications = []
+        self.item = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                        unit_of_measurement=Item.ItemUnit.values[0], quantity=10, reorder_threshold=5,
+                                        price_without_VAT=1, status='available')
+
+    def move_stock(self, quantity, item_object=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            move_stock((item_object or self.item).item_id, quantity, StockMovement.Kind.CORRECTION)
+
+    def get_notified_quantities(self):
+        return [notification['quantity'] for notification in RecordingSink.notifications]
+
+    def test_item_is_notified_once_per_drop(self):
+        self.move_stock(-4)
+        self.assertFalse(LowStockAlert.objects.exists())
+        self.move_stock(-1)
+        self.move_stock(-2)
+        self.assertEqual(self.get_notified_quantities(), [5])
+        self.assertTrue(LowStockAlert.objects.filter(item_id=self.item).exists())
+
+        self.move_stock(4)
+        self.assertFalse(LowStockAlert.objects.exists())
+        self.move_stock(-3)
+        self.assertEqual(self.get_notified_quantities(), [5, 4])
+
+    def test_items_without_threshold_are_not_alerted(self):
+        item_object = Item.objects.create(item_name='nut', item_group=Item.ItemGroup.values[0],
+                                          unit_of_measurement=Item.ItemUnit.values[0], quantity=1,
+                                          price_without_VAT=1, status='available')
+        self.move_stock(-1, item_object)
+        self.assertFalse(LowStockAlert.objects.exists())
+        self.assertEqual(RecordingSink.notifications, [])
+
+    def test_unchanged_alerts_cost_two_queries(self):
+        self.move_stock(-5)
+        with self.assertNumQueries(2):
+            check_stock_levels([self.item.item_id])
+
+    @override_settings(LOW_STOCK_NOTIFICATION_SINK='website.tests.FailingSink')
+    def test_failing_sink_keeps_the_alert(self):
+        with self.assertLogs('website.alerts', level='ERROR'):
+            self.move_stock(-5)
+        self.assertTrue(LowStockAlert.objects.filter(item_id=self.item).exists())
+
+
+class OrderApprovalTests(TestCase):
+    """Checks the stock changes of the single Order status changes, on any backend."""
+
+    def setUp(self):
+        self.employee = User.objects.create_user('employee')
+        self.item = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                        unit_of_measurement=Item.ItemUnit.values[0], quantity=3,
+                                        price_without_VAT=1, status='available')
+
+    def create_order(self, quantity):
+        return Order.objects.create(employee_name=self.employee, item_id=self.item,
+                                    unit_of_measurement=self.item.unit_of_measurement, quantity=quantity,
+                                    price_without_VAT=1)
+
+    def update_status(self, status, order_object):
+        with transaction.atomic():
+            update_status(status, order_object, Order, self.employee)
+        self.item.refresh_from_db()
+
+    def test_approval_subtracts_the_stock_once(self):
+        order_object = self.create_order(2)
+        self.update_status('apr', order_object)
+        self.update_status('apr', Order.objects.get(pk=order_object.pk))
+        self.assertEqual(self.item.quantity, 1)
+        self.assertEqual(list(StockMovement.objects.filter(kind=StockMovement.Kind.APPROVAL)
+                              .values_list('quantity', flat=True)), [-2])
+
+    def test_approval_beyond_the_stock_is_rejected(self):
+        order_object = self.create_order(4)
+        with self.assertRaises(ValidationError):
+            self.update_status('apr', order_object)
+        self.assertEqual(self.item.quantity, 3)
+        self.assertEqual(Order.objects.get(pk=order_object.pk).status, Order.Status.NEW)
+
+    def test_rejection_returns_the_stock(self):
+        order_object = self.create_order(2)
+        self.update_status('apr', order_object)
+        self.update_status('rej', order_object)
+        self.assertEqual(self.item.quantity, 3)
+        self.assertEqual(list(StockMovement.objects.filter(order_id=order_object).values_list('kind', 'quantity')),
+                         [(StockMovement.Kind.APPROVAL, -2), (StockMovement.Kind.REVERSAL, 2)])
+
+
+class LinkedOrderApprovalTests(TestCase):
+    """Checks that the positions of a Linked Order are approved together, in a fixed number of queries."""
+
+    def setUp(self):
+        self.items = [Item.objects.create(item_name=f'bolt M{size}', item_group=Item.ItemGroup.values[0],
+                                          unit_of_measurement=Item.ItemUnit.values[0], quantity=10,
+                                          price_without_VAT=1, status='available')
+                      for size in range(3)]
+
+    def create_linked_order(self, order_number, quantities):
+        return [LinkedOrder.objects.create(order_number=order_number, position=position, item_id=item_object,
+                                           unit_of_measurement=item_object.unit_of_measurement, quantity=quantity,
+                                           price_without_VAT=1)
+                for position, (item_object, quantity) in enumerate(quantities, start=1)]
+
+    def update_status(self, order_number, status):
+        with transaction.atomic():
+            update_linked_order_status(LinkedOrder, order_number, status, '')
+
+    def get_quantities(self):
+        return list(Item.objects.order_by('item_id').values_list('quantity', flat=True))
+
+    def test_quantities_of_an_item_are_checked_together(self):
+        self.create_linked_order(1, [(self.items[0], 6), (self.items[0], 6), (self.items[1], 1)])
+        with self.assertRaises(ValidationError):
+            self.update_status(1, LinkedOrder.Status.APPROVED)
+        self.assertEqual(self.get_quantities(), [10, 10, 10])
+        self.assertEqual(set(LinkedOrder.objects.values_list('status', flat=True)), {LinkedOrder.Status.NEW})
+
+    def test_approval_and_reversal(self):
+        self.create_linked_order(1, [(self.items[0], 4), (self.items[0], 2), (self.items[2], 1)])
+        self.update_status(1, LinkedOrder.Status.APPROVED)
+        self.assertEqual(self.get_quantities(), [4, 10, 9])
+        self.update_status(1, LinkedOrder.Status.REJECTED)
+        self.assertEqual(self.get_quantities(), [10, 10, 10])
+        self.assertEqual(StockMovement.objects.filter(kind=StockMovement.Kind.REVERSAL).count(), 3)
+
+    def test_query_count_is_independent_of_positions(self):
+        self.create_linked_order(1, [(self.items[0], 1)])
+        self.create_linked_order(2, [(item_object, 1) for item_object in self.items] * 3)
+        with CaptureQueriesContext(connection) as small_order_queries:
+            self.update_status(1, LinkedOrder.Status.APPROVED)
+        with CaptureQueriesContext(connection) as large_order_queries:
+            self.update_status(2, LinkedOrder.Status.APPROVED)
+        self.assertEqual(len(large_order_queries), len(small_order_queries))
+
+
+class LinkedOrderNumberTests(TransactionTestCase):
+    """Checks that the Linked Order numbers and positions are allocated once each, also from many threads at once."""
+
+    thread_count = 10
+
+    def test_numbers_and_positions(self):
+        first_number, second_number = get_next_order_number(), get_next_order_number()
+        self.assertGreater(second_number, first_number)
+        positions = [get_next_position_in_linked_order(first_number) for _number in range(3)]
+        self.assertEqual(positions, [1, 2, 3])
+        self.assertEqual(get_next_position_in_linked_order(second_number), 1)
+
+    @skipUnless(connection.features.has_select_for_update, "The positions are only serialized by row locks")
+    def test_concurrent_positions(self):
+        order_number = get_next_order_number()
+        barrier = threading.Barrier(self.thread_count)
+        positions = []
+
+        def allocate_position():
+            try:
+                barrier.wait()
+                positions.append(get_next_position_in_linked_order(order_number))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=allocate_position) for _number in range(self.thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(positions), list(range(1, self.thread_count + 1)))
+
+
+class ExportTests(TestCase):
+    """Checks the streamed CSV and JSON Lines exports of the filtered rows."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('coordinator'))
+        for item_name, quantity in [('bolt', 5), ('nut', 50), ('washer, flat', 8)]:
+            Item.objects.create(item_name=item_name, item_group=Item.ItemGroup.values[0],
+                                unit_of_measurement=Item.ItemUnit.values[0], quantity=quantity, price_without_VAT=1.5,
+                                status='available')
+
+    def export(self, query_string):
+        response = self.client.get(f'/items/export/?{query_string}')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('quantity=0-10'))))
+        self.assertEqual([row['item_name'] for row in rows], ['bolt', 'washer, flat'])
+        self.assertEqual(list(rows[0]), EXPORT_FIELDS[Item])
+        self.assertEqual(rows[0]['price_without_VAT'], '1.50')
+
+    def test_jsonl_export(self):
+        rows = [json.loads(line) for line in self.export('format=jsonl&quantity=10-100').splitlines()]
+        self.assertEqual([(row['item_name'], row['quantity'], row['price_without_VAT']) for row in rows],
+                         [('nut', 50, '1.50')])
+
+    def test_unknown_format_is_not_found(self):
+        self.assertEqual(self.client.get('/items/export/?format=xml').status_code, 404)
+
+
+class ReconcileStockTests(TestCase):
+    """Checks that the reconciliation finds the Item quantities drifted from the stock ledger and fixes them."""
+
+    def setUp(self):
+        self.items = [Item.objects.create(item_name=item_name, item_group=Item.ItemGroup.values[0],
+                                          unit_of_measurement=Item.ItemUnit.values[0], quantity=5,
+                                          price_without_VAT=1, status='available')
+                      for item_name in ['bolt', 'nut', 'washer']]
+        with transaction.atomic():
+            move_stock(self.items[0].item_id, -2, StockMovement.Kind.CORRECTION)
+        Item.objects.filter(pk=self.items[1].pk).update(quantity=7)
+
+    def reconcile(self, *args):
+        output = io.StringIO()
+        call_command('reconcile_stock', '--chunk-size', '2', *args, stdout=output)
+        return output.getvalue()
+
+    def test_drifted_items_are_reported(self):
+        output = self.reconcile()
+        self.assertIn(f"Item {self.items[1].item_id}: quantity 7, ledger balance 5", output)
+        self.assertIn("found 1 drifted items", output)
+        self.assertEqual(Item.objects.get(pk=self.items[1].pk).quantity, 7)
+
+    def test_drifted_items_are_fixed(self):
+        self.assertIn("fixed 1 drifted items", self.reconcile('--fix'))
+        self.assertEqual(list(Item.objects.order_by('item_id').values_list('quantity', flat=True)), [3, 5, 5])
+        self.assertIn("found 0 drifted items", self.reconcile())
+
+
+class HistogramTests(TestCase):
+    """Checks that the percentiles of the bucketed latencies stay within the relative error of a bucket."""
+
+    def test_percentiles_fall_into_the_observed_buckets(self):
+        histogram = Histogram(LATENCY_BOUNDS)
+        for value in [0.001] * 90 + [0.5] * 10:
+            histogram.observe(value)
+        self.assertAlmostEqual(histogram.percentile(50), 0.001, delta=0.001 * 0.25)
+        self.assertAlmostEqual(histogram.percentile(99), 0.5, delta=0.5 * 0.25)
+        self.assertIsNone(Histogram(LATENCY_BOUNDS).percentile(50))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class MetricsMiddlewareTests(TestCase):
+    """Checks that the requests are recorded under the URL names of their views, with their queries."""
+
+    def setUp(self):
+        install_query_recorder(None, connection)
+        metrics_registry.reset()
+        self.addCleanup(metrics_registry.reset)
+        self.client.force_login(User.objects.create_superuser('coordinator'))
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get('/items/')
+        self.client.get('/items/')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/orders/')
+        report = metrics_registry.get_report()
+        self.assertEqual(report['items']['requests'], 2)
+        self.assertEqual(report['orders']['requests'], 1)
+        self.assertAlmostEqual(report['orders']['queries']['mean'], len(queries))
+
+    def test_metrics_view(self):
+        self.client.get('/items/')
+        self.assertEqual(self.client.get('/metrics/').json()['items']['requests'], 1)
+        prometheus_text = self.client.get('/metrics/?format=prometheus').content.decode()
+        self.assertIn('warehouse_request_duration_seconds_count{view="items"} 1', prometheus_text)
+
+
+class GenerateDataTests(TestCase):
+    """Checks that the synthetic data is deterministic and its stock is consistent with the ledger and reservations."""
+
+    def generate_data(self):
+        call_command('generate_data', '--employees', '3', '--coordinators', '1', '--items', '20', '--orders', '100',
+                     '--linked-orders', '30', '--seed', '7', stdout=io.StringIO())
+
+    def get_rows(self):
+        """Returns the generated rows without the keys, which depend on the rows generated before."""
+
+        item_fields = ['item_group', 'unit_of_measurement', 'quantity', 'reserved_quantity', 'price_without_VAT',
+                       'status']
+        return (list(Item.objects.order_by('item_id').values_list(*item_fields)),
+                list(Order.objects.order_by('order_id').values_list('quantity', 'status', 'created_at')),
+                list(LinkedOrder.objects.order_by('linked_order_id').values_list(
+                    'position', 'quantity', 'status', 'created_at')))
+
+    def test_same_seed_generates_the_same_rows(self):
+        self.generate_data()
+        rows = self.get_rows()
+        Item.objects.all().delete()
+        self.generate_data()
+        self.assertEqual(self.get_rows(), rows)
+
+    def test_stock_matches_the_ledger_and_reservations(self):
+        self.generate_data()
+        balances = dict(StockMovement.objects.values('item_id').annotate(balance=Sum('quantity'))
+                        .values_list('item_id', 'balance'))
+        reserved_quantities = dict(StockReservation.objects.values('item_id').annotate(reserved=Sum('quantity'))
+                                   .values_list('item_id', 'reserved'))
+        for item_id, quantity, reserved_quantity in Item.objects.values_list('item_id', 'quantity',
+                                                                             'reserved_quantity'):
+            self.assertEqual(balances.get(item_id, 0), quantity)
+            self.assertEqual(reserved_quantities.get(item_id, 0), reserved_quantity)
+            self.assertLessEqual(reserved_quantity, quantity)
+        self.assertEqual(OrderRollup.objects.aggregate(total=Sum('order_count'))['total'], 100)
+
+
+class ForecastTests(TestCase):
+    """Checks the vectorized forecasts against their definitions and the weekly demand loaded from the orders."""
+
+    def test_exponential_smoothing(self):
+        demand = np.array([[4.0, 0.0, 2.0, 6.0], [1.0, 1.0, 1.0, 1.0]])
+        for row, forecast in zip(demand, forecast_exponential(demand, 0.3)):
+            level = row[0]
+            for value in row[1:]:
+                level = 0.3 * value + 0.7 * level
+            self.assertAlmostEqual(forecast, level)
+
+    def test_reorder_suggestions(self):
+        demand = np.array([[2.0, 2.0, 2.0], [0.0, 0.0, 0.0]])
+        _deviation, reorder_points, suggested_quantities = get_reorder_suggestions(
+            demand, np.array([3, 10]), demand.mean(axis=1), lead_time_weeks=2, review_weeks=1, safety_factor=1.65)
+        self.assertEqual(reorder_points.tolist(), [4, 0])
+        self.assertEqual(suggested_quantities.tolist(), [3, 0])
+
+    def test_weekly_demand_of_the_approved_orders(self):
+        employee = User.objects.create_user('employee')
+        items = [Item.objects.create(item_name=item_name, item_group=Item.ItemGroup.values[0],
+                                     unit_of_measurement=Item.ItemUnit.values[0], quantity=100, price_without_VAT=1,
+                                     status='available')
+                 for item_name in ['bolt', 'nut']]
+        history_start = get_history_start(3)
+        for week, quantity, status in [(0, 5, Order.Status.APPROVED), (2, 3, Order.Status.APPROVED),
+                                       (2, 4, Order.Status.APPROVED), (1, 9, Order.Status.REJECTED),
+                                       (3, 9, Order.Status.APPROVED)]:
+            created_at = timezone.make_aware(datetime.combine(history_start + timedelta(weeks=week, days=2), time()))
+            Order.objects.create(employee_name=employee, item_id=items[0], unit_of_measurement='U-1',
+                                 quantity=quantity, price_without_VAT=1, status=status, created_at=created_at)
+
+        item_ids, _available_quantities = load_items()
+        demand = load_weekly_demand(item_ids, history_start, 3)
+        self.assertEqual(demand.tolist(), [[5, 0, 7], [0, 0, 0]])
+        self.assertEqual(forecast_demand(history_weeks=3), 1)
+        self.assertEqual(list(ReorderSuggestion.objects.values_list('item_id', flat=True)), [items[0].item_id])
+
+
+class SubstringSearchTests(TestCase):
+    """Checks the ranking of the substring search, used on the databases without the trigram indexes."""
+
+    def setUp(self):
+        for item_name, storage_location in [('hex bolt', ''), ('Bolt', ''), ('bolt cutter', ''), ('nut', 'bolt shelf'),
+                                            ('washer', 'A-01')]:
+            Item.objects.create(item_name=item_name, item_group=Item.ItemGroup.values[0],
+                                unit_of_measurement=Item.ItemUnit.values[0], quantity=1, price_without_VAT=1,
+                                status='available', storage_location=storage_location)
+
+    def test_ranking(self):
+        results = get_substring_search_results('bolt')
+        self.assertEqual([item_object.item_name for item_object in results], ['Bolt', 'bolt cutter', 'hex bolt', 'nut'])
+
+    @skipUnless(connection.vendor != 'postgresql', "PostgreSQL uses the trigram search")
+    def test_search_items(self):
+        self.assertEqual([item_object.item_name for item_object in search_items(' BOLT ', limit=2)],
+                         ['Bolt', 'bolt cutter'])
+        self.assertFalse(search_items('  ').exists())
+
+
+class ThumbnailTests(TestCase):
+    """Renders the thumbnails in the test process, into a temporary media directory."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        photo = BytesIO()
+        Image.new('RGB', (800, 400), 'red').save(photo, 'PNG')
+        self.photo_name = default_storage.save('uploads/photo.png', ContentFile(photo.getvalue()))
+
+    def test_thumbnails_fit_their_sizes(self):
+        thumbnails = render_thumbnails(self.photo_name)
+        self.assertEqual(thumbnails['source'], self.photo_name)
+        for size_name, (width, height) in THUMBNAIL_SIZES.items():
+            for extension, file_name in thumbnails[size_name].items():
+                with default_storage.open(get_thumbnail_path(file_name)) as thumbnail_file:
+                    image = Image.open(thumbnail_file)
+                    self.assertEqual(image.size, (width, height // 2))
+                    self.assertEqual(image.format, THUMBNAIL_FORMATS[extension][0])
+
+    def test_thumbnails_of_the_same_content_are_reused(self):
+        thumbnails = render_thumbnails(self.photo_name)
+        with default_storage.open(self.photo_name) as photo:
+            copy_name = default_storage.save('uploads/copy.png', photo)
+        self.assertEqual({**render_thumbnails(copy_name), 'source': self.photo_name}, thumbnails)
+        self.assertEqual(len(default_storage.listdir(THUMBNAIL_DIRECTORY)[1]),
+                         len(THUMBNAIL_SIZES) * len(THUMBNAIL_FORMATS))
+
+    def test_thumbnails_of_a_replaced_photo_are_not_saved(self):
+        item_object = Item.objects.create(item_name='bolt', item_group=Item.ItemGroup.values[0],
+                                          unit_of_measurement=Item.ItemUnit.values[0], quantity=1,
+                                          price_without_VAT=1, status='available', photo=self.photo_name)
+        thumbnails = render_thumbnails(self.photo_name)
+        Item.objects.filter(pk=item_object.pk).update(photo='uploads/other.png')
+        self.assertFalse(save_thumbnails(item_object.pk, thumbnails))
+        Item.objects.filter(pk=item_object.pk).update(photo=self.photo_name)
+        self.assertTrue(save_thumbnails(item_object.pk, thumbnails))
+        item_object.refresh_from_db()
+        self.assertFalse(needs_thumbnails(item_object))
+
+
+class OrderReservationTests(TestCase):
+    """Checks that the new Orders reserve their stock, all of a batch or none of them."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('employee'))
+        self.items = [Item.objects.create(item_name=item_name, item_group=Item.ItemGroup.values[0],
+                                          unit_of_measurement=Item.ItemUnit.values[0], quantity=5,
+                                          price_without_VAT=1, status='available')
+                      for item_name in ['bolt', 'nut']]
+
+    def create_orders(self, quantities):
+        orders = [{'item_id': item_object.item_id, 'quantity': quantity, 'unit_of_measurement': 'U-1'}
+                  for item_object, quantity in quantities]
+        return self.client.post('/api/v1/orders/batch/', {'orders': orders}, content_type='application/json')
+
+    def get_reserved_quantities(self):
+        return list(Item.objects.order_by('item_id').values_list('reserved_quantity', flat=True))
+
+    def test_new_orders_reserve_their_stock(self):
+        response = self.create_orders([(self.items[0], 2), (self.items[0], 3), (self.items[1], 1)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_reserved_quantities(), [5, 1])
+        self.assertEqual(StockReservation.objects.count(), 3)
+
+        response = self.create_orders([(self.items[1], 1), (self.items[0], 1)])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.get_reserved_quantities(), [5, 1])
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_reserved_stock_is_not_approved_for_other_orders(self):
+        self.create_orders([(self.items[0], 4)])
+        order_object = Order.objects.create(employee_name=User.objects.get(), item_id=self.items[0],
+                                            unit_of_measurement='U-1', quantity=2, price_without_VAT=1)
+        with self.assertRaises(ValidationError), transaction.atomic():
+            update_status('apr', order_object, Order)
+
+        with transaction.atomic():
+            update_status('apr', Order.objects.earliest('order_id'), Order)
+        self.assertEqual(list(Item.objects.order_by('item_id').values_list('quantity', 'reserved_quantity')),
+                         [(1, 0), (5, 0)])
+
+
+@override_settings(ROOT_URLCONF='warehouse.asgi_urls',
+                   CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class AsyncViewTests(TestCase):
+    """Checks that the async views of the ASGI deployment render the same rows as the sync ones."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('coordinator')
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+        item_object = Item.objects.create(item_name='hex bolt', item_group=Item.ItemGroup.values[0],
+                                          unit_of_measurement=Item.ItemUnit.values[0], quantity=5,
+                                          price_without_VAT=1, status='available')
+        self.order = Order.objects.create(employee_name=self.user, item_id=item_object, unit_of_measurement='U-1',
+                                          quantity=2, price_without_VAT=1, comment='urgent order')
+        LinkedOrder.objects.create(order_number=1, position=1, item_id=item_object, unit_of_measurement='U-1',
+                                   quantity=3, price_without_VAT=1, comment='linked order')
+
+    async def test_pages_render_the_rows(self):
+        # the list templates render the values upper-cased
+        for url, text in [('/items/', 'HEX BOLT'), ('/items/quantity', 'HEX BOLT'),
+                          ('/items/search/hex bolt', 'HEX BOLT'), ('/orders/', 'URGENT ORDER'),
+                          (f'/orders/search/{self.order.order_id}', 'URGENT ORDER'),
+                          ('/linked_orders/', 'LINKED ORDER')]:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertContains(response, text)
+                self.assertEqual(response.status_code, (await sync_to_async(self.client.get)(url)).status_code)
+
+    async def test_permissions_are_checked(self):
+        await self.async_client.alogout()
+        response = await self.async_client.get('/orders/')
+        self.assertEqual(response.status_code, 302)
+        employee = await User.objects.acreate(username='employee')
+        await self.async_client.aforce_login(employee)
+        self.assertEqual((await self.async_client.get('/orders/')).status_code, 403)
@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+
+from .cache import bump_model_version
+from .models import Item
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIRECTORY = 'thumbnails'
+THUMBNAIL_SIZES = {
+    'small': (64, 64),
+    'medium': (320, 320),
+}
+# every size is saved as WebP and as JPEG for the browsers without WebP support
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+THUMBNAIL_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+
+def get_thumbnail_name(content_hash, size, extension):
+    width, height = size
+    return f'{content_hash}_{width}x{height}.{extension}'
+
+
+def get_thumbnail_path(file_name):
+    return f'{THUMBNAIL_DIRECTORY}/{file_name}'
+
+
+def render_thumbnails(photo_name):
+    """
+    Resizes the photo to all the thumbnail sizes and formats, runs in a worker process. The files are named after the
+    hash of the photo content, so a name never changes its content and the variants already saved are reused. Returns
+    the names of the variants of every size, with the name of the photo they were made of.
+    """
+
+    with default_storage.open(photo_name) as photo:
+        content = photo.read()
+    content_hash = hashlib.sha256(content).hexdigest()[:16]
+    image = ImageOps.exif_transpose(Image.open(BytesIO(content)))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    thumbnails = {'source': photo_name}
+    for size_name, size in THUMBNAIL_SIZES.items():
+        resized_image = None
+        thumbnails[size_name] = {}
+        for extension, (image_format, save_options) in THUMBNAIL_FORMATS.items():
+            file_name = get_thumbnail_name(content_hash, size, extension)
+            if not default_storage.exists(get_thumbnail_path(file_name)):
+                if resized_image is None:
+                    resized_image = image.copy()
+                    resized_image.thumbnail(size, Image.Resampling.LANCZOS)
+                output_image = resized_image.convert('RGB') if image_format == 'JPEG' else resized_image
+                output = BytesIO()
+                output_image.save(output, image_format, **save_options)
+                default_storage.save(get_thumbnail_path(file_name), ContentFile(output.getvalue()))
+            thumbnails[size_name][extension] = file_name
+    return thumbnails
+
+
+def needs_thumbnails(item):
+    return bool(item.photo) and item.photo_thumbnails.get('source') != item.photo.name
+
+
+def save_thumbnails(item_id, thumbnails):
+    """Stores the thumbnails on the Item, unless its photo was replaced in the meantime. Returns if they were saved."""
+
+    return bool(Item.objects.filter(pk=item_id, photo=thumbnails['source']).update(photo_thumbnails=thumbnails))
+
+
+def get_thumbnail_executor(max_workers):
+    # the workers are spawned rather than forked, the web server threads may hold locks and database connections
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=django.setup)
+
+
+class ThumbnailPipeline:
+    """
+    Renders the thumbnails of the uploaded photos in a pool of worker processes, started with the first upload, so
+    the requests saving the Items don't wait for the resizing. The rendered thumbnails are handed over through a queue
+    to a single thread of the pipeline, which saves them on the Items, as the callbacks of the executor run in its
+    management thread, which has to stay free to collect the results of the workers.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.results = queue.SimpleQueue()
+        self.saving_thread = None
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = get_thumbnail_executor(settings.THUMBNAIL_WORKERS)
+                self.saving_thread = threading.Thread(target=self.save_results, name='thumbnails', daemon=True)
+                self.saving_thread.start()
+            return self.executor
+
+    def schedule(self, item_id, photo_name):
+        future = self.get_executor().submit(render_thumbnails, photo_name)
+        future.add_done_callback(lambda future: self.results.put((item_id, photo_name, future)))
+
+    def save_results(self):
+        while True:
+            item_id, photo_name, future = self.results.get()
+            self.finish(item_id, photo_name, future)
+
+    @staticmethod
+    def finish(item_id, photo_name, future):
+        # runs in the saving thread, outside of any request
+        close_old_connections()
+        try:
+            if save_thumbnails(item_id, future.result()):
+                bump_model_version(Item)
+        except Exception:
+            logger.exception("Thumbnails of the photo %s of the Item %s failed", photo_name, item_id)
+        finally:
+            close_old_connections()
+
+
+thumbnail_pipeline = ThumbnailPipeline()
@@ -1,115 +1,132 @@
-import re
+from urllib.parse import urlencode
 
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import F, Q
+from django.http import QueryDict
 
-from .models import Order, LinkedOrder
-
-FILTER_STATUS = {
-    'a': Order.Status.APPROVED,
-    'r': Order.Status.REJECTED,
-    'n': Order.Status.NEW
-}
-
-
-def check_if_item_in_stock(item_quantity, requested_quantity):
-    return item_quantity - requested_quantity >= 0
+from .models import Item, Order, LinkedOrder, LinkedOrderNumber
 
 
 def get_next_order_number():
     """Returns the next available id to create a new Linked Order object"""
 
-    order_number_count = LinkedOrder.objects.values('order_number').distinct().count()
-    next_order_number = order_number_count + 1
-    return next_order_number
+    return LinkedOrderNumber.objects.create().order_number
 
 
+@transaction.atomic
 def get_next_position_in_linked_order(order_number):
     """Returns the next available order number to assign an order to a Linked Order object"""
 
-    identical_order_number_count = LinkedOrder.objects.filter(order_number=order_number).count()
-    next_position = identical_order_number_count + 1
+    # the update locks the counter row until the end of the transaction, so concurrent requests get different positions
+    LinkedOrderNumber.objects.filter(order_number=order_number).update(last_position=F('last_position') + 1)
+    next_position = LinkedOrderNumber.objects.values_list('last_position', flat=True).get(order_number=order_number)
     return next_position
 
 
 # FILTERING
-def get_min_max_values(filter_value):
-    if not filter_value:
-        return 'not'
-    values_str = ''.join(filter_value)
-    values_list = re.findall(r'\d+', values_str)  # finds numbers
-    values = [int(value) for value in values_list]
-    max_value = max(values)
-    min_value = min(values)
-    values = f'_{min_value}_{max_value}'
-    return values
+class RangeFilter:
+    """Filters a field by any of the selected ranges, passed as 'min-max' values of the query parameter."""
+
+    def __init__(self, field_name):
+        self.field_name = field_name
+
+    @staticmethod
+    def value_from_form_field(form_field_value):
+        # the form fields are named after the range, e.g. price_10_50
+        return form_field_value.replace('_', '-')
+
+    @staticmethod
+    def clean(value):
+        try:
+            min_value, max_value = (int(number) for number in value.split('-'))
+        except ValueError:
+            return None
+        if min_value > max_value:
+            return None
+        return f'{min_value}-{max_value}'
+
+    def get_q(self, values):
+        ranges = Q()
+        for value in values:
+            ranges |= Q(**{f'{self.field_name}__range': value.split('-')})
+        return ranges
+
+
+class ChoiceFilter:
+    """Filters a field by a set of the selected choices, passed as their stored values."""
+
+    def __init__(self, field_name, choices):
+        self.field_name = field_name
+        self.choices = choices
+
+    def value_from_form_field(self, form_field_value):
+        # the form fields are named after the choice, e.g. status_approved
+        choice = self.choices.__members__.get(form_field_value.upper())
+        return choice.value if choice else None
+
+    def clean(self, value):
+        return value if value in self.choices.values else None
+
+    def get_q(self, values):
+        if len(values) == len(self.choices.values):
+            # if all choices are on, there is no need to filter by them
+            return Q()
+        return Q(**{f'{self.field_name}__in': values})
+
+
+MODEL_FILTERS = {
+    Item: {
+        'price': RangeFilter('price_without_VAT'),
+        'quantity': RangeFilter('quantity'),
+    },
+    Order: {
+        'price': RangeFilter('price_without_VAT'),
+        'quantity': RangeFilter('quantity'),
+        'status': ChoiceFilter('status', Order.Status),
+    },
+    LinkedOrder: {
+        'price': RangeFilter('price_without_VAT'),
+        'quantity': RangeFilter('quantity'),
+        'status': ChoiceFilter('status', LinkedOrder.Status),
+    },
+}
 
 
-def get_status_values(filter_value):
-    if not filter_value:
-        return 'not'
-    values = [f'_{status[7]}' for status in filter_value]
-    values = ''.join(values)
-    return values
+def get_filter_query(model, form_data):
+    """Returns the query string of the filter built from the checked fields of the filter form."""
 
+    filters = MODEL_FILTERS[model]
+    query = QueryDict(mutable=True)
+    for form_field, value in form_data.items():
+        parameter, _, form_field_value = form_field.partition('_')
+        if value == 'on' and parameter in filters:
+            filter_value = filters[parameter].value_from_form_field(form_field_value)
+            if filter_value is not None:
+                query.appendlist(parameter, filter_value)
+    return get_filter_key(get_filter_values(model, query))
 
-def get_filter_values(filtering):
-    filter_values_str = filtering[2:-2]  # removes the square bracket and comma
-    filter_values = filter_values_str.split("', '")
 
-    price = [value for value in filter_values if 'price' in value]
-    price_values = get_min_max_values(price)
-    price_values = f'p{price_values}'
+def get_filter_values(model, query):
+    """Returns the valid filter values from the query parameters, deduplicated and sorted."""
 
-    quantity = [value for value in filter_values if 'quantity' in value]
-    quantity_values = get_min_max_values(quantity)
-    quantity_values = f'q{quantity_values}'
+    filter_values = {}
+    for parameter, model_filter in MODEL_FILTERS[model].items():
+        values = {model_filter.clean(value) for value in query.getlist(parameter)}
+        values.discard(None)
+        if values:
+            filter_values[parameter] = sorted(values)
+    return filter_values
 
-    status = [value for value in filter_values if 'status' in value]
-    status_values = get_status_values(status)
-    status_values = f's{status_values}'
 
-    filter_values = price_values + ',' + quantity_values + ',' + status_values
+def get_filter_key(filter_values):
+    """Returns the canonical query string of the filter values, identical for every equivalent filter."""
 
-    return filter_values
+    return urlencode(sorted(filter_values.items()), doseq=True)
 
 
 def get_filtered_obj(model, filter_values):
-    filter_values = filter_values.split(',')
-    price = filter_values[0]
-    quantity = filter_values[1]
-    status = filter_values[2]
-    min_price = 0
-    max_price = 9999999
-    min_quantity = 0
-    max_quantity = 9999999
-
-    if 'not' not in price:
-        min_price = int(price.split('_')[1])
-        max_price = int(price.split('_')[2])
-
-    if 'not' not in quantity:
-        min_quantity = int(quantity.split('_')[1])
-        max_quantity = int(quantity.split('_')[2])
-
-    objects = model.objects.filter(
-        price_without_VAT__lte=max_price,
-        price_without_VAT__gte=min_price,
-        quantity__lte=max_quantity,
-        quantity__gte=min_quantity
-    )
-
-    if 'not' not in status and len(quantity.split('_')) <= 3:
-        # if all statuses are on, there is no need to filter by status
-        match len(status.split('_')):
-            case 2:
-                filtered_objects = objects.filter(status=FILTER_STATUS[status.split('_')[1]])
-            case 3:
-                status_1 = FILTER_STATUS[status.split('_')[1]]
-                status_2 = FILTER_STATUS[status.split('_')[2]]
-                filtered__objects = objects.filter(Q(status=status_1) | Q(status=status_2))
-
-        return filtered_objects
-
-    filtered_objects = objects
-
-    return filtered_objects
+    filters = MODEL_FILTERS[model]
+    filter_q = Q()
+    for parameter, values in filter_values.items():
+        filter_q &= filters[parameter].get_q(values)
+    return model.objects.filter(filter_q)
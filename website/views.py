@@ -1,23 +1,42 @@
+import io
+import re
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.core.exceptions import ValidationError
-from django.core.paginator import Paginator
-from django.http import Http404
+from django.core.files.storage import default_storage
+from django.http import Http404, FileResponse, JsonResponse, StreamingHttpResponse
 from django.db import IntegrityError, transaction
 from django.shortcuts import render, redirect, get_object_or_404
-from django.utils.translation import gettext_lazy as _
+from django.urls import reverse
+from django.utils import timezone
 from django.views import View
 from django.views.generic.base import TemplateView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.views.generic.list import ListView
 
-from .forms import (NewUserForm, ItemForm, SearchItemForm, FilterItemForm, OrderStatusForm, OrderForm,
-                    OrderForLinkedOrderForm, LinkedOrderStatusForm, SearchOrderForm, FilterOrderForm)
-from .models import Item, Order, LinkedOrder
-from .utils import (check_if_item_in_stock, get_next_order_number, get_next_position_in_linked_order,
-                    get_filter_values, get_filtered_obj)
+from .autocomplete import item_prefix_index
+from .cache import get_page_cache_key, get_cached_page, aget_page_cache_key, aget_cached_page
+from .exports import EXPORT_FORMATS, iter_export
+from .forms import (BULK_STATUS_LIMIT, NewUserForm, ItemForm, ItemImportFileForm, SearchItemForm,
+                    FilterItemForm, OrderStatusForm, OrderForm, OrderForLinkedOrderForm, LinkedOrderStatusForm,
+                    SearchOrderForm, FilterOrderForm, BulkOrderStatusForm, ReportForm)
+from .imports import import_items
+from .models import (Item, Order, LinkedOrder, StockMovement, StockReservation, OrderRollup, LinkedOrderRollup,
+                     LowStockAlert, ReorderSuggestion)
+from .pagination import CursorPaginator
+from .rollups import ROLLUP_MODELS, apply_rollup_changes, get_report
+from .search import search_items
+from .thumbnails import THUMBNAIL_FORMATS, THUMBNAIL_CACHE_CONTROL, get_thumbnail_path
+from .stock import (move_stock, reserve_stock, release_order_reservation, set_order_status, revoke_order_approval,
+                     update_order_statuses, update_linked_order_status)
+from .utils import (get_next_order_number, get_next_position_in_linked_order, get_filter_query, get_filter_values,
+                    get_filter_key, get_filtered_obj)
 
 
 class HomePageView(TemplateView):
@@ -88,6 +107,19 @@ class LogoutView(View):
         return redirect("home")
 
 
+class AsyncPermissionRequiredMixin(PermissionRequiredMixin):
+    """
+    Counterpart of the LoginRequiredMixin and PermissionRequiredMixin for the async views, which loads the user and
+    checks the permissions without blocking the event loop. The views using it have to define only async handlers.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated or not await sync_to_async(self.has_permission)():
+            return self.handle_no_permission()
+        return await super(PermissionRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+
 class ItemsView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     """View class displaying all Items, paginated by 20 per page."""
 
@@ -99,15 +131,18 @@ class ItemsView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     item_form_class = ItemForm
     filter_class = FilterItemForm
     order_by = 'item_name'
+    cache_models = [Item]
 
     def get_page_obj(self, request, **ordering):
         items_list = self.model.objects.all()
         if ordering:
+            if ordering['ordering'] not in self.model.ordering_fields:
+                raise Http404
             self.order_by = ordering['ordering']
-        ordered_items_list = items_list.order_by(self.order_by)
-        paginator = Paginator(ordered_items_list, self.paginate_by)
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = CursorPaginator(items_list, self.paginate_by, self.order_by, with_count='count' in request.GET)
+        cursor = request.GET.get("cursor")
+        cache_key = get_page_cache_key('items', self.cache_models, self.order_by, cursor, paginator.with_count)
+        page_obj = get_cached_page(cache_key, lambda: paginator.get_page(cursor))
         return page_obj
 
     def get(self, request, **ordering):
@@ -126,19 +161,19 @@ class ItemsView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
             creates a new Item object.
         """
         data = request.POST
-        add_item_form = self.item_form_class(data)
+        add_item_form = self.item_form_class(data, request.FILES)
         search_form = self.form_class(data)
         filter_form = FilterItemForm
 
         if 'searched_item_name' in data and search_form.is_valid():
             cleaned_data = search_form.cleaned_data
-            item_name = cleaned_data['searched_item_name']
-            return redirect('item_by_name', item_name)
+            search_query = urlencode({'q': cleaned_data['searched_item_name']})
+            return redirect(f"{reverse('items_search')}?{search_query}")
 
         if 'filter' in data and filter_form.is_valid and len(
                 data) > 2:  # if there are only 2 params, no filter is applied
-            filter_values = [parameter for parameter, value in data.items() if value == 'on']
-            return redirect('items_filtered', filter_values)
+            filter_query = get_filter_query(self.model, data)
+            return redirect(f"{reverse('items_filtered')}?{filter_query}")
 
         if 'item_name' in data and add_item_form.is_valid():
             add_item_form.save()
@@ -161,6 +196,64 @@ class ItemsView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
             return render(request, self.template_name, context)
 
 
+class AsyncItemsView(AsyncPermissionRequiredMixin, ItemsView):
+    """Async version of the ItemsView served by the ASGI deployment, the forms are still handled synchronously."""
+
+    async def aget_page_obj(self, request, **ordering):
+        items_list = self.model.objects.all()
+        if ordering:
+            if ordering['ordering'] not in self.model.ordering_fields:
+                raise Http404
+            self.order_by = ordering['ordering']
+        paginator = CursorPaginator(items_list, self.paginate_by, self.order_by, with_count='count' in request.GET)
+        cursor = request.GET.get("cursor")
+        cache_key = await aget_page_cache_key('items', self.cache_models, self.order_by, cursor, paginator.with_count)
+        page_obj = await aget_cached_page(cache_key, lambda: paginator.aget_page(cursor))
+        return page_obj
+
+    async def get(self, request, **ordering):
+        page_obj = await self.aget_page_obj(request, **ordering)
+        context = {
+            'page_obj': page_obj,
+            'create_item_form': self.item_form_class,
+            'search_form': self.form_class,
+            'filter_form': self.filter_class}
+
+        return render(request, self.template_name, context)
+
+    async def post(self, request, **parameters):
+        return await sync_to_async(super().post)(request, **parameters)
+
+
+class ItemImportView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """View class allowing coordinators to add and replenish Items in bulk from a CSV file."""
+
+    permission_required = ['website.add_item', 'website.change_item']
+    template_name = 'website/item_import.html'
+    form_class = ItemImportFileForm
+
+    def get(self, request):
+        context = {'form': self.form_class}
+        return render(request, self.template_name, context)
+
+    def post(self, request):
+        form = self.form_class(request.POST, request.FILES)
+        if not form.is_valid():
+            messages.error(request, "The file was not imported")
+            context = {'form': form}
+            return render(request, self.template_name, context)
+
+        lines = io.TextIOWrapper(form.cleaned_data['file'], encoding='utf-8-sig', newline='')
+        result = import_items(lines)
+        if result.errors:
+            messages.error(request, "Some of the rows were not imported")
+        else:
+            messages.success(request, "Items imported successfully")
+        context = {'form': self.form_class,
+                   'result': result}
+        return render(request, self.template_name, context)
+
+
 class ItemUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     """View class allowing coordinators update the Item quantity and information."""
 
@@ -168,9 +261,28 @@ class ItemUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     model = Item
     success_url = '/items'
     fields = ['item_name', 'item_group', 'unit_of_measurement', 'quantity', 'price_without_VAT', 'status',
-              'storage_location', 'contact_person', 'photo']
+              'storage_location', 'contact_person', 'reorder_threshold', 'photo']
     template_name_suffix = '_update_form'
 
+    def form_valid(self, form):
+        """Saves the Item information, while the change of the quantity is applied as a movement in the stock ledger."""
+
+        try:
+            with transaction.atomic():
+                current_quantity, reserved_quantity = self.model.objects.select_for_update().values_list(
+                    'quantity', 'reserved_quantity').get(pk=self.object.pk)
+                difference = form.cleaned_data['quantity'] - current_quantity
+                form.instance.quantity = current_quantity
+                form.instance.reserved_quantity = reserved_quantity
+                response = super().form_valid(form)
+                if difference:
+                    kind = StockMovement.Kind.REPLENISHMENT if difference > 0 else StockMovement.Kind.CORRECTION
+                    move_stock(self.object.item_id, difference, kind, user=self.request.user)
+        except ValidationError:
+            form.add_error('quantity', "The quantity can't be lower than the quantity reserved for orders")
+            return self.form_invalid(form)
+        return response
+
 
 class ItemDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     """View class allowing coordinators to delete a specified Item."""
@@ -181,6 +293,37 @@ class ItemDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     template_name_suffix = '_confirm_delete'
 
 
+class ItemAutocompleteView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """View class returning the Items whose name starts with the typed prefix as JSON, served from memory."""
+
+    permission_required = 'website.view_item'
+
+    def get(self, request):
+        prefix = request.GET.get('q', '')
+        return JsonResponse({'results': item_prefix_index.lookup(prefix)})
+
+
+class ItemThumbnailView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    View class serving the thumbnails of the Item photos. Their names are derived from the photo content, so the
+    browsers may keep them for good.
+    """
+
+    permission_required = 'website.view_item'
+    file_name_pattern = re.compile(rf'[0-9a-f]{{16}}_[0-9]+x[0-9]+\.({"|".join(THUMBNAIL_FORMATS)})')
+
+    def get(self, request, file_name):
+        if not self.file_name_pattern.fullmatch(file_name):
+            raise Http404
+        try:
+            thumbnail = default_storage.open(get_thumbnail_path(file_name))
+        except FileNotFoundError:
+            raise Http404
+        response = FileResponse(thumbnail)
+        response['Cache-Control'] = THUMBNAIL_CACHE_CONTROL
+        return response
+
+
 class SingleItemView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     """View class displaying only one Item."""
 
@@ -199,6 +342,48 @@ class SingleItemView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
             return redirect('items')
 
 
+class AsyncSingleItemView(AsyncPermissionRequiredMixin, SingleItemView):
+    """Async version of the SingleItemView served by the ASGI deployment."""
+
+    async def get(self, request, **item_name):
+        item_object = await self.model.objects.filter(item_name=item_name['item_name']).afirst()
+        if item_object is None:
+            messages.error(request, "There is no such item")
+            return redirect('items')
+        context = {'item_object': item_object}
+        return render(request, self.template_name, context)
+
+
+class SearchItemView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+    """View class displaying the Items best matching the searched phrase, ranked by relevance."""
+
+    permission_required = 'website.view_item'
+    template_name = 'website/item_search.html'
+    model = Item
+    form_class = SearchItemForm
+
+    def get(self, request):
+        search_query = request.GET.get('q', '')
+        items_list = search_items(search_query)
+        context = {'items_list': items_list,
+                   'search_query': search_query,
+                   'search_form': self.form_class}
+        return render(request, self.template_name, context)
+
+    def post(self, request):
+        data = request.POST
+        search_form = self.form_class(data)
+
+        if search_form.is_valid():
+            cleaned_data = search_form.cleaned_data
+            search_query = urlencode({'q': cleaned_data['searched_item_name']})
+            return redirect(f"{reverse('items_search')}?{search_query}")
+
+        else:
+            messages.error(request, "Something went wrong")
+            return redirect('items')
+
+
 class FilterItemView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     """View class which returns Items filtered by values specified by the user."""
 
@@ -208,19 +393,23 @@ class FilterItemView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     model = Item
     form_class = SearchItemForm
     order_by = 'item_id'
+    cache_models = [Item]
 
     def get_page_obj(self, request, filter_values):
         filtered_objects = get_filtered_obj(self.model, filter_values)
-        ordered_object_list = filtered_objects.order_by(self.order_by)
-        paginator = Paginator(ordered_object_list, self.paginate_by)
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = CursorPaginator(filtered_objects, self.paginate_by, self.order_by,
+                                    with_count='count' in request.GET)
+        cursor = request.GET.get("cursor")
+        cache_key = get_page_cache_key('items_filtered', self.cache_models, get_filter_key(filter_values), cursor,
+                                       paginator.with_count)
+        page_obj = get_cached_page(cache_key, lambda: paginator.get_page(cursor))
         return page_obj
 
-    def get(self, request, filtering):
-        filter_values = get_filter_values(filtering)
+    def get(self, request):
+        filter_values = get_filter_values(self.model, request.GET)
         page_obj = self.get_page_obj(request, filter_values)
         context = {'page_obj': page_obj,
+                   'filter_key': get_filter_key(filter_values),
                    'search_form': self.form_class}
         return render(request, self.template_name, context)
 
@@ -230,14 +419,30 @@ class FilterItemView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
 
         if search_form.is_valid():
             cleaned_data = search_form.cleaned_data
-            item_name = cleaned_data['searched_item_name']
-            return redirect('item_by_name', item_name)
+            search_query = urlencode({'q': cleaned_data['searched_item_name']})
+            return redirect(f"{reverse('items_search')}?{search_query}")
 
         else:
             messages.error(request, "Something went wrong")
             return redirect('items')
 
 
+def apply_bulk_order_status(request, order_ids, status):
+    """
+    Approves or rejects the Orders in a single transaction and reports the outcome of the bulk change as messages.
+    Returns the result of every Order, its error or None.
+    """
+
+    with transaction.atomic():
+        errors = update_order_statuses(order_ids, status, request.user)
+    changed_count = len(order_ids) - len(errors)
+    if changed_count:
+        messages.success(request, f"{changed_count} orders {Order.Status(status).label.lower()}")
+    if errors:
+        messages.error(request, f"{len(errors)} orders were not changed")
+    return [(order_id, errors.get(order_id)) for order_id in order_ids]
+
+
 class OrderView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     """View class displaying all Orders, paginated by 20 per page."""
 
@@ -247,29 +452,51 @@ class OrderView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     model = Order
     form_class = SearchOrderForm
     order_by = 'item_id'
+    cache_models = [Order, Item]
+    # the columns rendered in the list, the related Item and User rows are fetched in the same query
+    list_fields = ['order_id', 'employee_name__username', 'item_id__item_name', 'unit_of_measurement', 'quantity',
+                   'price_without_VAT', 'comment', 'status']
 
     def get_page_obj(self, request, **ordering):
-        order_list = self.model.objects.all()
+        order_list = self.model.objects.select_related('employee_name', 'item_id').only(*self.list_fields)
         if ordering:
+            if ordering['ordering'] not in self.model.ordering_fields:
+                raise Http404
             self.order_by = ordering['ordering']
-        ordered_order_list = order_list.order_by(self.order_by)
-        paginator = Paginator(ordered_order_list, self.paginate_by)
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        paginator = CursorPaginator(order_list, self.paginate_by, self.order_by, with_count='count' in request.GET)
+        cursor = request.GET.get("cursor")
+        cache_key = get_page_cache_key('orders', self.cache_models, self.order_by, cursor, paginator.with_count)
+        page_obj = get_cached_page(cache_key, lambda: paginator.get_page(cursor))
         return page_obj
 
+    def get_context(self, page_obj, **context):
+        """Returns the context of the list, shared by the sync and the async view, with the given additions."""
+
+        return {'page_obj': page_obj,
+                'search_form': self.form_class,
+                'filter_form': FilterOrderForm,
+                'bulk_status_form': BulkOrderStatusForm,
+                **context}
+
     def get(self, request, **ordering):
         page_obj = self.get_page_obj(request, **ordering)
-        context = {'page_obj': page_obj,
-                   'search_form': self.form_class,
-                   'filter_form': FilterOrderForm}
-        return render(request, self.template_name, context)
+        return render(request, self.template_name, self.get_context(page_obj))
 
     def post(self, request, **parameters):
-        """ Depending on the form name in the POST data, it redirects to a searched Order or returns filtered Orders."""
+        """
+            Depending on the form name in the POST data, it redirects to a searched Order, returns filtered Orders, or
+            approves or rejects the selected Orders.
+        """
         data = request.POST
         search_form = SearchOrderForm(data)
         filter_form = FilterOrderForm(data)
+        bulk_status_form = BulkOrderStatusForm(data)
+
+        if 'bulk_status' in data and bulk_status_form.is_valid() and bulk_status_form.cleaned_data['order_ids']:
+            cleaned_data = bulk_status_form.cleaned_data
+            bulk_results = apply_bulk_order_status(request, cleaned_data['order_ids'], cleaned_data['status'])
+            page_obj = self.get_page_obj(request, **parameters)
+            return render(request, self.template_name, self.get_context(page_obj, bulk_results=bulk_results))
 
         if 'search' in data and search_form.is_valid():
             cleaned_data = search_form.cleaned_data
@@ -278,17 +505,14 @@ class OrderView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
 
         if 'filter' in data and filter_form.is_valid and len(data) > 2:
             # if there are only 2 params, no filter is applied
-            filter_values = [parameter for parameter, value in data.items() if value == 'on']
-            return redirect('orders_filtered', filter_values)
+            filter_query = get_filter_query(self.model, data)
+            return redirect(f"{reverse('orders_filtered')}?{filter_query}")
 
         else:
             messages.error(request, "Invalid input. Please make sure your search or filter criteria are correct "
                                     "and try again")
             page_obj = self.get_page_obj(request, **parameters)
-            context = {
-                'page_obj': page_obj,
-                'search_form': self.form_class}
-            return render(request, self.template_name, context)
+            return render(request, self.template_name, self.get_context(page_obj))
 
 
 class SingleOrderView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
@@ -309,6 +533,42 @@ class SingleOrderView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
             return redirect('orders')
 
 
+class AsyncOrderView(AsyncPermissionRequiredMixin, OrderView):
+    """Async version of the OrderView served by the ASGI deployment, the forms are still handled synchronously."""
+
+    async def aget_page_obj(self, request, **ordering):
+        order_list = self.model.objects.select_related('employee_name', 'item_id').only(*self.list_fields)
+        if ordering:
+            if ordering['ordering'] not in self.model.ordering_fields:
+                raise Http404
+            self.order_by = ordering['ordering']
+        paginator = CursorPaginator(order_list, self.paginate_by, self.order_by, with_count='count' in request.GET)
+        cursor = request.GET.get("cursor")
+        cache_key = await aget_page_cache_key('orders', self.cache_models, self.order_by, cursor, paginator.with_count)
+        page_obj = await aget_cached_page(cache_key, lambda: paginator.aget_page(cursor))
+        return page_obj
+
+    async def get(self, request, **ordering):
+        page_obj = await self.aget_page_obj(request, **ordering)
+        return render(request, self.template_name, self.get_context(page_obj))
+
+    async def post(self, request, **parameters):
+        return await sync_to_async(super().post)(request, **parameters)
+
+
+class AsyncSingleOrderView(AsyncPermissionRequiredMixin, SingleOrderView):
+    """Async version of the SingleOrderView served by the ASGI deployment."""
+
+    async def get(self, request, **order_id):
+        order_object = await self.model.objects.select_related('employee_name', 'item_id').filter(
+            order_id=order_id['order_id']).afirst()
+        if order_object is None:
+            messages.error(request, "There is no such order")
+            return redirect('orders')
+        context = {'order_object': order_object}
+        return render(request, self.template_name, context)
+
+
 class FilterOrderView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     """View class which returns Orders filtered by values specified by the user."""
 
@@ -318,25 +578,71 @@ class FilterOrderView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     model = Order
     form_class = SearchOrderForm
     order_by = 'item_id'
+    cache_models = [Order, Item]
+    # the columns rendered in the list, the related Item and User rows are fetched in the same query
+    list_fields = ['order_id', 'employee_name__username', 'item_id__item_name', 'unit_of_measurement', 'quantity',
+                   'price_without_VAT', 'comment', 'status']
 
     def get_page_obj(self, request, filter_values):
-        filtered_objects = get_filtered_obj(self.model, filter_values)
-        ordered_object_list = filtered_objects.order_by(self.order_by)
-        paginator = Paginator(ordered_object_list, self.paginate_by)
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        filtered_objects = get_filtered_obj(self.model, filter_values).select_related('employee_name', 'item_id')
+        filtered_objects = filtered_objects.only(*self.list_fields)
+        paginator = CursorPaginator(filtered_objects, self.paginate_by, self.order_by,
+                                    with_count='count' in request.GET)
+        cursor = request.GET.get("cursor")
+        cache_key = get_page_cache_key('orders_filtered', self.cache_models, get_filter_key(filter_values), cursor,
+                                       paginator.with_count)
+        page_obj = get_cached_page(cache_key, lambda: paginator.get_page(cursor))
         return page_obj
 
-    def get(self, request, filtering):
-        filter_values = get_filter_values(filtering)
+    def get(self, request):
+        filter_values = get_filter_values(self.model, request.GET)
         page_obj = self.get_page_obj(request, filter_values)
         context = {'page_obj': page_obj,
-                   'search_form': self.form_class}
+                   'filter_key': get_filter_key(filter_values),
+                   'search_form': self.form_class,
+                   'bulk_status_form': BulkOrderStatusForm}
         return render(request, self.template_name, context)
 
     def post(self, request):
+        """
+            Redirects to a searched Order, or approves or rejects the selected Orders or all the Orders matching the
+            filter, at most BULK_STATUS_LIMIT of them at a time.
+        """
         data = request.POST
         search_form = self.form_class(data)
+        bulk_status_form = BulkOrderStatusForm(data)
+
+        if 'bulk_status' in data:
+            if not bulk_status_form.is_valid():
+                messages.error(request, bulk_status_form.non_field_errors().as_text() or "Something went wrong")
+                return redirect(f"{reverse('orders_filtered')}?{request.GET.urlencode()}")
+
+            cleaned_data = bulk_status_form.cleaned_data
+            filter_values = get_filter_values(self.model, request.GET)
+            order_ids = cleaned_data['order_ids']
+            next_bulk_status_form = BulkOrderStatusForm
+            if cleaned_data['all_filtered']:
+                # the Orders which already have the status are skipped, and the next submit continues after the last
+                # processed Order, so the Orders which failed to change don't block the rest
+                filtered_objects = get_filtered_obj(self.model, filter_values).exclude(status=cleaned_data['status'])
+                if cleaned_data['after_order_id'] is not None:
+                    filtered_objects = filtered_objects.filter(order_id__gt=cleaned_data['after_order_id'])
+                order_ids = list(filtered_objects.order_by('order_id').values_list(
+                    'order_id', flat=True)[:BULK_STATUS_LIMIT + 1])
+                if len(order_ids) > BULK_STATUS_LIMIT:
+                    order_ids = order_ids[:BULK_STATUS_LIMIT]
+                    messages.info(request, f"Only the first {BULK_STATUS_LIMIT} orders matching the filter were "
+                                           f"processed, please submit again for the rest")
+                    next_bulk_status_form = BulkOrderStatusForm(initial={
+                        'status': cleaned_data['status'], 'all_filtered': True, 'after_order_id': order_ids[-1]})
+            bulk_results = apply_bulk_order_status(request, order_ids, cleaned_data['status'])
+            page_obj = self.get_page_obj(request, filter_values)
+            context = {'page_obj': page_obj,
+                       'filter_key': get_filter_key(filter_values),
+                       'search_form': self.form_class,
+                       'bulk_status_form': next_bulk_status_form,
+                       'bulk_results': bulk_results}
+            return render(request, self.template_name, context)
 
         if search_form.is_valid():
             cleaned_data = search_form.cleaned_data
@@ -373,24 +679,28 @@ class OrderCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
             with transaction.atomic():
                 new_linked_order_object = LinkedOrder(
                     order_number=order_number,
-                    position=1,
+                    position=get_next_position_in_linked_order(order_number),
                     item_id=getattr(order_object, 'item_id'),
                     unit_of_measurement=getattr(order_object, 'unit_of_measurement'),
                     quantity=getattr(order_object, 'quantity'),
                     price_without_VAT=getattr(order_object, 'price_without_VAT'),
                     comment=getattr(order_object, 'comment'),
-                    status=getattr(order_object, 'status')
+                    status=getattr(order_object, 'status'),
+                    created_at=getattr(order_object, 'created_at')
                 )
                 new_linked_order_object.save()
+                StockReservation.objects.filter(order_id=order_object).update(
+                    order_id=None, linked_order_id=new_linked_order_object)
                 order_object.delete()
         except IntegrityError:
             messages.error(request, "Error connecting the orders")
             return IntegrityError
 
     @staticmethod
+    @transaction.atomic
     def add_to_linked_order(order_number, new_order_data):
         next_position = get_next_position_in_linked_order(order_number)
-        LinkedOrder.objects.create(
+        linked_order_object = LinkedOrder.objects.create(
             order_number=order_number,
             position=next_position,
             item_id=new_order_data['item_id'],
@@ -400,12 +710,22 @@ class OrderCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
             comment=new_order_data['comment'],
             status=new_order_data['status']
         )
+        reserve_stock(new_order_data['item_id'].item_id, new_order_data['quantity'], linked_order_object)
+
+    def render_form_with_error(self, request, item_id, message):
+        messages.error(request, message)
+        context = {
+            'item_id': item_id,
+            'linked_order_form': OrderForLinkedOrderForm,
+            'form': self.form_class}
+        return render(request, self.template_name, context)
 
     def post(self, request, *args, **kwargs):
         """
         Depending on the user's choice, either creates a new linked order object and assigns the selected order to it,
         or assigns it to a selected, previously created linked order object. Note that during this process the Order
-        object is deleted and recreated as a Linked Order object.
+        object is deleted and recreated as a Linked Order object, and its stock reservation is moved along. The ordered
+        quantity is reserved, so the order can't be created if there is not enough items available.
          """
 
         data = request.POST
@@ -423,82 +743,81 @@ class OrderCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
                 'status': self.model.Status.NEW,
             }
             if 'add_to_order' in data:  # checks if the user wanted to add a new order or add it to linked orders
-                next_order_number = get_next_order_number()
-
                 if not data['linked_order']:  # implies that there is no linked order object yet, it should be created
                     selected_order_id = int(data['order'])
-                    order_number = next_order_number
+                    order_number = get_next_order_number()
                     try:
-                        self.create_new_linked_order(request, selected_order_id, order_number)
-                        self.add_to_linked_order(order_number, new_order_data)
+                        with transaction.atomic():
+                            self.create_new_linked_order(request, selected_order_id, order_number)
+                            self.add_to_linked_order(order_number, new_order_data)
                         messages.success(request, "Order updated")
                         return redirect(self.success_url)
                     except IntegrityError:
                         messages.error(request, "Error combining the orders, contact the administrator")
+                    except ValidationError as error:
+                        return self.render_form_with_error(request, item_id, error.message)
 
                 if not data['order']:  # implies that there is a linked order object to be connected to
                     selected_linked_order_id = int(data['linked_order'])
                     order_number = getattr(LinkedOrder.objects.get(linked_order_id=selected_linked_order_id),
                                            'order_number')
-                    self.add_to_linked_order(order_number, new_order_data)
+                    try:
+                        self.add_to_linked_order(order_number, new_order_data)
+                    except ValidationError as error:
+                        return self.render_form_with_error(request, item_id, error.message)
                     messages.success(request, "Order updated")
                     return redirect(self.success_url)
                 else:
-                    messages.error(request, "You didn't chose a request to add to.")
-                    context = {
-                        'item_id': item_id,
-                        'linked_order_form': OrderForLinkedOrderForm,
-                        'form': self.form_class}
-                    return render(request, self.template_name, context)
+                    return self.render_form_with_error(request, item_id, "You didn't chose a request to add to.")
 
             if 'add_to_order' not in data:
-
-                self.model.objects.create(
-                    item_id=new_order_data['item_id'],
-                    employee_name=new_order_data['employee_name'],
-                    unit_of_measurement=new_order_data['unit_of_measurement'],
-                    quantity=new_order_data['quantity'],
-                    price_without_VAT=new_order_data['price_without_vat'],
-                    comment=new_order_data['comment'],
-                    status=new_order_data['status']
-                )
+                try:
+                    with transaction.atomic():
+                        order_object = self.model.objects.create(
+                            item_id=new_order_data['item_id'],
+                            employee_name=new_order_data['employee_name'],
+                            unit_of_measurement=new_order_data['unit_of_measurement'],
+                            quantity=new_order_data['quantity'],
+                            price_without_VAT=new_order_data['price_without_vat'],
+                            comment=new_order_data['comment'],
+                            status=new_order_data['status']
+                        )
+                        reserve_stock(item_id, quantity, order_object)
+                except ValidationError as error:
+                    return self.render_form_with_error(request, item_id, error.message)
                 return redirect(self.success_url)
 
             else:
-                messages.error(request, "Failed to create order. Please check your input and try again.")
-                context = {
-                    'item_id': item_id,
-                    'linked_order_form': OrderForLinkedOrderForm,
-                    'form': self.form_class}
-                return render(request, self.template_name, context)
+                return self.render_form_with_error(
+                    request, item_id, "Failed to create order. Please check your input and try again.")
 
 
-def update_status(status, order_object, order_model):
+def update_status(status, order_object, order_model, user=None):
     """
     A function which allows the change of the Order/Linked Orders status. The possible statuses are: New, Accepted,
-    Rejected. After accepting an order, the quantity of the ordered item/s is subtracted from the overall quantity.
+    Rejected. After accepting an order, the quantity of the ordered item/s is subtracted from the overall quantity, and
+    it is returned to the stock if an accepted order is rejected or renewed. The stock reserved for the order is
+    released once it is approved or rejected. All changes are conditional updates recorded in the stock ledger, so they
+    have to be run inside a transaction.
     """
 
+    rollup_changes = {}
     match status:
         case 'apr':
-            item_object = order_object.item_id
-            item_object_previous_quantity = getattr(item_object, 'quantity')
-            order_object_item_quantity = getattr(order_object, 'quantity')
-            if check_if_item_in_stock(item_object_previous_quantity, order_object_item_quantity):
-                order_object.status = order_model.Status.APPROVED
-                order_object.save(update_fields=['status'])
-                current_item_object_quantity = item_object_previous_quantity - order_object_item_quantity
-                item_object.quantity = current_item_object_quantity
-                item_object.save(update_fields=['quantity'])
+            if rollup_changes := set_order_status(order_object, order_model, order_model.Status.APPROVED):
+                release_order_reservation(order_object)
+                move_stock(order_object.item_id_id, -order_object.quantity, StockMovement.Kind.APPROVAL,
+                           order_object, user)
+        case 'rej' | 'new':
+            if status == 'rej':
+                release_order_reservation(order_object)
+            if rollup_changes := revoke_order_approval(order_object, order_model, status):
+                move_stock(order_object.item_id_id, order_object.quantity, StockMovement.Kind.REVERSAL,
+                           order_object, user)
             else:
-                raise ValidationError(_("Not enough item to complete this order"))
-        case 'rej':
-            order_object.status = order_model.Status.REJECTED
-            order_object.save(update_fields=['status'])
-
-        case 'new':
-            order_object.status = order_model.Status.NEW
-            order_object.save(update_fields=['status'])
+                rollup_changes = set_order_status(order_object, order_model, status)
+    # the rollup rows are shared by all the orders of their keys, so they are updated after the stock
+    apply_rollup_changes(ROLLUP_MODELS[order_model], rollup_changes)
 
 
 class OrderUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
@@ -530,7 +849,7 @@ class OrderUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
 
         try:
             with transaction.atomic():
-                update_status(status, order_object, self.model)
+                update_status(status, order_object, self.model, request.user)
 
                 return redirect(self.success_url)
 
@@ -553,6 +872,33 @@ class LinkedOrderView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     template_name = 'website/linked_order.html'
     paginate_by = 20
     model = LinkedOrder
+    order_by = 'order_number'
+    list_fields = ['order_number', 'position', 'item_id__item_name', 'unit_of_measurement', 'quantity',
+                   'price_without_VAT', 'comment', 'status']
+
+    def get_page_obj(self, request):
+        linked_order_list = self.model.objects.select_related('item_id').only(*self.list_fields)
+        paginator = CursorPaginator(linked_order_list, self.paginate_by, self.order_by,
+                                    with_count='count' in request.GET)
+        page_obj = paginator.get_page(request.GET.get("cursor"))
+        return page_obj
+
+    def get(self, request):
+        page_obj = self.get_page_obj(request)
+        context = {'page_obj': page_obj}
+        return render(request, self.template_name, context)
+
+
+class AsyncLinkedOrderView(AsyncPermissionRequiredMixin, LinkedOrderView):
+    """Async version of the LinkedOrderView served by the ASGI deployment."""
+
+    async def get(self, request):
+        linked_order_list = self.model.objects.select_related('item_id').only(*self.list_fields)
+        paginator = CursorPaginator(linked_order_list, self.paginate_by, self.order_by,
+                                    with_count='count' in request.GET)
+        page_obj = await paginator.aget_page(request.GET.get("cursor"))
+        context = {'page_obj': page_obj}
+        return render(request, self.template_name, context)
 
 
 class LinkedOrderUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
@@ -583,15 +929,10 @@ class LinkedOrderUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateV
         status = data['status']
         comment = data['comment']
         order_number = int(data['order_number'])
-        orders_in_linked_order_count = self.model.objects.filter(order_number=order_number).count()
         try:
             with transaction.atomic():
 
-                for number in range(1, orders_in_linked_order_count + 1):
-                    linked_order_object = self.model.objects.get(order_number=order_number, position=number)
-                    update_status(status, linked_order_object, self.model)
-                    linked_order_object.comment = comment
-                    linked_order_object.save(update_fields=['comment'])
+                update_linked_order_status(self.model, order_number, status, comment, request.user)
 
                 return redirect(self.success_url)
 
@@ -606,3 +947,98 @@ class LinkedOrderUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateV
                 'form': self.form_class}
 
             return render(request, self.template_name, context)
+
+
+class ReportView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    View class summing up the Orders and Linked Orders created in a period, by item group, employee or day. It reads
+    only the rollups, which are kept up to date with every change of the orders.
+    """
+
+    permission_required = ['website.view_order', 'website.view_linkedorder']
+    template_name = 'website/report.html'
+    form_class = ReportForm
+    report_days = 30
+
+    def get(self, request):
+        form = self.form_class(request.GET)
+        cleaned_data = form.cleaned_data if form.is_valid() else {}
+        date_to = cleaned_data.get('date_to') or timezone.localdate()
+        date_from = cleaned_data.get('date_from') or date_to - timedelta(days=self.report_days - 1)
+        grouping = cleaned_data.get('grouping') or 'item_group'
+
+        reports = [('ORDERS', *get_report(OrderRollup, date_from, date_to, grouping))]
+        # the Linked Orders are not assigned to the employees
+        if grouping != 'employee':
+            reports.append(('LINKED ORDERS', *get_report(LinkedOrderRollup, date_from, date_to, grouping)))
+        if grouping == 'item_group':
+            for _title, rows, _totals in reports:
+                for row in rows:
+                    row['group'] = Item.ItemGroup(row['group']).label
+        context = {
+            'form': self.form_class(initial={'date_from': date_from, 'date_to': date_to, 'grouping': grouping}),
+            'date_from': date_from,
+            'date_to': date_to,
+            'grouping': dict(self.form_class.base_fields['grouping'].choices)[grouping],
+            'reports': reports}
+        return render(request, self.template_name, context)
+
+
+class LowStockView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    View class listing the Items which dropped to their reorder threshold, the longest waiting first. The alerts are
+    kept up to date with every change of the stock, so the page doesn't scan the Items.
+    """
+
+    permission_required = 'website.change_item'
+    template_name = 'website/low_stock.html'
+    paginate_by = 50
+
+    def get(self, request):
+        alerts = LowStockAlert.objects.select_related('item_id').only(
+            'alert_id', 'created_at', 'item_id__item_id', 'item_id__item_name', 'item_id__unit_of_measurement',
+            'item_id__quantity', 'item_id__reserved_quantity', 'item_id__reorder_threshold',
+            'item_id__storage_location', 'item_id__contact_person')
+        paginator = CursorPaginator(alerts, self.paginate_by, 'created_at', with_count=True)
+        context = {'page_obj': paginator.get_page(request.GET.get('cursor'))}
+        return render(request, self.template_name, context)
+
+
+class ReorderSuggestionView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    View class listing the Items which should be reordered according to the last demand forecast, the largest suggested
+    quantities first. The suggestions are only computed by the forecast_demand command.
+    """
+
+    permission_required = 'website.change_item'
+    template_name = 'website/reorder_suggestion.html'
+    paginate_by = 50
+
+    def get(self, request):
+        suggestions = ReorderSuggestion.objects.filter(suggested_quantity__gt=0).select_related('item_id').only(
+            'suggestion_id', 'weekly_demand', 'demand_deviation', 'reorder_point', 'suggested_quantity', 'computed_at',
+            'item_id__item_id', 'item_id__item_name', 'item_id__unit_of_measurement', 'item_id__quantity',
+            'item_id__reserved_quantity', 'item_id__contact_person')
+        paginator = CursorPaginator(suggestions, self.paginate_by, '-suggested_quantity', with_count=True)
+        context = {'page_obj': paginator.get_page(request.GET.get('cursor'))}
+        return render(request, self.template_name, context)
+
+
+class ExportView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    View class streaming all objects of the model, filtered by the same query parameters as the filter views, as a CSV
+    or JSON Lines file.
+    """
+
+    model = None
+
+    def get(self, request):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise Http404
+        filter_values = get_filter_values(self.model, request.GET)
+        response = StreamingHttpResponse(iter_export(self.model, filter_values, export_format),
+                                         content_type=EXPORT_FORMATS[export_format])
+        file_name = f'{self.model._meta.verbose_name_plural.lower().replace(" ", "_")}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+        return response